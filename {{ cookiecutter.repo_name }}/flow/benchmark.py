@@ -0,0 +1,261 @@
+import argparse
+import json
+import os
+import random
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from types import ModuleType
+from typing import Any
+
+from generate_docs import process_directory
+from metrics import METRICS_LOG_FILENAME
+from planner import BATCH_MARKER
+from review_agent import process_review
+from runner import RunOptions
+from stub_server import StubFlowServer
+from transport import FlowSession
+
+resource: ModuleType | None
+try:
+    import resource
+except ImportError:  # Windows: sem getrusage, o pico de RSS não é medido
+    resource = None
+
+DEFAULT_BASELINE = os.getenv("FLOW_BENCHMARK_BASELINE", "benchmark_baseline.json")
+DEFAULT_TOLERANCE = float(os.getenv("FLOW_BENCHMARK_TOLERANCE", "0.2"))
+DEFAULT_SIZES = (10, 1000, 10000)
+FILES_PER_DIR = 100
+
+BATCH_FILE_RE = re.compile(r'<arquivo caminho="([^"]+)">')
+
+# Métrica -> sentido em que o valor piora
+REGRESSION_CHECKS = {
+    "files_per_min": "lower",
+    "p95_duration": "higher",
+    "p99_duration": "higher",
+    "peak_rss_mb": "higher",
+}
+
+
+def synthetic_source(index: int, rng: random.Random) -> str:
+    """Módulo Python com 1 a 40 funções, para misturar arquivos pequenos (em lote) e médios."""
+    functions = []
+    for i in range(rng.randint(1, 40)):
+        functions.append(
+            f"def function_{index}_{i}(values):\n"
+            f'    """Soma os valores com peso {i}."""\n'
+            f"    total = 0\n"
+            f"    for value in values:\n"
+            f"        total += value * {i}\n"
+            f"    return total\n"
+        )
+    return "\n\n".join(functions)
+
+
+def generate_tree(root: str, n_files: int, seed: int = 42) -> None:
+    rng = random.Random(seed)  # noqa: S311 - árvore sintética reproduzível
+    for index in range(n_files):
+        folder = os.path.join(root, f"pkg_{index // FILES_PER_DIR:03d}")
+        os.makedirs(folder, exist_ok=True)
+        with open(os.path.join(folder, f"module_{index:05d}.py"), "w", encoding="utf-8") as f:
+            f.write(synthetic_source(index, rng))
+
+
+def make_responder(response_size: int) -> Callable[[str], str]:
+    """Responde como o modelo: um trecho por arquivo, com o marcador quando o prompt é um lote."""
+
+    def respond(prompt: str) -> str:
+        body = ("Documentação simulada. " * (response_size // 23 + 1))[:response_size]
+        paths = BATCH_FILE_RE.findall(prompt)
+        if len(paths) <= 1:
+            return body
+        return "\n\n".join(f"{BATCH_MARKER} {path}\n{body}" for path in paths)
+
+    return respond
+
+
+def run_scenario(agent: str, source_dir: str, output_dir: str, workers: int) -> dict[str, Any]:
+    """Executa um agente neste processo (chamado num subprocesso, para isolar o pico de RSS)."""
+    session = FlowSession("benchmark", pool_size=max(10, workers), max_retries=3, backoff_base=0.05)
+    options = RunOptions(max_workers=workers, use_cache=False, resume=False, session=session)
+
+    started_at = time.perf_counter()
+    if agent == "docs":
+        process_directory(source_dir, output_dir, options)
+    else:
+        process_review(source_dir, output_dir, options)
+    wall = time.perf_counter() - started_at
+
+    summary: dict[str, Any] = {}
+    with open(os.path.join(output_dir, METRICS_LOG_FILENAME), encoding="utf-8") as f:
+        for line in f:
+            event = json.loads(line)
+            if event.get("event") == "run_summary":
+                summary = event
+
+    return {
+        "files_ok": summary.get("files_ok", 0),
+        "wall_s": round(wall, 2),
+        "files_per_min": round(summary.get("files_ok", 0) / wall * 60, 1) if wall else 0.0,
+        "p50_duration": summary.get("duration", {}).get("p50", 0.0),
+        "p95_duration": summary.get("duration", {}).get("p95", 0.0),
+        "p99_duration": summary.get("duration", {}).get("p99", 0.0),
+        "requests": summary.get("requests", 0),
+        "retries": summary.get("retries", 0),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def peak_rss_mb() -> float | None:
+    """Pico de memória residente deste processo, ou `None` onde não há `resource`."""
+    if resource is None:
+        return None
+    # ru_maxrss está em KiB no Linux e em bytes no macOS
+    peak_rss: int = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak_rss / (1024 * 1024) if sys.platform == "darwin" else peak_rss / 1024, 1)
+
+
+def benchmark(  # noqa: PLR0913 - as opções do stub são nomeadas
+    agents: list[str],
+    sizes: list[int],
+    workers: int,
+    *,
+    latency: float,
+    jitter: float,
+    error_rate: float,
+    response_size: int,
+) -> dict[str, dict]:
+    results = {}
+    with (
+        StubFlowServer(
+            latency=latency,
+            jitter=jitter,
+            error_rate=error_rate,
+            responder=make_responder(response_size),
+        ) as server,
+        tempfile.TemporaryDirectory(prefix="flow_bench_") as workdir,
+    ):
+        env = {**os.environ, "FLOW_BASE_URL": server.url}
+        for size in sizes:
+            source_dir = os.path.join(workdir, f"src_{size}")
+            generate_tree(source_dir, size)
+            for agent in agents:
+                name = f"{agent}_{size}"
+                output_dir = os.path.join(workdir, f"out_{name}")
+                print(f"🏃 {name}: {size} arquivo(s), {workers} worker(s)...")
+                completed = subprocess.run(  # noqa: S603 - reexecuta este script
+                    [
+                        sys.executable,
+                        os.path.abspath(__file__),
+                        "--scenario",
+                        agent,
+                        source_dir,
+                        output_dir,
+                        str(workers),
+                    ],
+                    env=env,
+                    capture_output=True,
+                    text=True,
+                    check=False,
+                )
+                if completed.returncode != 0:
+                    raise RuntimeError(f"Cenário {name} falhou:\n{completed.stderr}")
+                results[name] = json.loads(completed.stdout.strip().splitlines()[-1])
+                shutil.rmtree(output_dir, ignore_errors=True)
+            shutil.rmtree(source_dir, ignore_errors=True)
+    return results
+
+
+def compare(results: dict[str, dict], baseline: dict[str, dict], tolerance: float) -> list[str]:
+    regressions = []
+    for name, current in results.items():
+        reference = baseline.get(name)
+        if not reference:
+            continue
+        for metric, worse in REGRESSION_CHECKS.items():
+            old, new = reference.get(metric), current.get(metric)
+            if not old or new is None:
+                continue
+            if worse == "lower" and new < old * (1 - tolerance):
+                regressions.append(f"{name}.{metric}: {new} < {old} (-{tolerance:.0%})")
+            if worse == "higher" and new > old * (1 + tolerance):
+                regressions.append(f"{name}.{metric}: {new} > {old} (+{tolerance:.0%})")
+    return regressions
+
+
+def print_results(results: dict[str, dict]) -> None:
+    print(f"\n{'cenário':<14}{'arq/min':>10}{'p50':>8}{'p95':>8}{'p99':>8}{'req':>8}{'RSS MB':>9}")
+    for name, r in results.items():
+        print(
+            f"{name:<14}{r['files_per_min']:>10}{r['p50_duration']:>8}{r['p95_duration']:>8}"
+            f"{r['p99_duration']:>8}{r['requests']:>8}{r['peak_rss_mb'] or '-':>9}"
+        )
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Benchmark dos agentes do Flow contra o stub local"
+    )
+    parser.add_argument(
+        "--agents", nargs="+", choices=("docs", "review"), default=["docs", "review"]
+    )
+    parser.add_argument("--sizes", nargs="+", type=int, default=list(DEFAULT_SIZES))
+    parser.add_argument("-j", "--workers", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--jitter", type=float, default=0.02)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--response-size", type=int, default=2000)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument(
+        "--save-baseline", action="store_true", help="grava os resultados como nova referência"
+    )
+    args = parser.parse_args(argv)
+
+    results = benchmark(
+        args.agents,
+        args.sizes,
+        args.workers,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        response_size=args.response_size,
+    )
+    print_results(results)
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n💾 Referência salva em {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"\n💡 Sem referência em {args.baseline}; use --save-baseline para criá-la.")
+        return 0
+
+    with open(args.baseline, encoding="utf-8") as f:
+        regressions = compare(results, json.load(f), args.tolerance)
+    if regressions:
+        print("\n❌ Regressões em relação à referência:")
+        for regression in regressions:
+            print(f"   {regression}")
+        return 1
+    print("\n✅ Sem regressões em relação à referência.")
+    return 0
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--scenario":
+        agent, source, output, n_workers = sys.argv[2:6]
+        # A saída dos agentes vai para stderr; a última linha de stdout é o resultado em JSON
+        stdout, sys.stdout = sys.stdout, sys.stderr
+        result = run_scenario(agent, source, output, int(n_workers))
+        sys.stdout = stdout
+        print(json.dumps(result))
+    else:
+        sys.exit(main())
@@ -0,0 +1,144 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+DEFAULT_CACHE_DIR = os.getenv("FLOW_CACHE_DIR", ".flow_cache")
+DEFAULT_MAX_AGE_DAYS = float(os.getenv("FLOW_CACHE_MAX_AGE_DAYS", "30"))
+DEFAULT_MAX_SIZE_MB = float(os.getenv("FLOW_CACHE_MAX_SIZE_MB", "512"))
+
+
+class ResponseCache:
+    """Cache em disco das respostas do Flow, endereçado pelo conteúdo da requisição.
+
+    A chave é o SHA-256 do prompt completo (arquivo + template), do modelo e do
+    agente, então qualquer mudança em um deles gera uma nova entrada. A validade conta a
+    partir do `created_at` gravado na entrada; o mtime, renovado a cada acerto, só ordena a
+    evicção por tamanho (as menos usadas saem primeiro).
+    """
+
+    def __init__(
+        self,
+        cache_dir: str = DEFAULT_CACHE_DIR,
+        max_age_days: float = DEFAULT_MAX_AGE_DAYS,
+        max_size_mb: float = DEFAULT_MAX_SIZE_MB,
+        enabled: bool = True,
+    ):
+        self.cache_dir = cache_dir
+        self.max_age = max_age_days * 86400
+        self.max_size = int(max_size_mb * 1024 * 1024)
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def key(*parts: str) -> str:
+        digest = hashlib.sha256()
+        for part in parts:
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def get(self, key: str, count_miss: bool = True) -> str | None:
+        """Valor guardado em `key`; com `count_miss=False` uma ausência não entra nas
+        estatísticas (consultas antecipadas que, sem resultado, viram outra requisição)."""
+        if not self.enabled:
+            return None
+
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                entry = json.load(f)
+            value = str(entry["value"])
+            expired = time.time() - entry["created_at"] > self.max_age
+        except (OSError, ValueError, KeyError, TypeError):
+            self._count(hit=False, count_miss=count_miss)
+            return None
+        if expired:
+            self._remove(path)
+            self._count(hit=False, count_miss=count_miss)
+            return None
+
+        # Atualiza o mtime para que a evicção por tamanho descarte primeiro o que não é usado
+        os.utime(path)
+        self._count(hit=True)
+        return value
+
+    def _count(self, hit: bool, count_miss: bool = True) -> None:
+        # Um mesmo cache atende várias threads do executor
+        with self.lock:
+            if hit:
+                self.hits += 1
+            elif count_miss:
+                self.misses += 1
+
+    @staticmethod
+    def _created_at(path: str) -> float | None:
+        try:
+            with open(path, encoding="utf-8") as f:
+                return float(json.load(f)["created_at"])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def set(self, key: str, value: str) -> None:
+        if not self.enabled:
+            return
+
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"created_at": time.time(), "value": value}, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def evict(self) -> int:
+        """Remove entradas expiradas e, se preciso, as menos usadas até caber em `max_size`."""
+        if not os.path.isdir(self.cache_dir):
+            return 0
+
+        now = time.time()
+        entries = []
+        removed = 0
+        for root, _, files in os.walk(self.cache_dir):
+            for file in files:
+                path = os.path.join(root, file)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                created_at = self._created_at(path)
+                if created_at is None:
+                    # Temporário de uma gravação em andamento ou entrada ilegível: vale o mtime
+                    created_at = stat.st_mtime
+                if now - created_at > self.max_age:
+                    removed += self._remove(path)
+                else:
+                    entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_size:
+                break
+            removed += self._remove(path)
+            total -= size
+
+        return removed
+
+    @staticmethod
+    def _remove(path: str) -> int:
+        # Várias execuções podem compartilhar o cache e limpá-lo ao mesmo tempo
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            return 0
+        return 1
+
+    def print_report(self) -> None:
+        if self.enabled:
+            print(f"🗃️ Cache: {self.hits} hit(s), {self.misses} miss(es)")
@@ -0,0 +1,200 @@
+import argparse
+import os
+import sys
+from collections.abc import Callable, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+
+from dedup import DEFAULT_NEAR_THRESHOLD
+from executor import DEFAULT_MAX_WORKERS, RunSummary
+from flow_token import TokenProvider
+from generate_docs import DOCS_INDEX_TITLE, process_directory
+from refactor_agent import REFACTOR_INDEX_TITLE, RefactorAgent
+from review_agent import REVIEW_INDEX_TITLE, process_review
+from runner import RunOptions
+from transport import FlowSession
+from writer import update_mkdocs_nav, write_index
+
+Runner = Callable[..., RunSummary]
+
+INDEX_TITLES = {
+    "docs": DOCS_INDEX_TITLE,
+    "review": REVIEW_INDEX_TITLE,
+    "refactor": REFACTOR_INDEX_TITLE,
+}
+
+
+def output_dirs(roots: Sequence[str], output_dir: str) -> list[tuple[str, str]]:
+    """Com uma única origem, a saída vai direto para `output_dir`; com várias, cada origem
+    ganha uma subpasta com o nome do diretório (com sufixo em caso de nomes repetidos)."""
+    if len(roots) == 1:
+        return [(roots[0], output_dir)]
+
+    pairs: list[tuple[str, str]] = []
+    seen: dict[str, int] = {}
+    for root in roots:
+        name = os.path.basename(os.path.abspath(root)) or "raiz"
+        seen[name] = seen.get(name, 0) + 1
+        if seen[name] > 1:
+            name = f"{name}_{seen[name]}"
+        pairs.append((root, os.path.join(output_dir, name)))
+    return pairs
+
+
+def build_runner(command: str, options: RunOptions) -> Runner:
+    if command == "docs":
+        return process_directory
+    if command == "review":
+        return process_review
+    agent = RefactorAgent(use_cache=options.use_cache, session=options.session)
+    return agent.process_directory
+
+
+def build_options(args: argparse.Namespace, workers: int, session: FlowSession) -> RunOptions:
+    options = RunOptions(
+        max_workers=workers,
+        use_cache=not args.no_cache,
+        incremental=args.incremental,
+        since_ref=args.since,
+        include=args.include,
+        resume=not args.no_resume,
+        session=session,
+        dedup=not args.no_dedup,
+        near_threshold=getattr(args, "near_dup", None) or None,
+    )
+    if args.exclude:
+        options.exclude = args.exclude
+    return options
+
+
+def run_sources(runner: Runner, pairs: list[tuple[str, str]], options: RunOptions) -> list[str]:
+    """Processa as origens em paralelo e devolve as que tiveram falhas."""
+    failed: list[str] = []
+    workers = options.max_workers
+    with (
+        ThreadPoolExecutor(max_workers=workers) as pool,
+        ThreadPoolExecutor(max_workers=min(len(pairs), workers)) as roots,
+    ):
+        # Cada origem é percorrida na sua própria thread; as requisições vão para o pool comum
+        futures = {
+            source: roots.submit(runner, source, output, replace(options, executor=pool))
+            for source, output in pairs
+        }
+        for source, future in futures.items():
+            try:
+                summary = future.result()
+            except Exception as e:
+                print(f"❌ {source}: {e}")
+                failed.append(source)
+                continue
+            if summary.failed:
+                failed.append(source)
+    return failed
+
+
+def parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="flow",
+        description="Documentação, revisão e refatoração de código com os agentes do Flow.",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    helps = {
+        "docs": "gera documentação Markdown",
+        "review": "gera relatórios de revisão técnica",
+        "refactor": "gera versões refatoradas dos scripts",
+    }
+    for command, help_text in helps.items():
+        sub = subparsers.add_parser(command, help=help_text)
+        sub.add_argument("sources", nargs="+", help="uma ou mais pastas (repositórios) de origem")
+        sub.add_argument("-o", "--output", required=True, help="pasta de saída")
+        sub.add_argument(
+            "-j",
+            "--workers",
+            type=int,
+            default=DEFAULT_MAX_WORKERS,
+            help="requisições simultâneas, somando todas as origens",
+        )
+        sub.add_argument("--no-cache", action="store_true", help="ignora o cache de respostas")
+        sub.add_argument(
+            "--incremental", action="store_true", help="processa só arquivos alterados"
+        )
+        sub.add_argument(
+            "--since",
+            default=os.getenv("FLOW_SINCE_REF"),
+            help="processa só arquivos alterados desde a referência git",
+        )
+        sub.add_argument(
+            "--no-resume", action="store_true", help="ignora o diário da execução anterior"
+        )
+        sub.add_argument(
+            "--include", action="append", help="glob de arquivos a incluir (repetível)"
+        )
+        sub.add_argument(
+            "--exclude", action="append", help="glob de arquivos/pastas a ignorar (repetível)"
+        )
+        sub.add_argument(
+            "--no-dedup", action="store_true", help="envia ao modelo também os arquivos duplicados"
+        )
+        if command != "refactor":
+            sub.add_argument(
+                "--near-dup",
+                type=float,
+                default=DEFAULT_NEAR_THRESHOLD,
+                metavar="LIMIAR",
+                help="agrupa também arquivos quase iguais (similaridade de 0 a 1, ex.: 0.9)",
+            )
+            sub.add_argument(
+                "--mkdocs",
+                metavar="MKDOCS_YML",
+                help="adiciona as páginas geradas ao nav do mkdocs.yml",
+            )
+    return parser.parse_args(argv)
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    args = parse_args(argv)
+
+    invalid = [source for source in args.sources if not os.path.isdir(source)]
+    if invalid:
+        print(f"❌ Diretório(s) de origem inválido(s): {', '.join(invalid)}")
+        return 2
+
+    workers = max(1, args.workers)
+    # Sem terminal para o login: renova só em modo headless e falha logo se não houver token
+    provider = TokenProvider(interactive=False)
+    try:
+        provider.get()
+    except Exception as e:
+        # TokenError, mas também Chrome/chromedriver ausentes no modo headless
+        print(f"❌ Sem um FLOW_TOKEN válido ({type(e).__name__}: {e}).")
+        print("   Rode `python ./flow/flow_token.py` para fazer login e tente de novo.")
+        return 2
+
+    # Um único pool de conexões e um único pool de threads para todas as origens
+    session = FlowSession(token_provider=provider, pool_size=max(10, workers))
+    try:
+        options = build_options(args, workers, session)
+        runner = build_runner(args.command, options)
+
+        pairs = output_dirs(args.sources, args.output)
+        mkdocs_config = getattr(args, "mkdocs", None)
+        if mkdocs_config and len(pairs) == 1:
+            options.mkdocs_config = mkdocs_config
+        failed = run_sources(runner, pairs, options)
+    finally:
+        session.close()
+
+    if len(pairs) > 1:
+        # Índice (e nav do mkdocs) consolidado sobre as subpastas de todas as origens
+        title = INDEX_TITLES[args.command]
+        write_index(args.output, title)
+        if mkdocs_config:
+            update_mkdocs_nav(mkdocs_config, args.output, title)
+        print(f"\n🏁 {len(pairs) - len(failed)} de {len(pairs)} origem(ns) sem falhas.")
+    for source in failed:
+        print(f"   ❌ {source}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,286 @@
+import json
+import os
+import re
+import threading
+from collections.abc import Callable, Iterator, Sequence
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from http import HTTPStatus
+from typing import Any
+
+import requests
+
+import metrics
+from cache import ResponseCache
+from flow_token import TokenProvider
+from planner import estimate_tokens
+from transport import FlowSession
+
+DEFAULT_BASE_URL = os.getenv("FLOW_BASE_URL", "https://flow.ciandt.com/channels-service")
+DEFAULT_STREAM = os.getenv("FLOW_STREAM", "1") != "0"
+STREAM_DONE_STATUSES = frozenset({"done", "completed", "finished"})
+
+CODE_FENCE_RE = re.compile(r"```\w*\n?")
+
+PostProcessor = Callable[[str], str]
+ChunkCallback = Callable[[str], None]
+
+_listeners = threading.local()
+
+
+class FlowError(Exception):
+    pass
+
+
+@contextmanager
+def chat_listener(callback: Callable[[str], None]) -> Iterator[None]:
+    """Avisa `callback(chat_id)` a cada conversa criada pela thread atual, assim que o
+    servidor devolve o `chatId` (antes do fim da resposta)."""
+    _listeners.callback = callback
+    try:
+        yield
+    finally:
+        _listeners.callback = None
+
+
+def _notify_chat(chat_id: str) -> None:
+    callback = getattr(_listeners, "callback", None)
+    if callback:
+        callback(chat_id)
+
+
+def strip_code_fences(text: str) -> str:
+    return CODE_FENCE_RE.sub("", text)
+
+
+@dataclass(frozen=True)
+class ModelSettings:
+    name: str = "claude37sonnet"
+    provider: str = "amazon-bedrock"
+    agent: str = "chat-with-docs"
+
+
+@dataclass
+class ChatRequest:
+    prompt: str
+    settings: ModelSettings = field(default_factory=ModelSettings)
+
+    def payload(self) -> dict:
+        return {
+            "content": [{"type": "text/plain", "value": self.prompt}],
+            "model": {
+                "name": self.settings.name,
+                "provider": self.settings.provider,
+                "modelSettings": [],
+            },
+            "agent": self.settings.agent,
+            "sources": [],
+            "connectors": [],
+            "operation": "new-question",
+        }
+
+
+@dataclass
+class ChatResponse:
+    content: str
+    chat_id: str | None = None
+    cached: bool = False
+    streamed: bool = False
+
+
+@dataclass
+class StreamState:
+    """O que já chegou de uma resposta em streaming (sobrevive a uma interrupção no meio)."""
+
+    chat_id: str | None = None
+    parts: list[str] = field(default_factory=list)
+    finished: bool = False
+
+
+def parse_chat_id(body: str) -> str | None:
+    first_line = body.strip().split("\n")[0]
+    chat_id: str | None = json.loads(first_line).get("chatId")
+    return chat_id
+
+
+def assistant_content(messages: list[dict]) -> list[str]:
+    return [
+        item.get("value", "")
+        for msg in messages
+        for item in msg.get("metadata", {}).get("content", [])
+        if item.get("author") == "assistant"
+    ]
+
+
+def stream_delta(event: dict) -> str:
+    content = event.get("content")
+    if isinstance(content, str):
+        return content
+    return "".join(assistant_content([event]))
+
+
+def stream_finished(event: dict) -> bool:
+    return event.get("done") is True or str(event.get("status", "")).lower() in STREAM_DONE_STATUSES
+
+
+class FlowClient:
+    """Cliente único do protocolo de chat do Flow, usado por todos os agentes.
+
+    Uma conclusão é um POST em `/v2/chat/messages` (a primeira linha NDJSON traz o
+    `chatId`) seguido de um GET em `/v1/chat/{chat_id}/messages`, do qual se concatena
+    o conteúdo do assistente, passando o resultado pelos `post_processors`.
+
+    Com `stream=True` o corpo NDJSON do POST é consumido linha a linha e o conteúdo é
+    montado à medida que chega; o GET só é feito se o stream terminar sem o evento final.
+    """
+
+    def __init__(  # noqa: PLR0913 - todas as opções do cliente são nomeadas
+        self,
+        settings: ModelSettings | None = None,
+        *,
+        namespace: str = "",
+        post_processors: Sequence[PostProcessor] = (),
+        cache: ResponseCache | None = None,
+        session: FlowSession | None = None,
+        token: str | None = None,
+        base_url: str = DEFAULT_BASE_URL,
+        stream: bool = DEFAULT_STREAM,
+    ) -> None:
+        if session is None:
+            if token:
+                session = FlowSession(token)
+            else:
+                # O provedor lê o FLOW_TOKEN do .env e o renova antes de expirar
+                provider = TokenProvider()
+                provider.get()
+                session = FlowSession(token_provider=provider)
+
+        self.settings = settings or ModelSettings()
+        self.namespace = namespace
+        self.post_processors = list(post_processors)
+        self.cache = cache or ResponseCache(enabled=False)
+        self.session = session
+        self.base_url = base_url.rstrip("/")
+        self.stream = stream
+
+    def cache_key(self, request: ChatRequest) -> str:
+        settings = request.settings
+        return ResponseCache.key(self.namespace, settings.name, settings.agent, request.prompt)
+
+    def post_process(self, text: str) -> str:
+        for processor in self.post_processors:
+            text = processor(text)
+        return text
+
+    def create_chat(self, request: ChatRequest) -> str:
+        response = self.session.post(f"{self.base_url}/v2/chat/messages", json=request.payload())
+        if response.status_code != HTTPStatus.OK:
+            raise FlowError(f"Erro inicial ({response.status_code}): {response.text}")
+
+        task = metrics.current()
+        if task:
+            task.bytes_in += len(response.content)
+        chat_id = parse_chat_id(response.text)
+        if not chat_id:
+            raise FlowError("chatId não encontrado na resposta.")
+        _notify_chat(chat_id)
+        return chat_id
+
+    @staticmethod
+    def _read_stream(
+        response: requests.Response, stream: StreamState, on_chunk: ChunkCallback | None
+    ) -> None:
+        """Lê os eventos NDJSON para `stream` até o evento final (ou o fim da resposta)."""
+        task = metrics.current()
+        for line in response.iter_lines():
+            if not line:
+                continue
+            if task:
+                task.bytes_in += len(line) + 1
+            event = json.loads(line)
+            if not stream.chat_id and event.get("chatId"):
+                stream.chat_id = event["chatId"]
+                _notify_chat(stream.chat_id)
+            delta = stream_delta(event)
+            if delta:
+                stream.parts.append(delta)
+                if on_chunk:
+                    on_chunk(delta)
+            if stream_finished(event):
+                stream.finished = True
+                return
+
+    def stream_chat(
+        self, request: ChatRequest, on_chunk: ChunkCallback | None = None
+    ) -> tuple[str, str | None]:
+        """Consome o NDJSON do POST; devolve `(chat_id, conteúdo)` ou `(chat_id, None)` se incompleto."""
+        response = self.session.post(
+            f"{self.base_url}/v2/chat/messages", json=request.payload(), stream=True
+        )
+        stream = StreamState()
+        with response:
+            if response.status_code != HTTPStatus.OK:
+                raise FlowError(f"Erro inicial ({response.status_code}): {response.text}")
+            try:
+                self._read_stream(response, stream, on_chunk)
+            except (requests.RequestException, ValueError) as e:
+                if not stream.chat_id:
+                    raise FlowError(f"Stream interrompido antes do chatId: {e}") from e
+
+        if not stream.chat_id:
+            raise FlowError("chatId não encontrado na resposta.")
+        return stream.chat_id, "".join(stream.parts) if stream.finished else None
+
+    def fetch_messages(self, chat_id: str) -> list[dict]:
+        response = self.session.get(f"{self.base_url}/v1/chat/{chat_id}/messages")
+        if response.status_code != HTTPStatus.OK:
+            raise FlowError(f"Erro ao buscar mensagens ({response.status_code}): {response.text}")
+        task = metrics.current()
+        if task:
+            task.bytes_in += len(response.content)
+        messages: list[dict[str, Any]] = response.json().get("messages", [])
+        return messages
+
+    def send(self, request: ChatRequest, on_chunk: ChunkCallback | None = None) -> ChatResponse:
+        cache_key = self.cache_key(request)
+        cached = self.cache.get(cache_key)
+        task = metrics.current()
+        if task:
+            task.cache_hits += cached is not None
+            task.cache_misses += cached is None
+        if cached is not None:
+            return ChatResponse(content=cached, cached=True)
+
+        raw = None
+        if self.stream:
+            chat_id, raw = self.stream_chat(request, on_chunk)
+        else:
+            chat_id = self.create_chat(request)
+        streamed = raw is not None
+        if raw is None:
+            raw = "".join(assistant_content(self.fetch_messages(chat_id)))
+
+        content = self.post_process(raw)
+        if task:
+            task.prompt_tokens += estimate_tokens(request.prompt)
+            task.response_tokens += estimate_tokens(raw)
+        if content:
+            self.cache.set(cache_key, content)
+        return ChatResponse(content=content, chat_id=chat_id, streamed=streamed)
+
+    def complete(self, prompt: str, on_chunk: ChunkCallback | None = None) -> str:
+        return self.send(ChatRequest(prompt, self.settings), on_chunk).content
+
+    def cached(self, prompt: str) -> str | None:
+        """Resposta já guardada para `prompt`, sem enviar nada; `None` se não houver."""
+        return self.cache.get(self.cache_key(ChatRequest(prompt, self.settings)), count_miss=False)
+
+    def remember(self, prompt: str, content: str) -> None:
+        """Guarda `content` como a resposta de `prompt` (ex.: a parte de um lote referente a um arquivo)."""
+        if content:
+            self.cache.set(self.cache_key(ChatRequest(prompt, self.settings)), content)
+
+    def resume(self, chat_id: str) -> str | None:
+        """Recupera a resposta de uma conversa já criada; `None` se ainda não houver conteúdo."""
+        raw = "".join(assistant_content(self.fetch_messages(chat_id)))
+        return self.post_process(raw) if raw else None
@@ -0,0 +1,157 @@
+import hashlib
+import os
+import re
+import zlib
+from collections import defaultdict
+from collections.abc import Iterable, Iterator
+
+from executor import FileJob, TaskResult
+from notebooks import compact, is_notebook
+
+DEFAULT_NEAR_THRESHOLD = float(os.getenv("FLOW_DEDUP_NEAR", "0")) or None
+MINHASH_PERMUTATIONS = 64
+LSH_BANDS = 16
+SHINGLE_SIZE = 5
+MERSENNE_PRIME = (1 << 61) - 1
+
+TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+
+# Coeficientes fixos para que as assinaturas sejam estáveis entre execuções
+_PERMUTATIONS = [
+    (
+        int.from_bytes(hashlib.sha256(f"a{i}".encode()).digest()[:8], "big") % MERSENNE_PRIME or 1,
+        int.from_bytes(hashlib.sha256(f"b{i}".encode()).digest()[:8], "big") % MERSENNE_PRIME,
+    )
+    for i in range(MINHASH_PERMUTATIONS)
+]
+
+
+def normalize_content(name: str, content: str) -> str:
+    """Conteúdo usado para comparar arquivos: sem saídas/contadores de execução em notebooks e
+    sem espaços no fim das linhas."""
+    if is_notebook(name):
+        content = compact(content)
+    lines = content.replace("\r\n", "\n").split("\n")
+    return "\n".join(line.rstrip() for line in lines).strip("\n")
+
+
+def minhash(text: str) -> tuple[int, ...]:
+    tokens = TOKEN_RE.findall(text)
+    shingles = {
+        zlib.crc32(" ".join(tokens[i : i + SHINGLE_SIZE]).encode("utf-8"))
+        for i in range(max(1, len(tokens) - SHINGLE_SIZE + 1))
+    }
+    return tuple(min((a * h + b) % MERSENNE_PRIME for h in shingles) for a, b in _PERMUTATIONS)
+
+
+def similarity(a: tuple[int, ...], b: tuple[int, ...]) -> float:
+    return sum(x == y for x, y in zip(a, b, strict=True)) / len(a)
+
+
+class Deduplicator:
+    """Envia ao modelo um único arquivo por grupo de duplicados e replica o resultado.
+
+    Arquivos com o mesmo conteúdo normalizado (e a mesma extensão) formam um grupo; com
+    `near_threshold`, arquivos cuja similaridade de Jaccard estimada por MinHash/LSH passa
+    do limite também entram no grupo do primeiro arquivo parecido. A varredura continua em
+    streaming: um duplicado que chega enquanto o representante está em voo espera por ele;
+    um que chega depois reaproveita a resposta já obtida.
+    """
+
+    def __init__(self, near_threshold: float | None = DEFAULT_NEAR_THRESHOLD):
+        self.near_threshold = near_threshold
+        self.rep_of: dict[str, str] = {}
+        self.followers: dict[str, list[FileJob]] = defaultdict(list)
+        self.answers: dict[str, TaskResult] = {}
+        self.ready: list[tuple[FileJob, TaskResult]] = []
+        self.signatures: dict[str, tuple[int, ...]] = {}
+        self.buckets: dict[tuple[int, tuple[int, ...]], list[str]] = defaultdict(list)
+        self.duplicates = 0
+
+    @staticmethod
+    def content_key(job: FileJob) -> str:
+        normalized = normalize_content(job.name, job.content)
+        ext = os.path.splitext(job.name)[1].lower()
+        return hashlib.sha256(f"{ext}\0{normalized}".encode()).hexdigest()
+
+    def _bands(self, signature: tuple[int, ...]) -> list[tuple[int, tuple[int, ...]]]:
+        rows = MINHASH_PERMUTATIONS // LSH_BANDS
+        return [(band, signature[band * rows : (band + 1) * rows]) for band in range(LSH_BANDS)]
+
+    def _near_rep(self, job: FileJob) -> tuple[str | None, tuple[int, ...] | None]:
+        signature = minhash(normalize_content(job.name, job.content))
+        candidates = {
+            rep
+            for band in self._bands(signature)
+            for rep in self.buckets.get(band, [])
+            if rep in self.signatures
+        }
+        best = max(
+            candidates, key=lambda rep: similarity(signature, self.signatures[rep]), default=None
+        )
+        threshold = self.near_threshold or 0.0
+        if best and similarity(signature, self.signatures[best]) >= threshold:
+            return best, signature
+        return None, signature
+
+    def unique(self, jobs: Iterable[FileJob]) -> Iterator[FileJob]:
+        """Devolve só os representantes; os duplicados ficam aguardando o resultado deles."""
+        for job in jobs:
+            key = self.content_key(job)
+            rep = self.rep_of.get(key)
+            signature = None
+            if rep is None and self.near_threshold:
+                rep, signature = self._near_rep(job)
+
+            if rep is not None:
+                self.duplicates += 1
+                if rep in self.answers:
+                    self.ready.append((job, self._copy(job, self.answers[rep])))
+                else:
+                    self.followers[rep].append(job)
+                self.rep_of.setdefault(key, rep)
+                continue
+
+            rep = job.rel_path
+            self.rep_of[key] = rep
+            if signature is not None:
+                self.signatures[rep] = signature
+                for band in self._bands(signature):
+                    self.buckets[band].append(rep)
+            yield job
+
+    @staticmethod
+    def _copy(job: FileJob, outcome: TaskResult) -> TaskResult:
+        return TaskResult(key=job.rel_path, ok=outcome.ok, value=outcome.value, error=outcome.error)
+
+    def fan_out(
+        self, results: Iterable[tuple[FileJob, TaskResult]]
+    ) -> Iterator[tuple[FileJob, TaskResult]]:
+        """Repassa cada resultado e o replica para os duplicados do arquivo."""
+        for job, outcome in results:
+            yield job, outcome
+            if outcome.ok:
+                self.answers[job.rel_path] = TaskResult(
+                    key=job.rel_path, ok=True, value=outcome.value
+                )
+                for follower in self.followers.pop(job.rel_path, []):
+                    yield follower, self._copy(follower, outcome)
+            else:
+                # O próximo duplicado que chegar vira representante e é enviado de novo
+                for key, rep in list(self.rep_of.items()):
+                    if rep == job.rel_path:
+                        del self.rep_of[key]
+                self.signatures.pop(job.rel_path, None)
+                for follower in self.followers.pop(job.rel_path, []):
+                    yield follower, self._copy(follower, outcome)
+        yield from self.drain()
+
+    def drain(self) -> Iterator[tuple[FileJob, TaskResult]]:
+        while self.ready:
+            yield self.ready.pop(0)
+
+    def print_report(self) -> None:
+        if self.duplicates:
+            print(
+                f"♻️ {self.duplicates} arquivo(s) duplicado(s) reaproveitaram a resposta de outro arquivo"
+            )
@@ -0,0 +1,139 @@
+import os
+import time
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, field
+from typing import Any
+
+from metrics import MetricsRecorder, TaskMetrics
+
+DEFAULT_MAX_WORKERS = int(os.getenv("FLOW_MAX_WORKERS", "4"))
+
+
+@dataclass
+class FileJob:
+    name: str
+    abs_path: str
+    rel_path: str
+    output_path: str
+    content: str
+
+
+@dataclass
+class TaskResult:
+    key: str
+    ok: bool
+    value: Any = None
+    error: str | None = None
+    elapsed: float = 0.0
+    metrics: TaskMetrics | None = None
+
+
+@dataclass
+class RunSummary:
+    results: list[TaskResult] = field(default_factory=list)
+    started_at: float = field(default_factory=time.perf_counter)
+
+    def add(self, result: TaskResult) -> None:
+        self.results.append(result)
+
+    @property
+    def succeeded(self) -> list[TaskResult]:
+        return [r for r in self.results if r.ok]
+
+    @property
+    def failed(self) -> list[TaskResult]:
+        return [r for r in self.results if not r.ok]
+
+    def print_report(self) -> None:
+        elapsed = time.perf_counter() - self.started_at
+        print(
+            f"\n📊 {len(self.succeeded)} sucesso(s), {len(self.failed)} falha(s) em {elapsed:.1f}s"
+        )
+        for result in self.failed:
+            print(f"   ❌ {result.key}: {result.error}")
+
+
+@contextmanager
+def partial_output(output_path: str | None) -> Iterator[Callable[[str], None] | None]:
+    """Grava a resposta em `<saída>.partial` à medida que chega; o arquivo some ao final."""
+    if output_path is None:
+        yield None
+        return
+
+    partial_path = f"{output_path}.partial"
+    os.makedirs(os.path.dirname(partial_path) or ".", exist_ok=True)
+    try:
+        with open(partial_path, "w", encoding="utf-8") as f:
+
+            def write(chunk: str) -> None:
+                f.write(chunk)
+                f.flush()
+
+            yield write
+    finally:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+
+
+def _run_task(
+    worker: Callable[[Any], Any],
+    item: Any,
+    key: str,
+    metrics: MetricsRecorder | None = None,
+    queued_at: float = 0.0,
+) -> TaskResult:
+    task = metrics.start_task(key, queued_at) if metrics else None
+    start = time.perf_counter()
+    try:
+        value = worker(item)
+    except Exception as e:
+        result = TaskResult(key=key, ok=False, error=str(e))
+    else:
+        if not value:
+            result = TaskResult(key=key, ok=False, error="resposta vazia")
+        else:
+            result = TaskResult(key=key, ok=True, value=value)
+
+    result.elapsed = time.perf_counter() - start
+    if metrics and task:
+        metrics.end_task(task, result.ok, result.elapsed)
+        result.metrics = task
+    return result
+
+
+def run_ordered(  # noqa: PLR0913 - as opções de execução são nomeadas
+    items: Iterable[Any],
+    worker: Callable[[Any], Any],
+    *,
+    key: Callable[[Any], str] = str,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    queue_size: int | None = None,
+    metrics: MetricsRecorder | None = None,
+    executor: Executor | None = None,
+) -> Iterator[tuple[Any, TaskResult]]:
+    """Executa `worker` em paralelo e devolve os resultados na ordem de entrada.
+
+    No máximo `queue_size` itens ficam em voo (padrão: 2x `max_workers`), então o
+    iterável de entrada é consumido sob demanda e a memória permanece limitada. Com
+    `executor`, as tarefas vão para um pool compartilhado (que não é encerrado aqui).
+    """
+    max_workers = max(1, max_workers)
+    queue_size = max(max_workers, queue_size or 2 * max_workers)
+    pending: deque[tuple[Any, Future]] = deque()
+
+    with nullcontext(executor) if executor else ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for item in items:
+            if len(pending) >= queue_size:
+                head, future = pending.popleft()
+                yield head, future.result()
+            queued_at = time.perf_counter()
+            pending.append(
+                (item, pool.submit(_run_task, worker, item, key(item), metrics, queued_at))
+            )
+
+        while pending:
+            head, future = pending.popleft()
+            yield head, future.result()
@@ -1,63 +1,236 @@
 import os
+import sys
+import threading
 import time
+
 import jwt
-from dotenv import set_key, load_dotenv
-from datetime import datetime
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
+from dotenv import dotenv_values, load_dotenv, set_key
+
+DEFAULT_ENV_PATH = ".env"
+DEFAULT_PROFILE_DIR = os.getenv("FLOW_BROWSER_PROFILE", ".flow_browser_profile")
+DEFAULT_REFRESH_MARGIN = float(os.getenv("FLOW_TOKEN_REFRESH_MARGIN", "300"))
+DEFAULT_REFRESH_COOLDOWN = float(os.getenv("FLOW_TOKEN_REFRESH_COOLDOWN", "60"))
+DEFAULT_HEADLESS_TIMEOUT = float(os.getenv("FLOW_TOKEN_HEADLESS_TIMEOUT", "20"))
+DEFAULT_LOGIN_TIMEOUT = float(os.getenv("FLOW_TOKEN_LOGIN_TIMEOUT", "120"))
+DRIVER_PATH_FILENAME = "chromedriver_path"
+COOKIE_POLL_INTERVAL = 0.5
+
+
+class TokenError(Exception):
+    pass
+
+
+def token_expiry(token: str) -> float:
+    """Instante (epoch) de expiração do JWT; sem `exp`, o token não expira."""
+    decoded = jwt.decode(token, options={"verify_signature": False})
+    return float(decoded.get("exp", float("inf")))
+
+
+def resolve_driver(profile_dir: str) -> str:
+    """Caminho do chromedriver: `CHROMEDRIVER_PATH`, o caminho já resolvido numa execução
+    anterior ou, só na primeira vez, o `webdriver-manager`."""
+    driver_path = os.getenv("CHROMEDRIVER_PATH")
+    if driver_path:
+        return driver_path
 
-load_dotenv()
+    cache_file = os.path.join(profile_dir, DRIVER_PATH_FILENAME)
+    if os.path.exists(cache_file):
+        with open(cache_file, encoding="utf-8") as f:
+            driver_path = f.read().strip()
+        if os.path.exists(driver_path):
+            return driver_path
 
-chrome_options = Options()
-chrome_options.add_argument("--start-maximized")
+    # Dependências do login só são importadas quando o token precisa ser renovado
+    from webdriver_manager.chrome import ChromeDriverManager  # noqa: PLC0415
 
-driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=chrome_options)
-driver.get(os.environ.get("FLOW_LOGIN_URL", "https://flow.ciandt.com/account/sign-in"))
+    driver_path = str(ChromeDriverManager().install())
+    os.makedirs(profile_dir, exist_ok=True)
+    with open(cache_file, "w", encoding="utf-8") as f:
+        f.write(driver_path)
+    return driver_path
 
-print("➡️ Faça login na janela aberta...")
 
-flow_token = None
-flow_tenant = None
-max_wait = 120
-start = time.time()
+def capture_cookies(
+    profile_dir: str, headless: bool, timeout: float
+) -> tuple[str | None, str | None]:
+    """Abre o login do Flow com o perfil persistido e devolve `(FlowToken, FlowTenant)`.
 
-while time.time() - start < max_wait:
+    Com a sessão do perfil ainda válida, os cookies aparecem sem interação, o que permite
+    renovar o token em modo headless.
+    """
+    from selenium import webdriver  # noqa: PLC0415
+    from selenium.webdriver.chrome.options import Options  # noqa: PLC0415
+    from selenium.webdriver.chrome.service import Service  # noqa: PLC0415
+
+    chrome_options = Options()
+    chrome_options.add_argument(f"--user-data-dir={os.path.abspath(profile_dir)}")
+    if headless:
+        chrome_options.add_argument("--headless=new")
+    else:
+        chrome_options.add_argument("--start-maximized")
+
+    driver = webdriver.Chrome(service=Service(resolve_driver(profile_dir)), options=chrome_options)
+    flow_token = None
+    flow_tenant = None
     try:
-        cookies = driver.get_cookies() or [] 
-        for cookie in cookies:
-            name = cookie.get("name")
-            if name == "FlowToken":
-                flow_token = cookie.get("value")
-            elif name == "FlowTenant":
-                flow_tenant = cookie.get("value")
-        if flow_token and flow_tenant:
-            break
-    except Exception as e:
-        print("Erro ao tentar ler cookies:", e)
-    time.sleep(2)
-
-driver.quit()
-
-print("\nCookies capturados:")
-print("FlowToken:", flow_token[:40] + "..." if flow_token else "NÃO encontrado")
-print("FlowTenant:", flow_tenant or "NÃO encontrado")
-
-if flow_token:
+        driver.get(os.environ.get("FLOW_LOGIN_URL", "https://flow.ciandt.com/account/sign-in"))
+        if not headless:
+            print("➡️ Faça login na janela aberta...")
+
+        start = time.time()
+        while time.time() - start < timeout:
+            try:
+                cookies = driver.get_cookies() or []
+                for cookie in cookies:
+                    name = cookie.get("name")
+                    if name == "FlowToken":
+                        flow_token = cookie.get("value")
+                    elif name == "FlowTenant":
+                        flow_tenant = cookie.get("value")
+                if flow_token and flow_tenant:
+                    break
+            except Exception as e:
+                print("Erro ao tentar ler cookies:", e)
+            time.sleep(COOKIE_POLL_INTERVAL)
+    finally:
+        driver.quit()
+    return flow_token, flow_tenant
+
+
+class TokenProvider:
+    """Fornece o `FLOW_TOKEN` aos agentes, renovando-o antes de expirar.
+
+    O token em cache (`.env`/ambiente) é usado enquanto faltar mais de `margin` segundos
+    para o `exp`. Dentro da margem, uma única thread renova o token enquanto as demais
+    seguem com o atual; a renovação tenta primeiro um Chrome headless com o perfil
+    persistido e só abre a janela de login se a sessão do perfil tiver expirado. Se a
+    renovação falhar, o token atual segue em uso e a próxima tentativa espera `cooldown`
+    segundos, em vez de abrir um Chrome a cada requisição até o token expirar.
+    """
+
+    def __init__(  # noqa: PLR0913 - as opções de renovação são nomeadas
+        self,
+        *,
+        env_path: str = DEFAULT_ENV_PATH,
+        profile_dir: str = DEFAULT_PROFILE_DIR,
+        margin: float = DEFAULT_REFRESH_MARGIN,
+        cooldown: float = DEFAULT_REFRESH_COOLDOWN,
+        headless_timeout: float = DEFAULT_HEADLESS_TIMEOUT,
+        login_timeout: float = DEFAULT_LOGIN_TIMEOUT,
+        interactive: bool = True,
+    ) -> None:
+        load_dotenv(env_path)
+        self.env_path = env_path
+        self.profile_dir = profile_dir
+        self.margin = margin
+        self.cooldown = cooldown
+        self.headless_timeout = headless_timeout
+        self.login_timeout = login_timeout
+        self.interactive = interactive
+        self.lock = threading.Lock()
+        self.token: str | None = None
+        self.expires_at = 0.0
+        self._next_attempt = 0.0
+        self._use(os.getenv("FLOW_TOKEN"))
+
+    def _use(self, token: str | None) -> bool:
+        """Adota `token` se for um JWT ainda válido."""
+        if not token:
+            return False
+        try:
+            expires_at = token_expiry(token)
+        except jwt.PyJWTError:
+            return False
+        if expires_at <= time.time():
+            return False
+        self.token, self.expires_at = token, expires_at
+        return True
+
+    def fresh(self) -> bool:
+        return bool(self.token) and self.expires_at - time.time() > self.margin
+
+    def _current(self) -> str:
+        if not self.token:
+            raise TokenError("❌ Não foi possível obter um FLOW_TOKEN válido.")
+        return self.token
+
+    def get(self) -> str:
+        if self.fresh():
+            return self._current()
+
+        now = time.time()
+        if self.token and self.expires_at > now:
+            # Ainda válido: renova sem bloquear as outras threads
+            if now >= self._next_attempt and self.lock.acquire(blocking=False):
+                try:
+                    self._refresh()
+                except Exception as e:
+                    # Qualquer falha (Chrome ausente, timeout do Selenium, .env ilegível) não
+                    # derruba a requisição: o token atual segue em uso até expirar de fato
+                    self._next_attempt = time.time() + self.cooldown
+                    print(
+                        f"⚠️ Não foi possível renovar o FLOW_TOKEN antes de expirar ({type(e).__name__}): {e}"
+                    )
+                finally:
+                    self.lock.release()
+            return self._current()
+
+        with self.lock:
+            if not self.fresh():
+                self._refresh()
+        return self._current()
+
+    def refresh(self, rejected: str | None = None) -> str:
+        """Renova o token ignorando o cache. Com `rejected` (o token que recebeu 401), não
+        renova de novo se outra thread já o tiver substituído."""
+        with self.lock:
+            if rejected is not None and self.token != rejected and self.fresh():
+                return self._current()
+            self.token, self.expires_at = None, 0.0
+            self._refresh(force=True)
+        return self._current()
+
+    def _refresh(self, force: bool = False) -> None:
+        # Outro processo (ou uma execução anterior) pode já ter renovado o .env
+        if not force and self._use(dotenv_values(self.env_path).get("FLOW_TOKEN")) and self.fresh():
+            return
+
+        attempts = [(True, self.headless_timeout)]
+        if self.interactive:
+            attempts.append((False, self.login_timeout))
+
+        for headless, timeout in attempts:
+            flow_token, flow_tenant = capture_cookies(self.profile_dir, headless, timeout)
+            if flow_token and self._use(flow_token):
+                self._save(flow_token, flow_tenant)
+                return
+            if headless and self.interactive:
+                print("🔐 Sessão do navegador expirada; é preciso fazer login novamente.")
+
+        raise TokenError("❌ Não foi possível obter um FLOW_TOKEN válido.")
+
+    def _save(self, flow_token: str, flow_tenant: str | None) -> None:
+        set_key(self.env_path, "FLOW_TOKEN", flow_token)
+        os.environ["FLOW_TOKEN"] = flow_token
+        if flow_tenant:
+            set_key(self.env_path, "FLOW_TENANT", flow_tenant)
+            os.environ["FLOW_TENANT"] = flow_tenant
+        print(
+            f"🔑 FLOW_TOKEN renovado (expira em {time.strftime('%d/%m/%Y %H:%M:%S', time.localtime(self.expires_at))})"
+        )
+
+
+if __name__ == "__main__":
+    provider = TokenProvider()
+    if provider.fresh() and "--force" not in sys.argv:
+        print("✅ FLOW_TOKEN em cache ainda é válido. Use --force para renovar mesmo assim.")
+        sys.exit(0)
+
     try:
-        decoded = jwt.decode(flow_token, options={"verify_signature": False})
-        if datetime.fromtimestamp(decoded["exp"]) > datetime.now():
-            set_key(".env", "FLOW_TOKEN", flow_token)
-            print("FlowToken salvo no .env")
-        else:
-            print("FlowToken expirado")
-    except Exception as e:
-        print("Erro ao decodificar token:", e)
-
-if flow_tenant:
-    set_key(".env", "FLOW_TENANT", flow_tenant)
-    print("FlowTenant salvo no .env")
-
-if not flow_token or not flow_tenant:
-    print("Não foi possível capturar os cookies necessários.")
+        provider.refresh()
+    except TokenError as e:
+        print(e)
+        sys.exit(1)
+
+    print("FlowToken salvo no .env")
+    print("FlowTenant:", os.getenv("FLOW_TENANT") or "NÃO encontrado")
@@ -0,0 +1,139 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections.abc import Callable, Iterable, Iterator
+from typing import Any
+
+from client import chat_listener
+from executor import FileJob
+from planner import WorkUnit
+
+JOURNAL_FILENAME = ".flow_journal.jsonl"
+
+PENDING = "pending"
+IN_FLIGHT = "in-flight"
+DONE = "done"
+FAILED = "failed"
+
+
+class JobJournal:
+    """Diário append-only do estado de cada arquivo, para retomar execuções interrompidas.
+
+    Cada linha registra `pending`, `in-flight` (com o `chatId`, assim que o Flow o devolve),
+    `done` ou `failed`. Ao reiniciar, arquivos `done` com o mesmo conteúdo são pulados e
+    arquivos `in-flight` tentam reaproveitar a conversa já criada no servidor. O diário é
+    apagado quando uma execução termina sem falhas.
+    """
+
+    def __init__(self, output_dir: str, resume: bool = True) -> None:
+        self.path = os.path.join(output_dir, JOURNAL_FILENAME)
+        self.entries: dict[str, dict] = {}
+        self.lock = threading.Lock()
+        self.resumed = 0
+
+        if os.path.exists(self.path):
+            if resume:
+                self._load()
+            else:
+                os.remove(self.path)
+        os.makedirs(output_dir, exist_ok=True)
+        # Fica aberto durante toda a execução e é fechado em `close`
+        self.file = open(self.path, "a", encoding="utf-8")  # noqa: SIM115
+
+    def _load(self) -> None:
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # Última linha truncada por um processo morto no meio da escrita
+                    continue
+                self.entries[entry["path"]] = entry
+
+    @staticmethod
+    def content_hash(job: FileJob) -> str:
+        return hashlib.sha256(job.content.encode("utf-8")).hexdigest()
+
+    def _entry(self, job: FileJob) -> dict | None:
+        entry = self.entries.get(job.rel_path)
+        if entry and entry.get("sha256") == self.content_hash(job):
+            return entry
+        return None
+
+    def mark(self, job: FileJob, state: str, **extra: Any) -> None:
+        entry = {
+            "path": job.rel_path,
+            "sha256": self.content_hash(job),
+            "state": state,
+            "ts": time.time(),
+            **extra,
+        }
+        with self.lock:
+            self.entries[job.rel_path] = entry
+            self.file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            # O flush basta se só o processo morrer; o fsync, caro, fica para o `done`: perder
+            # um `pending`/`in-flight` numa queda de energia custa no máximo reenviar o prompt
+            self.file.flush()
+            if state == DONE:
+                os.fsync(self.file.fileno())
+
+    def is_done(self, job: FileJob) -> bool:
+        entry = self._entry(job)
+        return bool(entry and entry["state"] == DONE and os.path.exists(job.output_path))
+
+    def chat_id(self, job: FileJob) -> str | None:
+        entry = self._entry(job)
+        return entry.get("chat_id") if entry and entry["state"] in (PENDING, IN_FLIGHT) else None
+
+    def pending(self, jobs: Iterable[FileJob]) -> Iterator[FileJob]:
+        """Filtra os arquivos já concluídos numa execução anterior e marca o restante como pendente."""
+        for job in jobs:
+            if self.is_done(job):
+                self.resumed += 1
+                continue
+            # Preserva o chatId de uma execução interrompida para reaproveitar a conversa
+            chat_id = self.chat_id(job)
+            self.mark(job, PENDING, **({"chat_id": chat_id} if chat_id else {}))
+            yield job
+
+    def run(
+        self,
+        unit: WorkUnit,
+        execute: Callable[[], dict[str, str]],
+        reattach: Callable[[str], str | None],
+    ) -> dict[str, str]:
+        """Executa `unit` registrando o andamento.
+
+        Para um arquivo que ficou `in-flight` com `chatId`, tenta antes `reattach(chat_id)`,
+        que busca a resposta da conversa já criada no servidor, sem reenviar o prompt.
+        """
+        job = unit.jobs[0]
+        chat_id = self.chat_id(job) if unit.kind == "single" else None
+        if chat_id:
+            try:
+                content = reattach(chat_id)
+            except Exception as e:
+                print(f"⚠️ Não foi possível reaproveitar o chat {chat_id}: {e}")
+                content = None
+            if content:
+                print(f"♻️ Reaproveitado o chat {chat_id} de {job.rel_path}")
+                return {job.rel_path: content}
+
+        for pending_job in unit.jobs:
+            self.mark(pending_job, IN_FLIGHT)
+        if unit.kind != "single":
+            return execute()
+
+        with chat_listener(lambda new_chat_id: self.mark(job, IN_FLIGHT, chat_id=new_chat_id)):
+            return execute()
+
+    def close(self, completed: bool) -> None:
+        self.file.close()
+        if self.resumed:
+            print(f"♻️ {self.resumed} arquivo(s) já concluído(s) numa execução anterior")
+        if completed and os.path.exists(self.path):
+            os.remove(self.path)
+        elif not completed:
+            print(f"📒 Execução incompleta; rode novamente para retomar ({self.path})")
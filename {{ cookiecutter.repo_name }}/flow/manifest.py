@@ -0,0 +1,110 @@
+import hashlib
+import json
+import os
+import subprocess
+import tempfile
+
+MANIFEST_FILENAME = ".flow_manifest.json"
+
+
+def git_changed_files(source_dir: str, since_ref: str) -> set[str]:
+    """Arquivos (relativos a `source_dir`) alterados desde `since_ref`, incluindo os não rastreados."""
+    # O git vem do PATH, como no restante das ferramentas do repositório
+    diff = subprocess.run(  # noqa: S603
+        ["git", "-C", source_dir, "diff", "--name-only", "--relative", since_ref, "--"],  # noqa: S607
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    untracked = subprocess.run(  # noqa: S603
+        ["git", "-C", source_dir, "ls-files", "--others", "--exclude-standard"],  # noqa: S607
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    lines = diff.stdout.splitlines() + untracked.stdout.splitlines()
+    return {os.path.normpath(line) for line in lines if line.strip()}
+
+
+class RunManifest:
+    """Registro do que já foi processado em `output_dir`, para execuções incrementais.
+
+    Cada arquivo de origem guarda tamanho, mtime, hash do conteúdo e o arquivo de saída.
+    Um arquivo só é reprocessado se mudou (ou se a saída sumiu) e, com `since_ref`,
+    apenas se também foi alterado desde aquela referência do git.
+    """
+
+    def __init__(self, output_dir: str, source_dir: str, since_ref: str | None = None) -> None:
+        self.path = os.path.join(output_dir, MANIFEST_FILENAME)
+        self.source_dir = source_dir
+        self.changed = git_changed_files(source_dir, since_ref) if since_ref else None
+        self.entries: dict[str, dict] = {}
+        self.seen: set[str] = set()
+
+        if os.path.exists(self.path):
+            with open(self.path, encoding="utf-8") as f:
+                self.entries = json.load(f).get("files", {})
+
+    @staticmethod
+    def content_hash(content: str) -> str:
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    def needs_processing(self, abs_path: str, rel_path: str) -> bool:
+        self.seen.add(rel_path)
+        if self.changed is not None and rel_path not in self.changed:
+            return False
+        entry = self.entries.get(rel_path)
+        if entry is None or not os.path.exists(entry["output_path"]):
+            return True
+
+        stat = os.stat(abs_path)
+        return bool(stat.st_size != entry["size"] or stat.st_mtime != entry["mtime"])
+
+    def same_content(self, abs_path: str, rel_path: str, content: str) -> bool:
+        """Verdadeiro se só o mtime mudou (checkout, touch) e o conteúdo é o já processado."""
+        entry = self.entries.get(rel_path)
+        if entry is None or not os.path.exists(entry["output_path"]):
+            return False
+        if self.content_hash(content) != entry["sha256"]:
+            return False
+
+        stat = os.stat(abs_path)
+        entry["size"], entry["mtime"] = stat.st_size, stat.st_mtime
+        return True
+
+    def record(self, abs_path: str, rel_path: str, output_path: str, content: str) -> None:
+        stat = os.stat(abs_path)
+        self.entries[rel_path] = {
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+            "sha256": self.content_hash(content),
+            "output_path": output_path,
+        }
+
+    def prune(self) -> int:
+        """Remove as saídas de arquivos de origem que deixaram de existir."""
+        removed = 0
+        for rel_path in list(self.entries):
+            if rel_path in self.seen or os.path.exists(os.path.join(self.source_dir, rel_path)):
+                continue
+
+            output_path = self.entries.pop(rel_path)["output_path"]
+            still_used = any(e["output_path"] == output_path for e in self.entries.values())
+            if not still_used and os.path.exists(output_path):
+                os.remove(output_path)
+                print(f"🗑️ Removido: {output_path}")
+                removed += 1
+        return removed
+
+    def save(self) -> None:
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(
+                {"source_dir": os.path.abspath(self.source_dir), "files": self.entries},
+                f,
+                indent=2,
+                ensure_ascii=False,
+            )
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,155 @@
+import json
+import math
+import os
+import threading
+import time
+from collections.abc import Sequence
+from dataclasses import asdict, dataclass
+
+METRICS_LOG_FILENAME = ".flow_metrics.jsonl"
+
+_local = threading.local()
+
+
+@dataclass
+class TaskMetrics:
+    key: str
+    files: int = 1
+    queue_wait: float = 0.0
+    post_latency: float = 0.0
+    get_latency: float = 0.0
+    requests: int = 0
+    retries: int = 0
+    bytes_out: int = 0
+    bytes_in: int = 0
+    prompt_tokens: int = 0
+    response_tokens: int = 0
+    template_bytes: int = 0
+    content_bytes: int = 0
+    cache_hits: int = 0
+    cache_misses: int = 0
+    duration: float = 0.0
+    write_time: float = 0.0
+    ok: bool = False
+
+
+def current() -> TaskMetrics | None:
+    """Métricas da tarefa em execução na thread atual (ou `None` fora de uma tarefa)."""
+    return getattr(_local, "task", None)
+
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class MetricsRecorder:
+    """Coleta métricas por tarefa, grava um evento JSONL por tarefa e resume a execução.
+
+    O executor abre a tarefa na thread de trabalho (`start_task`/`end_task`) e a sessão HTTP
+    e o cliente acumulam latências, bytes, tokens e retentativas via `current()`. O evento é
+    gravado em `finish`, chamado na thread do `OutputWriter` depois que as saídas da tarefa
+    foram gravadas, com o tempo gasto em `write_atomic` já somado em `write_time`.
+    """
+
+    def __init__(self, log_path: str | None = None, run_name: str = ""):
+        self.log_path = log_path
+        self.run_name = run_name
+        self.tasks: list[TaskMetrics] = []
+        self.started_at = time.perf_counter()
+        if log_path:
+            os.makedirs(os.path.dirname(log_path) or ".", exist_ok=True)
+            self.emit({"event": "run_start", "run": run_name, "pid": os.getpid()})
+
+    def emit(self, event: dict) -> None:
+        if not self.log_path:
+            return
+        event = {"ts": time.time(), **event}
+        with open(self.log_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(event, ensure_ascii=False) + "\n")
+
+    def start_task(self, key: str, queued_at: float) -> TaskMetrics:
+        task = TaskMetrics(key=key, queue_wait=time.perf_counter() - queued_at)
+        _local.task = task
+        return task
+
+    def end_task(self, task: TaskMetrics, ok: bool, duration: float) -> None:
+        task.ok = ok
+        task.duration = duration
+        _local.task = None
+
+    def finish(self, task: TaskMetrics | None, files: int = 1) -> None:
+        if task is None:
+            return
+        task.files = files
+        self.tasks.append(task)
+        self.emit({"event": "task", "run": self.run_name, **asdict(task)})
+
+    def summary(self) -> dict:
+        elapsed = time.perf_counter() - self.started_at
+        files = sum(t.files for t in self.tasks if t.ok)
+
+        def stats(values: list[float]) -> dict:
+            return {f"p{p}": round(percentile(values, p), 3) for p in (50, 95, 99)}
+
+        slowest = sorted(self.tasks, key=lambda t: t.duration, reverse=True)[:5]
+        return {
+            "tasks": len(self.tasks),
+            "files_ok": files,
+            "elapsed_s": round(elapsed, 2),
+            "files_per_min": round(files / elapsed * 60, 1) if elapsed else 0.0,
+            "duration": stats([t.duration for t in self.tasks]),
+            "queue_wait": stats([t.queue_wait for t in self.tasks]),
+            "write_time": stats([t.write_time for t in self.tasks if t.write_time]),
+            "post_latency": stats([t.post_latency for t in self.tasks if t.post_latency]),
+            "get_latency": stats([t.get_latency for t in self.tasks if t.get_latency]),
+            "requests": sum(t.requests for t in self.tasks),
+            "retries": sum(t.retries for t in self.tasks),
+            "bytes_out": sum(t.bytes_out for t in self.tasks),
+            "bytes_in": sum(t.bytes_in for t in self.tasks),
+            "prompt_tokens": sum(t.prompt_tokens for t in self.tasks),
+            "response_tokens": sum(t.response_tokens for t in self.tasks),
+            "template_bytes": sum(t.template_bytes for t in self.tasks),
+            "content_bytes": sum(t.content_bytes for t in self.tasks),
+            "cache_hits": sum(t.cache_hits for t in self.tasks),
+            "cache_misses": sum(t.cache_misses for t in self.tasks),
+            "slowest": [(t.key, round(t.duration, 2)) for t in slowest],
+        }
+
+    def print_report(self) -> None:
+        summary = self.summary()
+        self.emit({"event": "run_summary", "run": self.run_name, **summary})
+
+        def fmt(stats: dict) -> str:
+            return " / ".join(f"{v:.2f}s" for v in stats.values())
+
+        print(
+            f"⏱️ {summary['files_ok']} arquivo(s) em {summary['elapsed_s']}s ({summary['files_per_min']} arquivos/min)"
+        )
+        print(f"   Duração p50/p95/p99: {fmt(summary['duration'])}")
+        print(
+            f"   POST p50/p95/p99: {fmt(summary['post_latency'])} | GET p50/p95/p99: {fmt(summary['get_latency'])}"
+        )
+        print(f"   Espera na fila p50/p95/p99: {fmt(summary['queue_wait'])}")
+        print(f"   Escrita p50/p95/p99: {fmt(summary['write_time'])}")
+        print(
+            f"   {summary['requests']} requisição(ões), {summary['retries']} retentativa(s), "
+            f"~{summary['prompt_tokens']} tokens enviados, ~{summary['response_tokens']} recebidos"
+        )
+        prompt_bytes = summary["template_bytes"] + summary["content_bytes"]
+        if prompt_bytes:
+            print(
+                f"   Prompts: {summary['template_bytes'] / 1024:.1f} KiB de template + "
+                f"{summary['content_bytes'] / 1024:.1f} KiB de conteúdo "
+                f"(template = {summary['template_bytes'] / prompt_bytes:.0%} do enviado)"
+            )
+        if summary["slowest"]:
+            print(
+                "   Mais lentos: "
+                + ", ".join(f"{key} ({secs}s)" for key, secs in summary["slowest"])
+            )
+        if self.log_path:
+            print(f"   Eventos em: {self.log_path}")
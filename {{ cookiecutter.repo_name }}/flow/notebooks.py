@@ -0,0 +1,148 @@
+import json
+import os
+import re
+import sys
+import uuid
+from typing import Any
+
+NOTEBOOK_EXT = ".ipynb"
+CELL_MARKER = "# %% [{index}] {cell_type}"
+NEW_CELL = "+"
+NBFORMAT = 4
+NBFORMAT_MINOR_WITH_IDS = 5  # nbformat 4.5 introduziu o `id` das células
+CELL_MARKER_RE = re.compile(r"^# %% \[(\d+|\+)\] (code|markdown|raw)[ \t]*$", re.MULTILINE)
+NOTEBOOK_NOTE = (
+    "# Notebook Jupyter (sem as saídas): cada célula começa com `# %% [n] tipo` "
+    "(code, markdown ou raw); use o número n para se referir à célula."
+)
+
+
+def is_notebook(name: str) -> bool:
+    return name.lower().endswith(NOTEBOOK_EXT)
+
+
+def _source(cell: dict) -> str:
+    source = cell.get("source", "")
+    return "".join(source) if isinstance(source, list) else source
+
+
+def _lines(text: str) -> list[str]:
+    """Formato do nbformat: lista de linhas com a quebra de linha, exceto na última."""
+    return text.splitlines(keepends=True)
+
+
+def compact(raw: str) -> str:
+    """Representação enviada ao modelo: só o código e o markdown de cada célula, numeradas.
+
+    Saídas (imagens em base64, tabelas, logs), contadores de execução e metadados ficam de
+    fora; notebooks inválidos são devolvidos como estão.
+    """
+    try:
+        cells = json.loads(raw)["cells"]
+    except (ValueError, KeyError, TypeError):
+        return raw
+
+    blocks = [NOTEBOOK_NOTE]
+    for index, cell in enumerate(cells, start=1):
+        cell_type = cell.get("cell_type", "code")
+        blocks.append(
+            f"{CELL_MARKER.format(index=index, cell_type=cell_type)}\n{_source(cell).rstrip()}"
+        )
+    return "\n\n".join(blocks) + "\n"
+
+
+def split_cells(text: str) -> list[dict]:
+    """Células de uma resposta no formato de `compact`; o texto antes do primeiro marcador
+    (ou a resposta inteira, se não houver marcadores) vira uma célula de código nova."""
+    matches = list(CELL_MARKER_RE.finditer(text))
+    preamble = text[: matches[0].start()] if matches else text
+    preamble = "\n".join(line for line in preamble.splitlines() if line != NOTEBOOK_NOTE).strip(
+        "\n"
+    )
+
+    cells: list[dict[str, Any]] = (
+        [{"index": None, "cell_type": "code", "source": preamble}] if preamble.strip() else []
+    )
+    for match, following in zip(matches, [*matches[1:], None], strict=False):
+        end = following.start() if following else len(text)
+        index = None if match.group(1) == NEW_CELL else int(match.group(1))
+        cells.append(
+            {
+                "index": index,
+                "cell_type": match.group(2),
+                "source": text[match.end() : end].strip("\n"),
+            }
+        )
+    return cells
+
+
+def _new_cell(
+    cell_type: str, source: str, original: dict | None = None, with_id: bool = True
+) -> dict:
+    cell: dict = {"cell_type": cell_type}
+    if with_id:
+        cell["id"] = (original or {}).get("id") or uuid.uuid4().hex[:8]
+    cell["metadata"] = (original or {}).get("metadata", {})
+    if cell_type == "code":
+        cell["execution_count"] = None
+        cell["outputs"] = []
+    cell["source"] = _lines(source)
+    return cell
+
+
+def read_notebook(path: str) -> dict:
+    try:
+        with open(path, encoding="utf-8") as f:
+            notebook = json.load(f)
+        if isinstance(notebook, dict):
+            return notebook
+    except (OSError, ValueError):
+        pass
+    return {}
+
+
+def rebuild(answer: str, original: dict, header: str | None = None) -> str:
+    """Monta um notebook nbformat 4 válido a partir da resposta, célula a célula.
+
+    Células que mantêm o número da original herdam `id` e metadados dela; as demais são
+    criadas do zero. Todas saem sem saídas e sem contador de execução.
+    """
+    originals = original.get("cells", [])
+    minor = (
+        original.get("nbformat_minor", NBFORMAT_MINOR_WITH_IDS)
+        if original.get("nbformat") == NBFORMAT
+        else NBFORMAT_MINOR_WITH_IDS
+    )
+    with_id = minor >= NBFORMAT_MINOR_WITH_IDS
+
+    cells = [_new_cell("markdown", header.strip(), with_id=with_id)] if header else []
+    used = set()
+    for cell in split_cells(answer):
+        index, previous = cell["index"], None
+        if index is not None and 1 <= index <= len(originals) and index not in used:
+            used.add(index)
+            previous = originals[index - 1]
+        cells.append(_new_cell(cell["cell_type"], cell["source"], previous, with_id))
+
+    notebook = {
+        "cells": cells,
+        "metadata": original.get("metadata", {}),
+        "nbformat": NBFORMAT,
+        "nbformat_minor": minor,
+    }
+    return json.dumps(notebook, ensure_ascii=False, indent=1) + "\n"
+
+
+def notebook_output(answer: str, source_path: str, header: str | None = None) -> str:
+    return rebuild(answer, read_notebook(source_path), header)
+
+
+if __name__ == "__main__":
+    for path in sys.argv[1:]:
+        with open(path, encoding="utf-8") as f:
+            raw = f.read()
+        text = compact(raw)
+        ratio = len(text) / max(1, len(raw))
+        print(
+            f"📓 {os.path.basename(path)}: {len(raw)} -> {len(text)} caracteres ({ratio:.0%} do original)"
+        )
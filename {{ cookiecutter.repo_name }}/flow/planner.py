@@ -0,0 +1,283 @@
+import ast
+import os
+import re
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass
+
+import metrics
+from executor import FileJob, TaskResult
+
+CHARS_PER_TOKEN = 4
+DEFAULT_MAX_PROMPT_TOKENS = int(os.getenv("FLOW_MAX_PROMPT_TOKENS", "24000"))
+DEFAULT_SMALL_FILE_TOKENS = int(os.getenv("FLOW_SMALL_FILE_TOKENS", "400"))
+DEFAULT_BATCH_TOKENS = int(os.getenv("FLOW_BATCH_TOKENS", "6000"))
+DEFAULT_BATCH_MAX_FILES = int(os.getenv("FLOW_BATCH_MAX_FILES", "20"))
+
+BATCH_MARKER = "### ARQUIVO:"
+BATCH_MARKER_RE = re.compile(rf"^{re.escape(BATCH_MARKER)}\s*`?([^`\n]+?)`?\s*$", re.MULTILINE)
+BATCH_INSTRUCTION = f"""
+O conteúdo acima contém vários arquivos, cada um delimitado por <arquivo caminho="...">.
+Responda separadamente para cada arquivo, seguindo o formato pedido, e comece a resposta
+de cada um com uma linha contendo exatamente `{BATCH_MARKER} <caminho>`.
+"""
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def _block_starts(content: str, is_python: bool) -> list[int]:
+    """Linhas (0-based) onde é seguro cortar: início de cada definição de topo em Python,
+    ou de cada bloco separado por linha em branco nos demais arquivos."""
+    if is_python:
+        try:
+            tree = ast.parse(content)
+            nodes = []
+            for node in tree.body:
+                nodes.append(node)
+                if isinstance(node, ast.ClassDef):
+                    nodes.extend(
+                        n
+                        for n in node.body
+                        if isinstance(n, (ast.FunctionDef, ast.AsyncFunctionDef))
+                    )
+            return [
+                min([n.lineno] + [d.lineno for d in getattr(n, "decorator_list", [])]) - 1
+                for n in nodes
+            ]
+        except SyntaxError:
+            pass
+
+    lines = content.splitlines()
+    return [
+        i for i, line in enumerate(lines) if i == 0 or (line.strip() and not lines[i - 1].strip())
+    ]
+
+
+def split_source(content: str, max_tokens: int, is_python: bool = False) -> list[str]:
+    """Divide `content` em partes de até `max_tokens`, cortando em fronteiras de função/classe."""
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(content) <= max_chars:
+        return [content]
+
+    lines = content.splitlines(keepends=True)
+    starts = sorted({0, *_block_starts(content, is_python)})
+    blocks = [
+        "".join(lines[start:end])
+        for start, end in zip(starts, [*starts[1:], len(lines)], strict=True)
+    ]
+
+    parts: list[str] = []
+    current = ""
+    for block in blocks:
+        # Um bloco maior que o limite (ex.: uma classe enorme) é cortado por linhas
+        pieces = [block] if len(block) <= max_chars else _split_lines(block, max_chars)
+        for piece in pieces:
+            if current and len(current) + len(piece) > max_chars:
+                parts.append(current)
+                current = ""
+            current += piece
+    if current:
+        parts.append(current)
+    return parts
+
+
+def _split_lines(text: str, max_chars: int) -> list[str]:
+    pieces, current = [], ""
+    for line in text.splitlines(keepends=True):
+        if current and len(current) + len(line) > max_chars:
+            pieces.append(current)
+            current = ""
+        current += line
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+@dataclass
+class WorkUnit:
+    """Uma ou mais requisições que produzem as saídas de `jobs`.
+
+    `single`: um arquivo, uma requisição; `chunked`: um arquivo grande, uma requisição por
+    parte; `batch`: vários arquivos pequenos numa única requisição; `cached`: um arquivo
+    pequeno cuja resposta já está no cache (nenhuma requisição).
+    """
+
+    kind: str
+    jobs: list[FileJob]
+    parts: list[str]
+
+    @property
+    def label(self) -> str:
+        if self.kind == "batch":
+            return (
+                f"lote de {len(self.jobs)} arquivo(s): {', '.join(j.rel_path for j in self.jobs)}"
+            )
+        if self.kind == "chunked":
+            return f"{self.jobs[0].rel_path} ({len(self.parts)} partes)"
+        if self.kind == "cached":
+            return f"{self.jobs[0].rel_path} (cache)"
+        return self.jobs[0].rel_path
+
+    @property
+    def partial_path(self) -> str | None:
+        return self.jobs[0].output_path if self.kind == "single" else None
+
+
+@dataclass(frozen=True)
+class PlanLimits:
+    """Limites em tokens (estimados) usados para dividir arquivos grandes e agrupar os pequenos."""
+
+    max_tokens: int = DEFAULT_MAX_PROMPT_TOKENS
+    small_tokens: int = DEFAULT_SMALL_FILE_TOKENS
+    batch_tokens: int = DEFAULT_BATCH_TOKENS
+    batch_max_files: int = DEFAULT_BATCH_MAX_FILES
+
+
+DEFAULT_LIMITS = PlanLimits()
+
+
+@dataclass
+class UnitClient:
+    """Como um agente monta e envia os prompts de uma unidade.
+
+    `build_prompt(conteúdo, rótulo)` monta o prompt e `complete(prompt)` o envia.
+    `build_chunk_prompt` é usado nas partes de um arquivo grande, quando a resposta de cada
+    parte não deve repetir o que só cabe uma vez no arquivo (cabeçalho, recomendações).
+    `remember(job, resposta)` guarda a resposta de cada arquivo de um lote sob a chave que
+    ele teria se fosse enviado sozinho.
+    """
+
+    build_prompt: Callable[[str, str], str]
+    complete: Callable[[str], str | None]
+    separator: str = "\n\n"
+    build_chunk_prompt: Callable[[str, str], str] | None = None
+    remember: Callable[[FileJob, str], None] | None = None
+
+
+def batch_content(jobs: list[FileJob]) -> str:
+    return "\n\n".join(
+        f'<arquivo caminho="{job.rel_path}">\n{job.content}\n</arquivo>' for job in jobs
+    )
+
+
+def split_batch_answer(answer: str, jobs: list[FileJob]) -> dict[str, str]:
+    expected = {job.rel_path for job in jobs}
+    matches = list(BATCH_MARKER_RE.finditer(answer))
+    results = {}
+    for match, following in zip(matches, [*matches[1:], None], strict=False):
+        rel_path = match.group(1).strip()
+        if rel_path in expected:
+            end = following.start() if following else len(answer)
+            results[rel_path] = answer[match.end() : end].strip()
+    return {path: text for path, text in results.items() if text}
+
+
+def plan(
+    jobs: Iterable[FileJob],
+    limits: PlanLimits = DEFAULT_LIMITS,
+    batch: bool = True,
+    cached: Callable[[FileJob], str | None] | None = None,
+) -> Iterator[WorkUnit]:
+    """Agrupa arquivos pequenos em lotes e divide os grandes, preservando a ordem de chegada.
+
+    `cached(job)` devolve a resposta já guardada de um arquivo pequeno: ele vira uma unidade
+    `cached`, sem requisição, e o lote é montado só com os arquivos que mudaram.
+    """
+    pending: list[FileJob] = []
+    pending_tokens = 0
+
+    def flush() -> WorkUnit:
+        nonlocal pending, pending_tokens
+        if len(pending) == 1:
+            unit = WorkUnit("single", pending, [pending[0].content])
+        else:
+            unit = WorkUnit("batch", pending, [batch_content(pending)])
+        pending, pending_tokens = [], 0
+        return unit
+
+    for job in jobs:
+        tokens = estimate_tokens(job.content)
+        if batch and tokens <= limits.small_tokens:
+            answer = cached(job) if cached else None
+            if answer is not None:
+                yield WorkUnit("cached", [job], [answer])
+                continue
+            if pending and (
+                pending_tokens + tokens > limits.batch_tokens
+                or len(pending) >= limits.batch_max_files
+            ):
+                yield flush()
+            pending.append(job)
+            pending_tokens += tokens
+            continue
+
+        if tokens > limits.max_tokens:
+            parts = split_source(job.content, limits.max_tokens, job.name.endswith(".py"))
+            yield WorkUnit("chunked" if len(parts) > 1 else "single", [job], parts)
+        else:
+            yield WorkUnit("single", [job], [job.content])
+
+    if pending:
+        yield flush()
+
+
+def _run_chunked(unit: WorkUnit, client: UnitClient) -> dict[str, str]:
+    job = unit.jobs[0]
+    build_prompt = client.build_chunk_prompt or client.build_prompt
+    answers = []
+    for i, part in enumerate(unit.parts, start=1):
+        answer = client.complete(
+            build_prompt(part, f"{job.rel_path} (parte {i} de {len(unit.parts)})")
+        )
+        if not answer:
+            return {}
+        answers.append(answer)
+    return {job.rel_path: client.separator.join(answers)}
+
+
+def _run_batch(unit: WorkUnit, client: UnitClient) -> dict[str, str]:
+    answer = client.complete(
+        client.build_prompt(unit.parts[0], "vários arquivos") + BATCH_INSTRUCTION
+    )
+    results = split_batch_answer(answer or "", unit.jobs)
+    for job in unit.jobs:
+        if job.rel_path in results:
+            if client.remember:
+                client.remember(job, results[job.rel_path])
+            continue
+        single = client.complete(client.build_prompt(job.content, job.rel_path))
+        if single:
+            results[job.rel_path] = single
+    return results
+
+
+def run_unit(unit: WorkUnit, client: UnitClient) -> dict[str, str]:
+    """Executa as requisições de `unit` e devolve o resultado por `rel_path`.
+
+    Arquivos que não puderem ser separados da resposta de um lote são reenviados sozinhos.
+    """
+    job = unit.jobs[0]
+    if unit.kind == "cached":
+        task = metrics.current()
+        if task:
+            task.cache_hits += 1
+        return {job.rel_path: unit.parts[0]}
+    if unit.kind == "chunked":
+        return _run_chunked(unit, client)
+    if unit.kind == "single":
+        answer = client.complete(client.build_prompt(job.content, job.rel_path))
+        return {job.rel_path: answer} if answer else {}
+    return _run_batch(unit, client)
+
+
+def unit_results(unit: WorkUnit, outcome: TaskResult) -> Iterator[tuple[FileJob, TaskResult]]:
+    """Desdobra o resultado de uma unidade em um `TaskResult` por arquivo."""
+    results = outcome.value or {}
+    for job in unit.jobs:
+        text = results.get(job.rel_path)
+        if text:
+            yield job, TaskResult(key=job.rel_path, ok=True, value=text, elapsed=outcome.elapsed)
+        else:
+            error = outcome.error or "arquivo ausente na resposta do lote"
+            yield job, TaskResult(key=job.rel_path, ok=False, error=error, elapsed=outcome.elapsed)
@@ -0,0 +1,72 @@
+import os
+import re
+import textwrap
+from dataclasses import dataclass
+from functools import cache
+
+import metrics
+from planner import CHARS_PER_TOKEN
+
+PROMPTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "prompts")
+CONTENT_FIELD = "{content}"
+
+TRAILING_SPACE_RE = re.compile(r"[ \t]+$", re.MULTILINE)
+BLANK_LINES_RE = re.compile(r"\n{3,}")
+
+
+def normalize(text: str) -> str:
+    """Remove indentação comum, espaços no fim das linhas e linhas em branco repetidas."""
+    text = TRAILING_SPACE_RE.sub("", textwrap.dedent(text))
+    return BLANK_LINES_RE.sub("\n\n", text).strip() + "\n"
+
+
+@dataclass(frozen=True)
+class PromptTemplate:
+    """Template de prompt já normalizado e dividido em torno de `{content}`.
+
+    O conteúdo do arquivo é concatenado entre `head` e `tail` sem passar por `str.format`
+    (chaves no código não precisam de escape); os demais campos (`{filename}` etc.) são
+    preenchidos só nos trechos fixos, que são pequenos.
+    """
+
+    name: str
+    head: str
+    tail: str
+
+    @classmethod
+    def from_text(cls, name: str, text: str) -> "PromptTemplate":
+        text = normalize(text)
+        if text.count(CONTENT_FIELD) != 1:
+            raise ValueError(f"O template {name} deve conter {CONTENT_FIELD} exatamente uma vez")
+        head, tail = text.split(CONTENT_FIELD)
+        return cls(name, head, tail)
+
+    @property
+    def overhead_bytes(self) -> int:
+        return len((self.head + self.tail).encode("utf-8"))
+
+    def render(self, content: str, **fields: str) -> str:
+        head = self.head.format(**fields)
+        tail = self.tail.format(**fields)
+        task = metrics.current()
+        if task:
+            task.template_bytes += len((head + tail).encode("utf-8"))
+            task.content_bytes += len(content.encode("utf-8"))
+        return head + content + tail
+
+
+@cache
+def load_template(name: str) -> PromptTemplate:
+    """Lê `prompts/<name>.md` uma única vez por processo."""
+    with open(os.path.join(PROMPTS_DIR, f"{name}.md"), encoding="utf-8") as f:
+        return PromptTemplate.from_text(name, f.read())
+
+
+if __name__ == "__main__":
+    for file in sorted(os.listdir(PROMPTS_DIR)):
+        if file.endswith(".md"):
+            template = load_template(file[:-3])
+            size = template.overhead_bytes
+            print(
+                f"📝 {template.name}: {size} bytes (~{size // CHARS_PER_TOKEN} tokens) de template por requisição"
+            )
@@ -1,146 +1,115 @@
 import os
 import sys
+from collections.abc import Iterator, Sequence
+from dataclasses import replace
 from datetime import datetime
-from dotenv import load_dotenv
-import requests
 
+from cache import ResponseCache
+from client import ChunkCallback, FlowClient, ModelSettings
+from executor import FileJob, RunSummary
+from manifest import RunManifest
+from notebooks import compact, is_notebook, notebook_output
+from planner import UnitClient, plan
+from prompts import load_template
+from runner import AgentRun, RunOptions
+from scanner import DEFAULT_EXCLUDES, SourceScanner
+from transport import FlowSession
+from writer import mirrored_path
 
-class RefactorAgent:
-    def __init__(self):
-        load_dotenv()
-        self.token = os.getenv("FLOW_TOKEN")
-        if not self.token:
-            raise Exception("❌ FLOW_TOKEN não encontrado no .env")
-
-        self.base_url = "https://flow.ciandt.com/channels-service"
-        self.headers = {
-            "Authorization": f"Bearer {self.token}",
-            "Content-Type": "application/json"
-        }
-
-    def build_prompt(self, content, filename):
-        return f"""
-                    # system:
-                    Você é um Cientista de Dados sênior e referência técnica. Seu papel é refatorar código Python para torná-lo mais claro, organizado e aderente às melhores práticas da linguagem.
-
-                    # user:
-                    Refatore o código a seguir aplicando as seguintes diretrizes:
-
-                    1. Mantenha a funcionalidade original  
-                    2. Reestruture o código para melhor modularização e clareza  
-                    3. Use boas práticas de codificação Python (PEP8)  
-                    4. Adicione docstrings e comentários **em português** seguindo o padrão Google ou NumPy  
-                    5. Organize notebooks (`.ipynb`) com células lógicas e limpas, sem execuções desnecessárias  
-                    6. Faça nomeação adequada e descritiva de variáveis e funções  
-
-                    7. No início do script, inclua um cabeçalho com:
-
-                        - Comentário com o nome do script e a data da refatoração (comentado com `#`)
-                        - Uma docstring logo abaixo com:
-                            • O nome do script (repetido no início da docstring)
-                            • Uma descrição clara em português da funcionalidade do script
-                            • O que o script faz, como faz e com quais tecnologias
-
-                        Exemplo esperado:
-
-                        \"\"\"  
-                        flow_credentials_retriever.py  
-
-                        Script de autenticação automática no Flow CI&T.
-
-                        Este script abre um navegador Chrome para que o usuário faça login no  
-                        sistema Flow CI&T e captura os cookies de autenticação necessários.  
-                        Após capturar os cookies, o script salva as credenciais no arquivo .env.  
-                        \"\"\"  
-
-                    ⚠️ **Importante**:  
-                    - Não retorne blocos ` ```python ` ou ` ``` `  
-                    - Retorne **apenas o código refatorado cru**, sem explicações, títulos ou marcações Markdown  
-                    - Ao final do script, inclua este comentário:
-
-                    # ⚠️ Recomendação:
-                    # Após a refatoração, revise e execute o código para garantir que o comportamento permaneceu o mesmo.
-                    # Realize testes manuais ou automatizados sempre que possível.
-
-                    <arquivo>
-                    {content}
-                    </arquivo>
-                    """
-
-
-
-
-    def request_refactor(self, prompt):
-        url = f"{self.base_url}/v2/chat/messages"
-        response = requests.post(url, headers=self.headers, json={
-            "content": [{"type": "text/plain", "value": prompt}],
-            "model": {
-                "name": "claude37sonnet",
-                "provider": "amazon-bedrock",
-                "modelSettings": []
-            },
-            "agent": "chat-with-docs",
-            "sources": [],
-            "connectors": [],
-            "operation": "new-question"
-        })
-
-        if response.status_code != 200:
-            raise Exception(f"Erro na requisição: {response.text}")
-
-        chat_id = response.text.strip().split("\n")[0]
-        chat_id = eval(chat_id).get("chatId")
-        if not chat_id:
-            raise Exception("chatId não encontrado na resposta.")
-
-        # Pegar resposta final
-        response_final = requests.get(
-            f"{self.base_url}/v1/chat/{chat_id}/messages",
-            headers=self.headers
-        )
-
-        messages = response_final.json().get("messages", [])
-        content = ""
-
-        for msg in messages:
-            for item in msg.get("metadata", {}).get("content", []):
-                if item.get("author") == "assistant":
-                    content += item.get("value", "")
-
-        return content
-
-
-    def process_directory(self, input_dir: str, output_dir: str):
-        os.makedirs(output_dir, exist_ok=True)
-        count = 0
+REFACTOR_PATTERNS = ("*.py", "*.ipynb")
+REFACTOR_INDEX_TITLE = "Código refatorado"
+REFACTOR_PROMPT = load_template("refactor")
+REFACTOR_CHUNK_PROMPT = load_template("refactor_chunk")
 
-        for root, _, files in os.walk(input_dir):
-            for file in files:
-                if not file.endswith((".py", ".ipynb")) or file.startswith("."):
-                    continue
 
-                input_path = os.path.join(root, file)
-                filename_no_ext, ext = os.path.splitext(file)
-                output_filename = f"{filename_no_ext}_refatorado{ext}"
-                output_path = os.path.join(output_dir, output_filename)
-
-                with open(input_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-
-                print(f"🔧 Refatorando: {file}")
-                prompt = self.build_prompt(content, file)
-                refactored_code = self.request_refactor(prompt)
+class RefactorAgent:
+    def __init__(self, use_cache: bool = True, session: FlowSession | None = None) -> None:
+        self.client = FlowClient(
+            settings=ModelSettings(agent="chat-with-docs"),
+            namespace="refactor",
+            cache=ResponseCache(enabled=use_cache),
+            session=session,
+        )
 
-                with open(output_path, 'w', encoding='utf-8') as f:
-                    f.write("# 📄 Refatorado automaticamente via Flow\n")
-                    f.write(f"# ⏱ Data: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}\n\n")
-                    f.write(refactored_code)
+    def build_prompt(self, content: str, filename: str) -> str:
+        return REFACTOR_PROMPT.render(content)
+
+    def build_chunk_prompt(self, content: str, label: str) -> str:
+        """Partes de um arquivo grande: sem o cabeçalho e a recomendação, que só cabem uma vez."""
+        return REFACTOR_CHUNK_PROMPT.render(content, label=label)
+
+    def request_refactor(self, prompt: str, on_chunk: ChunkCallback | None = None) -> str:
+        return self.client.complete(prompt, on_chunk)
+
+    def iter_jobs(
+        self,
+        input_dir: str,
+        output_dir: str,
+        manifest: RunManifest | None = None,
+        include: Sequence[str] = REFACTOR_PATTERNS,
+        exclude: Sequence[str] = DEFAULT_EXCLUDES,
+    ) -> Iterator[FileJob]:
+        scanner = SourceScanner(input_dir, include=include, exclude=exclude)
+        for source in scanner:
+            filename_no_ext, ext = os.path.splitext(source.name)
+            output_filename = f"{filename_no_ext}_refatorado{ext}"
+            output_path = mirrored_path(output_dir, source.rel_path, output_filename)
+            if manifest and not manifest.needs_processing(source.abs_path, source.rel_path):
+                continue
+
+            content = scanner.read(source.abs_path)
+            if not content or not content.strip():
+                continue
+            if is_notebook(source.name):
+                content = compact(content)
+            if manifest and manifest.same_content(source.abs_path, source.rel_path, content):
+                continue
+
+            yield FileJob(source.name, source.abs_path, source.rel_path, output_path, content)
+
+    def process_directory(
+        self, input_dir: str, output_dir: str, options: RunOptions | None = None
+    ) -> RunSummary:
+        # Só duplicados exatos: o código refatorado de um arquivo parecido não serve para outro
+        options = replace(options or RunOptions(), near_threshold=None)
+        run = AgentRun("refactor", input_dir, output_dir, options)
+
+        def unit_client(on_chunk: ChunkCallback | None) -> UnitClient:
+            return UnitClient(
+                self.build_prompt,
+                lambda prompt: self.request_refactor(prompt, on_chunk),
+                build_chunk_prompt=self.build_chunk_prompt,
+            )
+
+        jobs = self.iter_jobs(
+            input_dir,
+            output_dir,
+            run.manifest,
+            options.include or REFACTOR_PATTERNS,
+            options.exclude,
+        )
+        # Cada saída é um script independente, então arquivos pequenos não são agrupados em lote
+        units = plan(run.pending(jobs), batch=False)
+        run.write(
+            run.execute(units, "🔧 Refatorando", unit_client, self.client.resume), _refactored
+        )
+        run.close(REFACTOR_INDEX_TITLE)
 
-                print(f"✅ Salvo em: {output_path}")
-                count += 1
+        print(f"\n✅ Refatoração concluída para {len(run.summary.succeeded)} arquivo(s).")
+        run.print_report()
+        self.client.cache.print_report()
+        self.client.cache.evict()
+        return run.summary
 
-        print(f"\n✅ Refatoração concluída para {count} arquivo(s).")
 
+def _refactored(job: FileJob, text: str) -> str:
+    timestamp = datetime.now().strftime("%d/%m/%Y %H:%M:%S")
+    if is_notebook(job.name):
+        # As células da resposta voltam para um notebook válido, com os metadados do original
+        note = f"📄 Refatorado automaticamente via Flow  \n⏱ Data: {timestamp}"
+        return notebook_output(text, job.abs_path, note)
+    header = f"# 📄 Refatorado automaticamente via Flow\n# ⏱ Data: {timestamp}\n\n"
+    return header + text
 
 
 if __name__ == "__main__":
@@ -149,10 +118,17 @@ if __name__ == "__main__":
 
     print("📂 Informe a pasta de saída para os arquivos refatorados:")
     output_dir = input(">> ").strip()
-    
+
     if not os.path.isdir(input_dir):
         print(f"❌ Diretório inválido: {input_dir}")
         sys.exit(1)
 
-    agent = RefactorAgent()
-    agent.process_directory(input_dir, output_dir)
+    options = RunOptions(
+        use_cache="--no-cache" not in sys.argv,
+        incremental="--incremental" in sys.argv,
+        since_ref=os.getenv("FLOW_SINCE_REF"),
+        resume="--no-resume" not in sys.argv,
+        dedup="--no-dedup" not in sys.argv,
+    )
+    agent = RefactorAgent(use_cache=options.use_cache)
+    agent.process_directory(input_dir, output_dir, options)
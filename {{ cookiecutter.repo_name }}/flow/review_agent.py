@@ -1,150 +1,124 @@
 import os
 import sys
-import json
-import requests
-from dotenv import load_dotenv
-from typing import Optional
+from collections.abc import Iterator, Sequence
 from datetime import datetime
 
+from cache import ResponseCache
+from client import ChunkCallback, FlowClient, ModelSettings, strip_code_fences
+from executor import FileJob, RunSummary
+from manifest import RunManifest
+from notebooks import compact, is_notebook
+from planner import UnitClient, plan
+from prompts import load_template
+from runner import AgentRun, RunOptions
+from scanner import DEFAULT_EXCLUDES, SourceScanner
+from transport import FlowSession
+from writer import mirrored_path
+
 
 class ExceptionHandler:
     @staticmethod
-    def handle_exception(exception, context=""):
-        print(f"Error in {context}: {str(exception)}")
+    def handle_exception(exception: Exception, context: str = "") -> None:
+        print(f"Error in {context}: {exception!s}")
 
 
 class ReviewAgent:
-    def __init__(self):
-        load_dotenv()
-        self.token = os.getenv("FLOW_TOKEN")
-        if not self.token:
-            raise Exception("❌ FLOW_TOKEN não encontrado no .env")
-
-        self.base_url = "https://flow.ciandt.com/channels-service"
-        self.headers = {
-            "Authorization": f"Bearer " + self.token,
-            "Content-Type": "application/json"
-        }
-
-    def create_payload(self, message: str):
-        return {
-            "content": [{"type": "text/plain", "value": message}],
-            "model": {
-                "name": "claude37sonnet",
-                "provider": "amazon-bedrock",
-                "modelSettings": []
-            },
-            "agent": "code-review",
-            "sources": [],
-            "connectors": [],
-            "operation": "new-question"
-        }
-
-    def analyze(self, code: str, filename: str) -> Optional[str]:
+    def __init__(self, use_cache: bool = True, session: FlowSession | None = None) -> None:
+        self.client = FlowClient(
+            settings=ModelSettings(agent="code-review"),
+            namespace="review",
+            post_processors=[strip_code_fences],
+            cache=ResponseCache(enabled=use_cache),
+            session=session,
+        )
+
+    def analyze(
+        self, code: str, filename: str, on_chunk: ChunkCallback | None = None
+    ) -> str | None:
+        return self.ask(self.build_prompt(code, filename), on_chunk)
+
+    def ask(self, prompt: str, on_chunk: ChunkCallback | None = None) -> str | None:
         try:
-            prompt = self.build_prompt(code, filename)
-            url1 = f"{self.base_url}/v2/chat/messages"
-            resp1 = requests.post(url1, headers=self.headers, json=self.create_payload(prompt))
-
-            if resp1.status_code != 200:
-                ExceptionHandler.handle_exception(Exception(resp1.text), context="analyze/init")
-                return None
-
-            chat_id = json.loads(resp1.text.strip().split("\n")[0]).get("chatId")
-            if not chat_id:
-                return None
-
-            url2 = f"{self.base_url}/v1/chat/{chat_id}/messages"
-            resp2 = requests.get(url2, headers=self.headers)
-
-            if resp2.status_code != 200:
-                ExceptionHandler.handle_exception(Exception(resp2.status_code), context="analyze/fetch")
-                return None
-
-            result = ""
-            for msg in resp2.json().get("messages", []):
-                for item in msg.get("metadata", {}).get("content", []):
-                    if item.get("author") == "assistant":
-                        result += self.clean(item.get("value", ""))
-
-            return result
-
+            return self.client.complete(prompt, on_chunk)
         except Exception as e:
-            ExceptionHandler.handle_exception(e, context="analyze/global")
+            ExceptionHandler.handle_exception(e, context="analyze")
             return None
 
-    def build_prompt(self, content, filename):
-        return f"""
-                # system:
-                Você é um Tech Lead especializado em Ciência de Dados. Seu papel é revisar scripts de Python (.py e .ipynb), avaliando qualidade técnica, boas práticas e legibilidade.
-
-                # user:
-                Revise o arquivo `{filename}` a seguir com atenção técnica. Aponte:
-
-                1. Aderência a boas práticas de Python e PEP8
-                2. Presença, clareza e padrão das docstrings (Google, NumPy, etc.)
-                3. Organização, modularidade e estrutura
-                4. Nomenclatura de variáveis e funções
-                5. Uso adequado de bibliotecas de ciência de dados
-                6. Sugestões para melhoria de performance, leitura e manutenção
-                7. Pontos de alerta ou antipadrões
-
-                Seu relatório deve conter:
-
-                - Título do arquivo
-                - Pontos positivos
-                - Pontos de atenção
-                - Sugestões de melhoria
-                - Conclusão geral sobre a qualidade técnica do código
-
-                Responda com um tom técnico, claro e direto. Não inclua blocos de código desnecessários.
-                <arquivo>
-                {content}
-                </arquivo>
-                        """
-
-    def clean(self, text):
-        import re
-        return re.sub(r'```[\w]*\n?|```', '', text)
-
-
-def process_review(source_dir, output_dir):
-    os.makedirs(output_dir, exist_ok=True)
-    agent = ReviewAgent()
-    count = 0
-
-    for root, _, files in os.walk(source_dir):
-        for file in files:
-            if not file.endswith(('.py', '.ipynb')):
-                continue
-
-            abs_path = os.path.join(root, file)
-            try:
-                with open(abs_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-            except UnicodeDecodeError:
-                with open(abs_path, 'r', encoding='latin-1') as f:
-                    content = f.read()
-
-            if not content.strip():
-                continue
-
-            print(f"🔍 Revisando: {file}")
-            review = agent.analyze(content, file)
-            if review:
-                filename_base = os.path.splitext(file)[0]
-                output_path = os.path.join(output_dir, f"{filename_base}_review.md")
-
-                with open(output_path, 'w', encoding='utf-8') as out:
-                    out.write(f"# Revisão Técnica: {file}\n")
-                    out.write(f"Data: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}\n\n")
-                    out.write(review)
-
-                print(f"✅ Salvo em: {output_path}")
-                count += 1
-
-    print(f"\n🧾 {count} arquivo(s) revisado(s) com sucesso.")
+    def build_prompt(self, content: str, filename: str) -> str:
+        return REVIEW_PROMPT.render(content, filename=filename)
+
+
+REVIEW_PATTERNS = ("*.py", "*.ipynb")
+REVIEW_INDEX_TITLE = "Revisões técnicas"
+REVIEW_PROMPT = load_template("review")
+
+
+def iter_jobs(
+    source_dir: str,
+    output_dir: str,
+    manifest: RunManifest | None = None,
+    include: Sequence[str] = REVIEW_PATTERNS,
+    exclude: Sequence[str] = DEFAULT_EXCLUDES,
+) -> Iterator[FileJob]:
+    scanner = SourceScanner(source_dir, include=include, exclude=exclude)
+    for source in scanner:
+        if manifest and not manifest.needs_processing(source.abs_path, source.rel_path):
+            continue
+
+        content = scanner.read(source.abs_path)
+        if not content or not content.strip():
+            continue
+        if is_notebook(source.name):
+            content = compact(content)
+        if manifest and manifest.same_content(source.abs_path, source.rel_path, content):
+            continue
+
+        filename_base = os.path.splitext(source.name)[0]
+        output_path = mirrored_path(output_dir, source.rel_path, f"{filename_base}_review.md")
+        yield FileJob(source.name, source.abs_path, source.rel_path, output_path, content)
+
+
+def _header(job: FileJob, text: str) -> str:
+    return (
+        f"# Revisão Técnica: {job.name}\nData: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}\n\n"
+    ) + text
+
+
+def process_review(
+    source_dir: str, output_dir: str, options: RunOptions | None = None
+) -> RunSummary:
+    options = options or RunOptions()
+    agent = ReviewAgent(use_cache=options.use_cache, session=options.session)
+    client = agent.client
+    run = AgentRun("review", source_dir, output_dir, options)
+
+    def unit_client(on_chunk: ChunkCallback | None) -> UnitClient:
+        return UnitClient(
+            agent.build_prompt,
+            lambda prompt: agent.ask(prompt, on_chunk),
+            separator="\n\n---\n\n",
+            remember=lambda job, text: client.remember(
+                agent.build_prompt(job.content, job.rel_path), text
+            ),
+        )
+
+    jobs = iter_jobs(
+        source_dir, output_dir, run.manifest, options.include or REVIEW_PATTERNS, options.exclude
+    )
+    # Arquivos pequenos já revisados (sozinhos ou num lote) saem do cache antes de formar lotes
+    units = plan(
+        run.pending(jobs),
+        cached=lambda job: client.cached(agent.build_prompt(job.content, job.rel_path)),
+    )
+    run.write(run.execute(units, "🔍 Revisando", unit_client, client.resume), _header)
+    run.close(REVIEW_INDEX_TITLE)
+
+    print(f"\n🧾 {len(run.summary.succeeded)} arquivo(s) revisado(s) com sucesso.")
     print(f"📁 Relatórios salvos em: {output_dir}")
+    run.print_report()
+    client.cache.print_report()
+    client.cache.evict()
+    return run.summary
 
 
 if __name__ == "__main__":
@@ -158,4 +132,14 @@ if __name__ == "__main__":
         print(f"❌ Diretório inválido: {src}")
         sys.exit(1)
 
-    process_review(src, dest)
+    process_review(
+        src,
+        dest,
+        RunOptions(
+            use_cache="--no-cache" not in sys.argv,
+            incremental="--incremental" in sys.argv,
+            since_ref=os.getenv("FLOW_SINCE_REF"),
+            resume="--no-resume" not in sys.argv,
+            dedup="--no-dedup" not in sys.argv,
+        ),
+    )
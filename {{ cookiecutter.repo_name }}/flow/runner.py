@@ -0,0 +1,159 @@
+import os
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from concurrent.futures import Executor
+from dataclasses import dataclass
+from functools import partial
+
+from client import ChunkCallback
+from dedup import DEFAULT_NEAR_THRESHOLD, Deduplicator
+from executor import (
+    DEFAULT_MAX_WORKERS,
+    FileJob,
+    RunSummary,
+    TaskResult,
+    partial_output,
+    run_ordered,
+)
+from journal import DONE, FAILED, JobJournal
+from manifest import RunManifest
+from metrics import METRICS_LOG_FILENAME, MetricsRecorder, TaskMetrics
+from planner import UnitClient, WorkUnit, run_unit, unit_results
+from scanner import DEFAULT_EXCLUDES
+from transport import FlowSession
+from writer import OutputWriter, update_mkdocs_nav, write_index
+
+UnitResults = Iterator[tuple[WorkUnit, TaskResult]]
+
+
+@dataclass
+class RunOptions:
+    """Opções de uma execução dos agentes (docs, review e refactor).
+
+    Sem `include`, cada agente usa os próprios padrões de arquivo. `executor` é o pool de
+    threads compartilhado pela CLI quando várias origens são processadas juntas.
+    """
+
+    max_workers: int = DEFAULT_MAX_WORKERS
+    use_cache: bool = True
+    incremental: bool = False
+    since_ref: str | None = None
+    include: Sequence[str] | None = None
+    exclude: Sequence[str] = DEFAULT_EXCLUDES
+    resume: bool = True
+    session: FlowSession | None = None
+    executor: Executor | None = None
+    mkdocs_config: str | None = None
+    dedup: bool = True
+    near_threshold: float | None = DEFAULT_NEAR_THRESHOLD
+
+
+class AgentRun:
+    """Diário, manifesto, deduplicação, métricas e resumo de uma execução de agente.
+
+    O agente monta os jobs, diz como montar o cliente de cada unidade e como formatar a
+    saída de cada arquivo; o resto (retomada, paralelismo, gravação e relatórios) é comum.
+    """
+
+    def __init__(self, name: str, source_dir: str, output_dir: str, options: RunOptions) -> None:
+        os.makedirs(output_dir, exist_ok=True)
+        self.output_dir = output_dir
+        self.options = options
+        self.summary = RunSummary()
+        self.recorder = MetricsRecorder(
+            os.path.join(output_dir, METRICS_LOG_FILENAME), run_name=name
+        )
+        incremental = options.incremental or options.since_ref
+        self.manifest = (
+            RunManifest(output_dir, source_dir, options.since_ref) if incremental else None
+        )
+        self.journal = JobJournal(output_dir, resume=options.resume)
+        self.deduplicator = Deduplicator(options.near_threshold) if options.dedup else None
+        self.write_errors: list[str] = []
+
+    def pending(self, jobs: Iterable[FileJob]) -> Iterable[FileJob]:
+        """Jobs que ainda faltam (diário) e, com deduplicação, só um por conteúdo."""
+        jobs = self.journal.pending(jobs)
+        return self.deduplicator.unique(jobs) if self.deduplicator else jobs
+
+    def execute(
+        self,
+        units: Iterable[WorkUnit],
+        action: str,
+        unit_client: Callable[[ChunkCallback | None], UnitClient],
+        reattach: Callable[[str], str | None],
+    ) -> UnitResults:
+        """Executa as unidades em paralelo, na ordem de entrada, registrando-as no diário."""
+
+        def task(unit: WorkUnit) -> dict[str, str]:
+            print(f"{action}: {unit.label}")
+            with partial_output(unit.partial_path) as on_chunk:
+                client = unit_client(on_chunk)
+                return self.journal.run(unit, lambda: run_unit(unit, client), reattach)
+
+        return run_ordered(
+            units,
+            task,
+            key=lambda u: u.label,
+            max_workers=self.options.max_workers,
+            metrics=self.recorder,
+            executor=self.options.executor,
+        )
+
+    def _saved(self, job: FileJob) -> None:
+        print(f"✅ Salvo em: {job.output_path}")
+        self.journal.mark(job, DONE)
+        if self.manifest:
+            self.manifest.record(job.abs_path, job.rel_path, job.output_path, job.content)
+
+    def _handle(
+        self,
+        writer: OutputWriter,
+        job: FileJob,
+        outcome: TaskResult,
+        render: Callable[[FileJob, str], str],
+        task: TaskMetrics | None = None,
+    ) -> None:
+        self.summary.add(outcome)
+        if not outcome.ok:
+            self.journal.mark(job, FAILED, error=outcome.error)
+            return
+        writer.submit(
+            job.output_path,
+            render(job, outcome.value),
+            on_done=lambda: self._saved(job),
+            on_error=lambda error: self.journal.mark(job, FAILED, error=error),
+            task=task,
+        )
+
+    def write(self, results: UnitResults, render: Callable[[FileJob, str], str]) -> None:
+        """Grava `render(job, resposta)` de cada arquivo; diário e manifesto só registram o
+        que já está em disco e as métricas de cada unidade saem depois das suas gravações."""
+        with OutputWriter() as writer:
+            for unit, unit_outcome in results:
+                task = unit_outcome.metrics
+                outcomes = unit_results(unit, unit_outcome)
+                for job, outcome in (
+                    self.deduplicator.fan_out(outcomes) if self.deduplicator else outcomes
+                ):
+                    self._handle(writer, job, outcome, render, task)
+                writer.after(partial(self.recorder.finish, task, len(unit.jobs)))
+            # Duplicados que chegaram depois do último resultado
+            for job, outcome in self.deduplicator.drain() if self.deduplicator else ():
+                self._handle(writer, job, outcome, render)
+        self.write_errors = writer.errors
+
+    def close(self, index_title: str) -> None:
+        """Salva manifesto e diário e atualiza o índice (e o nav do mkdocs, se informado)."""
+        if self.manifest:
+            self.manifest.prune()
+            self.manifest.save()
+        self.journal.close(completed=not self.summary.failed and not self.write_errors)
+        write_index(self.output_dir, index_title)
+        if self.options.mkdocs_config:
+            update_mkdocs_nav(self.options.mkdocs_config, self.output_dir, index_title)
+
+    def print_report(self) -> None:
+        self.summary.print_report()
+        self.recorder.print_report()
+        if self.deduplicator:
+            self.deduplicator.print_report()
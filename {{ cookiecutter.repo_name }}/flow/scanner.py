@@ -0,0 +1,199 @@
+import codecs
+import fnmatch
+import os
+import re
+from collections.abc import Iterator, Sequence
+from dataclasses import dataclass
+from re import Pattern
+
+DEFAULT_MAX_FILE_BYTES = int(os.getenv("FLOW_MAX_FILE_BYTES", str(1024 * 1024)))
+# Notebooks carregam saídas (imagens em base64) que não são enviadas ao modelo
+DEFAULT_MAX_NOTEBOOK_BYTES = int(os.getenv("FLOW_MAX_NOTEBOOK_BYTES", str(64 * 1024 * 1024)))
+SNIFF_BYTES = 8192
+DEFAULT_EXCLUDES = (".*", "__pycache__", "node_modules", "venv", "site-packages", "*.egg-info")
+
+BOMS = (
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+
+
+@dataclass
+class ScannedFile:
+    name: str
+    abs_path: str
+    rel_path: str
+    size: int
+
+
+def _glob_to_regex(pattern: str) -> str:
+    i, out = 0, []
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("/**", i):
+            out.append("/.*")
+            i += 3
+        elif pattern[i] == "*":
+            out.append("[^/]*")
+            i += 1
+        elif pattern[i] == "?":
+            out.append("[^/]")
+            i += 1
+        elif pattern[i] == "[" and "]" in pattern[i + 1 :]:
+            end = pattern.index("]", i + 1)
+            out.append("[" + pattern[i + 1 : end].replace("!", "^", 1) + "]")
+            i = end + 1
+        else:
+            out.append(re.escape(pattern[i]))
+            i += 1
+    return "".join(out)
+
+
+@dataclass
+class IgnoreRule:
+    regex: Pattern
+    negate: bool
+    dir_only: bool
+    anchored: bool
+
+
+def parse_gitignore(path: str) -> list[IgnoreRule]:
+    rules = []
+    with open(path, encoding="utf-8", errors="replace") as f:
+        for raw in f:
+            line = raw.rstrip("\n").rstrip()
+            if not line or line.startswith("#"):
+                continue
+            negate = line.startswith("!")
+            line = line[1:] if negate else line
+            dir_only = line.endswith("/")
+            line = line.rstrip("/")
+            anchored = "/" in line
+            line = line.lstrip("/")
+            rules.append(
+                IgnoreRule(re.compile(_glob_to_regex(line) + r"\Z"), negate, dir_only, anchored)
+            )
+    return rules
+
+
+class SourceScanner:
+    """Varredura de diretório em streaming, compartilhada pelos agentes do Flow.
+
+    Percorre a árvore com uma pilha de diretórios (memória constante em relação ao número
+    de arquivos), respeita `.gitignore` e os globs de `include`/`exclude`, ignora arquivos
+    acima de `max_bytes` (`notebook_max_bytes` para `.ipynb`) e binários, e detecta a
+    codificação pelos primeiros bytes.
+    """
+
+    def __init__(  # noqa: PLR0913 - os filtros são nomeados
+        self,
+        source_dir: str,
+        *,
+        include: Sequence[str] = ("*",),
+        exclude: Sequence[str] = DEFAULT_EXCLUDES,
+        max_bytes: int = DEFAULT_MAX_FILE_BYTES,
+        notebook_max_bytes: int = DEFAULT_MAX_NOTEBOOK_BYTES,
+        use_gitignore: bool = True,
+    ) -> None:
+        self.source_dir = source_dir
+        self.include = tuple(include)
+        self.exclude = tuple(exclude)
+        self.max_bytes = max_bytes
+        self.notebook_max_bytes = notebook_max_bytes
+        self.use_gitignore = use_gitignore
+        self.skipped = 0
+
+    @staticmethod
+    def _matches(rel_path: str, patterns: Sequence[str]) -> bool:
+        rel_path = rel_path.lower()
+        name = rel_path.rsplit("/", 1)[-1]
+        return any(
+            fnmatch.fnmatch(name, p.lower()) or fnmatch.fnmatch(rel_path, p.lower())
+            for p in patterns
+        )
+
+    @staticmethod
+    def _ignored(rel_path: str, is_dir: bool, ignores: list[tuple[str, list[IgnoreRule]]]) -> bool:
+        ignored = False
+        for base, rules in ignores:
+            if base and not rel_path.startswith(base + "/"):
+                continue
+            local = rel_path[len(base) + 1 :] if base else rel_path
+            name = local.rsplit("/", 1)[-1]
+            for rule in rules:
+                if rule.dir_only and not is_dir:
+                    continue
+                if rule.regex.match(local if rule.anchored else name):
+                    ignored = not rule.negate
+        return ignored
+
+    def _limit(self, name: str) -> int:
+        return self.notebook_max_bytes if name.lower().endswith(".ipynb") else self.max_bytes
+
+    def __iter__(self) -> Iterator[ScannedFile]:
+        stack: list[tuple[str, list[tuple[str, list[IgnoreRule]]]]] = [("", [])]
+        while stack:
+            rel_dir, ignores = stack.pop()
+            abs_dir = os.path.join(self.source_dir, rel_dir)
+
+            gitignore = os.path.join(abs_dir, ".gitignore")
+            if self.use_gitignore and os.path.isfile(gitignore):
+                ignores = [*ignores, (rel_dir, parse_gitignore(gitignore))]
+
+            try:
+                with os.scandir(abs_dir) as it:
+                    entries = sorted(it, key=lambda e: e.name)
+            except OSError:
+                continue
+
+            subdirs = []
+            for entry in entries:
+                rel_path = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+                is_dir = entry.is_dir(follow_symlinks=False)
+                if self._matches(rel_path, self.exclude) or self._ignored(
+                    rel_path, is_dir, ignores
+                ):
+                    continue
+                if is_dir:
+                    subdirs.append(rel_path)
+                    continue
+                if not entry.is_file() or not self._matches(rel_path, self.include):
+                    continue
+
+                size = entry.stat().st_size
+                limit = self._limit(entry.name)
+                if size > limit:
+                    print(f"⏭️ Ignorado (>{limit} bytes): {rel_path}")
+                    self.skipped += 1
+                    continue
+                yield ScannedFile(entry.name, entry.path, os.path.normpath(rel_path), size)
+
+            # Empilha em ordem reversa para visitar os subdiretórios em ordem alfabética
+            stack.extend((d, ignores) for d in reversed(subdirs))
+
+    def read(self, abs_path: str) -> str | None:
+        """Lê o arquivo uma única vez; devolve `None` para binários."""
+        with open(abs_path, "rb") as f:
+            data = f.read(self._limit(abs_path) + 1)
+
+        for bom, encoding in BOMS:
+            if data.startswith(bom):
+                return data.decode(encoding, errors="replace")
+
+        prefix = data[:SNIFF_BYTES]
+        if b"\0" in prefix:
+            self.skipped += 1
+            return None
+
+        # O prefixo pode cortar um caractere multibyte ao meio, por isso o decoder incremental
+        try:
+            codecs.getincrementaldecoder("utf-8")().decode(prefix, final=False)
+        except UnicodeDecodeError:
+            return data.decode("latin-1")
+        try:
+            return data.decode("utf-8")
+        except UnicodeDecodeError:
+            return data.decode("latin-1")
@@ -0,0 +1,202 @@
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from collections.abc import Callable
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+CHAT_MESSAGES_RE = re.compile(r"^/v1/chat/([\w-]+)/messages$")
+
+
+def default_responder(prompt: str) -> str:
+    return f"Resposta simulada para um prompt de {len(prompt)} caracteres."
+
+
+class StubHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    stub: "StubFlowServer"
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Requisições de um `StubFlowServer` (acessível por `self.server.stub`)."""
+
+    protocol_version = "HTTP/1.1"
+    server: StubHTTPServer
+
+    @property
+    def stub(self) -> "StubFlowServer":
+        return self.server.stub
+
+    def send_body(self, status: int, body: bytes, content_type: str = "application/json") -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def before_request(self) -> bool:
+        with self.stub.lock:
+            self.stub.request_count += 1
+        self.stub.simulate_latency()
+        if random.random() < self.stub.error_rate:  # noqa: S311 - falha simulada
+            self.send_body(503, b'{"error": "stub unavailable"}')
+            return False
+        return True
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        if self.path != "/v2/chat/messages":
+            self.send_body(404, b"{}")
+            return
+        if not self.before_request():
+            return
+
+        prompt = "".join(item.get("value", "") for item in payload.get("content", []))
+        chat_id = str(uuid.uuid4())
+        answer = self.stub.answer(prompt)
+        with self.stub.lock:
+            self.stub.chats[chat_id] = {"prompt": prompt, "answer": answer}
+
+        if self.stub.stream:
+            self.stream_answer(chat_id, answer)
+        else:
+            body = json.dumps({"chatId": chat_id}) + "\n"
+            self.send_body(200, body.encode("utf-8"), "application/x-ndjson")
+
+    def stream_answer(self, chat_id: str, answer: str) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        self.send_line({"chatId": chat_id})
+        chunk_size = self.stub.chunk_size
+        for start in range(0, len(answer), chunk_size):
+            self.send_line({"chatId": chat_id, "content": answer[start : start + chunk_size]})
+        self.send_line({"chatId": chat_id, "done": True})
+        self.wfile.write(b"0\r\n\r\n")
+
+    def send_line(self, event: dict) -> None:
+        data = (json.dumps(event, ensure_ascii=False) + "\n").encode("utf-8")
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def do_GET(self) -> None:
+        match = CHAT_MESSAGES_RE.match(self.path)
+        chat = self.stub.chats.get(match.group(1)) if match else None
+        if chat is None:
+            self.send_body(404, b"{}")
+            return
+        if not self.before_request():
+            return
+
+        messages = [
+            {"metadata": {"content": [{"author": "user", "value": chat["prompt"]}]}},
+            {"metadata": {"content": [{"author": "assistant", "value": chat["answer"]}]}},
+        ]
+        self.send_body(200, json.dumps({"messages": messages}, ensure_ascii=False).encode("utf-8"))
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+class StubFlowServer:
+    """Servidor local que imita o `channels-service` do Flow, para testes e benchmarks.
+
+    Responde ao POST `/v2/chat/messages` com NDJSON (primeira linha com o `chatId`) e ao
+    GET `/v1/chat/{chat_id}/messages` com o histórico da conversa. Com `stream=True` o POST
+    também envia a resposta em trechos de `chunk_size` caracteres, terminando com um evento
+    `{"done": true}`. Latência, jitter, taxa de erro (503) e tamanho da resposta são configuráveis.
+
+    Uso: `with StubFlowServer(latency=0.2) as server:` e aponte `FlowClient(base_url=server.url)`,
+    ou rode `python flow/stub_server.py --port 8765` e defina `FLOW_BASE_URL`.
+    """
+
+    def __init__(  # noqa: PLR0913 - as opções da simulação são nomeadas
+        self,
+        *,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        response_size: int | None = None,
+        responder: Callable[[str], str] = default_responder,
+        stream: bool = True,
+        chunk_size: int = 256,
+    ) -> None:
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.response_size = response_size
+        self.responder = responder
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.chats: dict[str, dict] = {}
+        self.request_count = 0
+        self.lock = threading.Lock()
+        self.httpd = StubHTTPServer((host, port), StubHandler)
+        self.httpd.stub = self
+        self.thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host!s}:{port}"
+
+    def answer(self, prompt: str) -> str:
+        text = self.responder(prompt)
+        if self.response_size:
+            text = (text * (self.response_size // max(1, len(text)) + 1))[: self.response_size]
+        return text
+
+    def simulate_latency(self) -> None:
+        delay = self.latency + random.uniform(-self.jitter, self.jitter)  # noqa: S311
+        if delay > 0:
+            time.sleep(delay)
+
+    def start(self) -> "StubFlowServer":
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self) -> "StubFlowServer":
+        return self.start()
+
+    def __exit__(self, *exc: object) -> None:
+        self.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Servidor local que simula o Flow channels-service"
+    )
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--response-size", type=int, default=None)
+    parser.add_argument("--no-stream", action="store_true", help="POST devolve apenas o chatId")
+    args = parser.parse_args()
+
+    stub = StubFlowServer(
+        port=args.port,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        response_size=args.response_size,
+        stream=not args.no_stream,
+    )
+    print(f"🧪 Stub do Flow em {stub.url} (defina FLOW_BASE_URL={stub.url})")
+    try:
+        stub.httpd.serve_forever()
+    except KeyboardInterrupt:
+        stub.httpd.server_close()
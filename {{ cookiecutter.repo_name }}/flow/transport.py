@@ -0,0 +1,188 @@
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from http import HTTPStatus
+from typing import Any
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import metrics
+from executor import DEFAULT_MAX_WORKERS
+from flow_token import TokenProvider
+
+DEFAULT_CONNECT_TIMEOUT = float(os.getenv("FLOW_CONNECT_TIMEOUT", "10"))
+DEFAULT_READ_TIMEOUT = float(os.getenv("FLOW_READ_TIMEOUT", "300"))
+DEFAULT_MAX_RETRIES = int(os.getenv("FLOW_MAX_RETRIES", "5"))
+DEFAULT_RATE_LIMIT = float(os.getenv("FLOW_RATE_LIMIT", "0"))
+
+
+class TokenBucket:
+    """Limitador de taxa: no máximo `rate` requisições/s, com rajadas de até `capacity`."""
+
+    def __init__(self, rate: float, capacity: float | None = None) -> None:
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class FlowSession:
+    """Sessão HTTP compartilhada pelos agentes do Flow.
+
+    Mantém um pool de conexões keep-alive, aplica timeouts de conexão/leitura, limita a
+    taxa de requisições e repete falhas transitórias (erros de rede, 429 e 5xx) com
+    backoff exponencial e jitter, respeitando o cabeçalho `Retry-After`.
+
+    Com um `token_provider`, o token é obtido a cada requisição (o provedor o renova antes
+    de expirar) e um 401 força uma renovação seguida de uma nova tentativa.
+    """
+
+    RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+    def __init__(  # noqa: PLR0913 - as opções de conexão e de retentativa são nomeadas
+        self,
+        token: str | None = None,
+        *,
+        pool_size: int = max(10, DEFAULT_MAX_WORKERS),
+        connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+        read_timeout: float = DEFAULT_READ_TIMEOUT,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        backoff_base: float = 1.0,
+        backoff_max: float = 60.0,
+        rate_limit: float = DEFAULT_RATE_LIMIT,
+        token_provider: TokenProvider | None = None,
+    ) -> None:
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.limiter = TokenBucket(rate_limit)
+        self.token_provider = token_provider
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({"Content-Type": "application/json"})
+        if token:
+            self.session.headers["Authorization"] = f"Bearer {token}"
+
+    def backoff(self, attempt: int) -> float:
+        # Jitter para espalhar as retentativas, não criptografia
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt))  # noqa: S311
+
+    @staticmethod
+    def retry_after(response: requests.Response) -> float | None:
+        value = response.headers.get("Retry-After")
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+    def _authorize(self, kwargs: dict) -> str | None:
+        """Coloca o token atual nos cabeçalhos da requisição e o devolve (se houver provedor)."""
+        if not self.token_provider:
+            return None
+        token = self.token_provider.get()
+        kwargs["headers"] = {**kwargs.get("headers", {}), "Authorization": f"Bearer {token}"}
+        return token
+
+    def _retry_delay(
+        self, method: str, url: str, response: requests.Response, attempt: int
+    ) -> float | None:
+        """Espera antes de repetir a requisição, ou `None` se `response` é a resposta final."""
+        if response.status_code not in self.RETRY_STATUSES or attempt >= self.max_retries:
+            return None
+        retry_after = self.retry_after(response)
+        delay = retry_after if retry_after is not None else self.backoff(attempt)
+        print(f"⚠️ {method} {url}: HTTP {response.status_code}. Nova tentativa em {delay:.1f}s")
+        response.close()
+        return delay
+
+    def request(self, method: str, url: str, **kwargs: Any) -> requests.Response:
+        kwargs.setdefault("timeout", self.timeout)
+        attempt = 0
+        reauthenticated = False
+        while True:
+            self.limiter.acquire()
+            # Fora de uma tarefa as métricas vão para um objeto descartável
+            task = metrics.current() or metrics.TaskMetrics(key="")
+            token = self._authorize(kwargs)
+            started_at = time.perf_counter()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                task.requests += 1
+                if attempt >= self.max_retries:
+                    raise
+                delay = self.backoff(attempt)
+                print(f"⚠️ {method} {url}: {e}. Nova tentativa em {delay:.1f}s")
+            else:
+                self._record(task, method, response, time.perf_counter() - started_at)
+                if (
+                    response.status_code == HTTPStatus.UNAUTHORIZED
+                    and self.token_provider
+                    and token
+                    and not reauthenticated
+                ):
+                    print(f"🔑 {method} {url}: HTTP 401. Renovando o FLOW_TOKEN")
+                    response.close()
+                    self.token_provider.refresh(rejected=token)
+                    reauthenticated = True
+                    task.retries += 1
+                    continue
+                retry_delay = self._retry_delay(method, url, response, attempt)
+                if retry_delay is None:
+                    return response
+                delay = retry_delay
+
+            task.retries += 1
+            time.sleep(delay)
+            attempt += 1
+
+    @staticmethod
+    def _record(
+        task: "metrics.TaskMetrics", method: str, response: requests.Response, latency: float
+    ) -> None:
+        # Latência até os cabeçalhos; o corpo de respostas em streaming é medido pelo cliente
+        task.requests += 1
+        body = response.request.body
+        task.bytes_out += len(body) if isinstance(body, bytes | str) else 0
+        if method == "POST":
+            task.post_latency += latency
+        else:
+            task.get_latency += latency
+
+    def post(self, url: str, **kwargs: Any) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def get(self, url: str, **kwargs: Any) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def close(self) -> None:
+        self.session.close()
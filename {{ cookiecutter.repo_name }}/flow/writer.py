@@ -0,0 +1,187 @@
+import os
+import queue
+import re
+import threading
+import time
+import uuid
+from collections.abc import Callable
+
+from metrics import TaskMetrics
+
+INDEX_FILENAME = "index.md"
+DEFAULT_WRITE_QUEUE = int(os.getenv("FLOW_WRITE_QUEUE", "256"))
+MKDOCS_BEGIN = "  # flow:begin {title} (gerado automaticamente)"
+MKDOCS_END = "  # flow:end {title}"
+NAV_RE = re.compile(r"^nav:\s*$", re.MULTILINE)
+
+
+def mirrored_path(output_dir: str, rel_path: str, filename: str) -> str:
+    """Caminho de saída que espelha a árvore de origem (evita colisão entre `a/utils.py`
+    e `b/utils.py`)."""
+    return os.path.join(output_dir, os.path.dirname(rel_path), filename)
+
+
+def write_atomic(path: str, text: str) -> None:
+    """Grava num arquivo temporário ao lado do destino e o renomeia: nunca deixa saída truncada."""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = os.path.join(directory, f".{os.path.basename(path)}.{uuid.uuid4().hex}.tmp")
+    try:
+        with open(tmp_path, "x", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+class OutputWriter:
+    """Grava as saídas numa thread dedicada, fora do laço que consome os resultados.
+
+    `submit` enfileira a gravação (bloqueia se houver mais de `queue_size` pendentes) e
+    `on_done` é chamado na thread de escrita depois que o arquivo está no lugar, para que
+    diário e manifesto só registrem saídas completas. O tempo de cada gravação é somado em
+    `task.write_time`; `after` agenda uma chamada para depois das gravações já enfileiradas.
+    """
+
+    def __init__(self, queue_size: int = DEFAULT_WRITE_QUEUE) -> None:
+        self.queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self.errors: list[str] = []
+        self.written = 0
+        self.thread = threading.Thread(target=self._run, name="flow-writer", daemon=True)
+        self.thread.start()
+
+    def submit(
+        self,
+        path: str,
+        text: str,
+        on_done: Callable[[], None] | None = None,
+        on_error: Callable[[str], None] | None = None,
+        task: TaskMetrics | None = None,
+    ) -> None:
+        self.queue.put((path, text, on_done, on_error, task))
+
+    def after(self, callback: Callable[[], None]) -> None:
+        self.queue.put((None, None, callback, None, None))
+
+    def _run(self) -> None:
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            path, text, on_done, on_error, task = item
+            if path is None:
+                try:
+                    on_done()
+                except Exception as e:
+                    print(f"❌ Erro após a gravação: {e}")
+                continue
+            try:
+                started_at = time.perf_counter()
+                write_atomic(path, text)
+                if task:
+                    task.write_time += time.perf_counter() - started_at
+                self.written += 1
+                if on_done:
+                    on_done()
+            except Exception as e:
+                print(f"❌ Erro ao gravar {path}: {e}")
+                self.errors.append(f"{path}: {e}")
+                if on_error:
+                    on_error(str(e))
+
+    def close(self) -> None:
+        self.queue.put(None)
+        self.thread.join()
+
+    def __enter__(self) -> "OutputWriter":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+
+def list_outputs(output_dir: str) -> list[str]:
+    """Saídas (relativas a `output_dir`), ignorando arquivos de controle, temporários e o índice."""
+    outputs = []
+    for root, dirs, files in os.walk(output_dir):
+        dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+        for file in sorted(files):
+            if file.startswith(".") or file.endswith(".partial"):
+                continue
+            rel_path = os.path.relpath(os.path.join(root, file), output_dir)
+            if rel_path != INDEX_FILENAME:
+                outputs.append(rel_path.replace(os.sep, "/"))
+    return outputs
+
+
+def write_index(output_dir: str, title: str) -> str:
+    """Índice único com links para todas as saídas da pasta, agrupadas por diretório."""
+    lines = [f"# {title}", ""]
+    current_dir = None
+    for rel_path in list_outputs(output_dir):
+        directory, _, name = rel_path.rpartition("/")
+        if directory != current_dir:
+            current_dir = directory
+            lines += ["", f"## {directory or '.'}", ""]
+        lines.append(f"- [{name}]({rel_path})")
+
+    path = os.path.join(output_dir, INDEX_FILENAME)
+    write_atomic(path, "\n".join(lines) + "\n")
+    print(f"🗂️ Índice salvo em: {path}")
+    return path
+
+
+def _nav_lines(tree: dict, indent: int) -> list[str]:
+    lines = []
+    for name, value in tree.items():
+        prefix = " " * indent + "- "
+        label = name.replace('"', '\\"')
+        if isinstance(value, dict):
+            lines.append(f'{prefix}"{label}":')
+            lines += _nav_lines(value, indent + 4)
+        else:
+            lines.append(f'{prefix}"{label}": "{value}"')
+    return lines
+
+
+def update_mkdocs_nav(mkdocs_config: str, output_dir: str, title: str) -> bool:
+    """Liga as páginas geradas ao `nav` do `mkdocs.yml`, num bloco delimitado que é
+    substituído a cada execução (edição textual, preservando as tags `!!python/name`)."""
+    docs_dir = os.path.join(os.path.dirname(os.path.abspath(mkdocs_config)), "docs")
+    base = os.path.relpath(os.path.abspath(output_dir), docs_dir).replace(os.sep, "/")
+    if base.startswith(".."):
+        print(f"⚠️ {output_dir} está fora de {docs_dir}; mkdocs.yml não foi alterado.")
+        return False
+
+    tree: dict = {"Índice": f"{base}/{INDEX_FILENAME}"}
+    for rel_path in list_outputs(output_dir):
+        if not rel_path.endswith(".md"):
+            continue
+        node = tree
+        *folders, name = rel_path.split("/")
+        for folder in folders:
+            node = node.setdefault(folder, {})
+        node[name[:-3]] = f"{base}/{rel_path}"
+
+    begin, end_marker = MKDOCS_BEGIN.format(title=title), MKDOCS_END.format(title=title)
+    block = [begin, *_nav_lines({title: tree}, 2), end_marker]
+
+    with open(mkdocs_config, encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    if begin in lines and end_marker in lines:
+        start, end = lines.index(begin), lines.index(end_marker)
+        lines[start : end + 1] = block
+    else:
+        nav = next((i for i, line in enumerate(lines) if NAV_RE.match(line)), None)
+        if nav is None:
+            lines += ["", "nav:", *block]
+        else:
+            end = nav + 1
+            while end < len(lines) and (lines[end].startswith((" ", "-")) and lines[end].strip()):
+                end += 1
+            lines[end:end] = block
+
+    write_atomic(mkdocs_config, "\n".join(lines) + "\n")
+    print(f"📚 Navegação do mkdocs atualizada em: {mkdocs_config}")
+    return True
@@ -0,0 +1,324 @@
+"""Leitura e escrita das camadas de dados (bronze → silver → ml → gold) em Parquet particionado.
+
+Requer `pyarrow` (instalado com `make install_data_libs`, via `pandas[parquet]`).
+"""
+
+import hashlib
+import itertools
+import json
+import os
+import threading
+import uuid
+from collections.abc import Iterable, Iterator, Sequence
+from dataclasses import asdict, dataclass
+from datetime import date, datetime, timezone
+from typing import TYPE_CHECKING, Any, TypeAlias
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+DEFAULT_DATA_DIR = os.getenv("DATA_DIR", "data")
+DEFAULT_CHUNK_ROWS = int(os.getenv("DATA_CHUNK_ROWS", "100000"))
+DEFAULT_FILE_ROWS = int(os.getenv("DATA_FILE_ROWS", "1000000"))
+
+LAYERS = {
+    "bronze": "01 - bronze",
+    "silver": "02 - silver",
+    "ml": "03 - ml",
+    "gold": "04 - gold",
+}
+WRITE_MODES = ("overwrite", "append", "error")
+INGESTION_MANIFEST = "_ingestion_manifest.jsonl"
+
+# Bronze é organizada por data de extração: <dataset>/YYYY/MM/DD/
+BRONZE_PARTITIONING = ds.partitioning(
+    pa.schema([("year", pa.int16()), ("month", pa.int8()), ("day", pa.int8())])
+)
+
+Frame: TypeAlias = "pa.Table | pa.RecordBatch | pd.DataFrame"
+Data: TypeAlias = "Frame | Iterable[Frame]"
+# Filtros no formato do pandas/pyarrow: [("year", "=", 2024), ("month", "in", [1, 2])]
+Filters: TypeAlias = ds.Expression | list[tuple[str, str, Any]] | list[list[tuple[str, str, Any]]]
+
+
+def _to_table(frame: Frame) -> pa.Table:
+    if isinstance(frame, pa.Table):
+        return frame
+    if isinstance(frame, pa.RecordBatch):
+        return pa.Table.from_batches([frame])
+    return pa.Table.from_pandas(frame, preserve_index=False)
+
+
+def _reader(data: Data) -> pa.RecordBatchReader:
+    """Fluxo de lotes de `data`, sem materializar iteráveis de chunks."""
+    if isinstance(data, (pa.Table, pa.RecordBatch)) or hasattr(data, "dtypes"):
+        table = _to_table(data)  # type: ignore[arg-type]
+        return pa.RecordBatchReader.from_batches(table.schema, table.to_batches())
+
+    chunks = iter(data)  # type: ignore[arg-type]
+    first = next(chunks, None)
+    if first is None:
+        raise ValueError("Nenhum dado para gravar")
+    schema = _to_table(first).schema
+
+    def batches() -> Iterator[pa.RecordBatch]:
+        for frame in itertools.chain([first], chunks):
+            yield from _to_table(frame).cast(schema).to_batches()
+
+    return pa.RecordBatchReader.from_batches(schema, batches())
+
+
+def _expression(filters: Filters | None) -> ds.Expression | None:
+    if filters is None or isinstance(filters, ds.Expression):
+        return filters
+    return pq.filters_to_expression(filters)
+
+
+def fingerprint(files: Sequence[str]) -> str:
+    """Impressão digital de uma partição: nome, tamanho e mtime de cada arquivo."""
+    digest = hashlib.sha256()
+    for path in sorted(files):
+        stat = os.stat(path)
+        digest.update(f"{os.path.basename(path)}:{stat.st_size}:{stat.st_mtime_ns}\n".encode())
+    return digest.hexdigest()
+
+
+@dataclass
+class Ingestion:
+    """Registro de uma carga na bronze (uma linha do manifesto de ingestão)."""
+
+    ingestion_id: str
+    dataset: str
+    source: str
+    partition: str
+    ingested_at: str
+    rows: int
+    files: list[str]
+    bytes: int
+    schema: str
+
+
+class LayerStore:
+    """Datasets Parquet de uma camada, em `<data_dir>/<camada>/<dataset>/`.
+
+    Leituras aceitam projeção de colunas (`columns`) e filtros que, sobre as chaves de
+    partição, descartam diretórios inteiros antes de abrir qualquer arquivo; `iter_batches`
+    percorre o dataset em lotes de `chunk_rows` linhas, com memória limitada ao lote.
+    """
+
+    partitioning: Any = "hive"
+
+    def __init__(
+        self,
+        layer: str,
+        data_dir: str = DEFAULT_DATA_DIR,
+        chunk_rows: int = DEFAULT_CHUNK_ROWS,
+        file_rows: int = DEFAULT_FILE_ROWS,
+    ):
+        if layer not in LAYERS:
+            raise ValueError(f"Camada desconhecida: {layer} (use {', '.join(LAYERS)})")
+        self.layer = layer
+        self.root = os.path.join(data_dir, LAYERS[layer])
+        self.chunk_rows = chunk_rows
+        self.file_rows = file_rows
+
+    def path(self, dataset: str) -> str:
+        return os.path.join(self.root, dataset)
+
+    def exists(self, dataset: str) -> bool:
+        return os.path.isdir(self.path(dataset))
+
+    def dataset(self, dataset: str) -> ds.Dataset:
+        """Dataset do pyarrow (lazy): nada é lido até que as linhas sejam pedidas."""
+        return ds.dataset(
+            self.path(dataset),
+            format="parquet",
+            partitioning=self.partitioning,
+            exclude_invalid_files=True,
+            ignore_prefixes=[".", "_"],
+        )
+
+    def read(
+        self,
+        dataset: str,
+        columns: Sequence[str] | None = None,
+        filters: Filters | None = None,
+    ) -> pa.Table:
+        return self.dataset(dataset).to_table(
+            columns=list(columns) if columns else None, filter=_expression(filters)
+        )
+
+    def read_pandas(
+        self,
+        dataset: str,
+        columns: Sequence[str] | None = None,
+        filters: Filters | None = None,
+    ) -> "pd.DataFrame":
+        return self.read(dataset, columns, filters).to_pandas()
+
+    def iter_batches(
+        self,
+        dataset: str,
+        columns: Sequence[str] | None = None,
+        filters: Filters | None = None,
+        chunk_rows: int | None = None,
+    ) -> Iterator[pa.RecordBatch]:
+        """Lotes de até `chunk_rows` linhas, lidos sob demanda (datasets maiores que a RAM)."""
+        yield from self.dataset(dataset).to_batches(
+            columns=list(columns) if columns else None,
+            filter=_expression(filters),
+            batch_size=chunk_rows or self.chunk_rows,
+        )
+
+    def iter_pandas(
+        self,
+        dataset: str,
+        columns: Sequence[str] | None = None,
+        filters: Filters | None = None,
+        chunk_rows: int | None = None,
+    ) -> Iterator["pd.DataFrame"]:
+        for batch in self.iter_batches(dataset, columns, filters, chunk_rows):
+            yield batch.to_pandas()
+
+    def partition_files(self, dataset: str) -> dict[str, list[str]]:
+        """Arquivos de cada partição, pelo diretório relativo (ex.: `dt=2024-01-01`)."""
+        partitions: dict[str, list[str]] = {}
+        for fragment in self.dataset(dataset).get_fragments():
+            directory = os.path.relpath(os.path.dirname(fragment.path), self.path(dataset))
+            partitions.setdefault(directory.replace(os.sep, "/"), []).append(fragment.path)
+        return {partition: sorted(files) for partition, files in sorted(partitions.items())}
+
+    def count_rows(self, dataset: str, filters: Filters | None = None) -> int:
+        return int(self.dataset(dataset).count_rows(filter=_expression(filters)))
+
+    def write(
+        self,
+        dataset: str,
+        data: Data,
+        partition_cols: Sequence[str] = (),
+        mode: str = "overwrite",
+    ) -> list[str]:
+        """Grava `data` (tabela, DataFrame ou iterável de chunks) particionado por `partition_cols`.
+
+        `overwrite` substitui só as partições presentes em `data`; `append` acrescenta
+        arquivos novos sem tocar nos existentes; `error` falha se o dataset já existir.
+        """
+        if mode not in WRITE_MODES:
+            raise ValueError(f"Modo de escrita inválido: {mode} (use {', '.join(WRITE_MODES)})")
+        if mode == "error" and self.exists(dataset):
+            raise FileExistsError(f"O dataset {self.path(dataset)} já existe")
+        if self.layer == "bronze":
+            raise ValueError("A bronze é somente de acréscimo; use BronzeStore.ingest")
+
+        reader = _reader(data)
+        partitioning = None
+        if partition_cols:
+            fields = [reader.schema.field(col) for col in partition_cols]
+            partitioning = ds.partitioning(pa.schema(fields), flavor="hive")
+        behavior = "delete_matching" if mode == "overwrite" else "overwrite_or_ignore"
+        return self._write(self.path(dataset), reader, partitioning, behavior=behavior)
+
+    def _write(
+        self,
+        base_dir: str,
+        reader: pa.RecordBatchReader,
+        partitioning: ds.Partitioning | None,
+        *,
+        behavior: str,
+        write_id: str | None = None,
+    ) -> list[str]:
+        written: list[str] = []
+        # Nome único por escrita: `append` nunca sobrescreve um arquivo existente
+        ds.write_dataset(
+            reader,
+            base_dir,
+            format="parquet",
+            partitioning=partitioning,
+            basename_template="part-" + (write_id or uuid.uuid4().hex) + "-{i}.parquet",
+            existing_data_behavior=behavior,
+            max_rows_per_file=self.file_rows,
+            max_rows_per_group=min(self.chunk_rows, self.file_rows),
+            min_rows_per_group=min(self.chunk_rows, self.file_rows) // 2,
+            file_visitor=lambda file: written.append(file.path),
+        )
+        return written
+
+
+class BronzeStore(LayerStore):
+    """Bronze: dados brutos em `<dataset>/YYYY/MM/DD/`, só por acréscimo, com cada carga
+    registrada em `_ingestion_manifest.jsonl`."""
+
+    partitioning = BRONZE_PARTITIONING
+    _lock = threading.Lock()
+
+    def __init__(self, data_dir: str = DEFAULT_DATA_DIR, **kwargs: int):
+        super().__init__("bronze", data_dir, **kwargs)
+
+    def manifest_path(self, dataset: str) -> str:
+        return os.path.join(self.path(dataset), INGESTION_MANIFEST)
+
+    def ingest(
+        self,
+        dataset: str,
+        data: Data,
+        source: str,
+        extracted_on: date | None = None,
+    ) -> Ingestion:
+        """Acrescenta uma carga na partição da data de extração (padrão: hoje, em UTC)."""
+        extracted_on = extracted_on or datetime.now(timezone.utc).date()
+        partition = f"{extracted_on.year:04d}/{extracted_on.month:02d}/{extracted_on.day:02d}"
+        reader = _reader(data)
+        ingestion_id = uuid.uuid4().hex
+        rows = 0
+
+        def counted() -> Iterator[pa.RecordBatch]:
+            nonlocal rows
+            for batch in reader:
+                rows += batch.num_rows
+                yield batch
+
+        base_dir = os.path.join(self.path(dataset), *partition.split("/"))
+        files = self._write(
+            base_dir,
+            pa.RecordBatchReader.from_batches(reader.schema, counted()),
+            None,
+            behavior="overwrite_or_ignore",
+            write_id=ingestion_id,
+        )
+        ingestion = Ingestion(
+            ingestion_id=ingestion_id,
+            dataset=dataset,
+            source=source,
+            partition=partition,
+            ingested_at=datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            rows=rows,
+            files=[
+                os.path.relpath(file, self.path(dataset)).replace(os.sep, "/") for file in files
+            ],
+            bytes=sum(os.path.getsize(file) for file in files),
+            schema=reader.schema.to_string(show_schema_metadata=False),
+        )
+        self._record(dataset, ingestion)
+        return ingestion
+
+    def _record(self, dataset: str, ingestion: Ingestion) -> None:
+        with self._lock, open(self.manifest_path(dataset), "a", encoding="utf-8") as f:
+            f.write(json.dumps(asdict(ingestion), ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def ingestions(self, dataset: str) -> list[Ingestion]:
+        path = self.manifest_path(dataset)
+        if not os.path.exists(path):
+            return []
+        with open(path, encoding="utf-8") as f:
+            return [Ingestion(**json.loads(line)) for line in f if line.strip()]
+
+
+def layer(name: str, data_dir: str = DEFAULT_DATA_DIR) -> LayerStore:
+    """Store da camada `name` (`bronze`, `silver`, `ml` ou `gold`)."""
+    return BronzeStore(data_dir) if name == "bronze" else LayerStore(name, data_dir)
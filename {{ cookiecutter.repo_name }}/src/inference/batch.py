@@ -0,0 +1,179 @@
+"""Inferência em lote: pontua um dataset em chunks, num pool de processos, gravando as
+predições em Parquet particionado à medida que saem.
+
+O modelo é carregado uma única vez por processo; no máximo `max_in_flight` chunks ficam em
+voo (lidos, sendo pontuados ou aguardando gravação), então a memória não cresce com o
+tamanho da entrada.
+"""
+
+import itertools
+import os
+import time
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from concurrent.futures import Future, ProcessPoolExecutor
+from contextlib import ExitStack
+from dataclasses import dataclass, field
+from typing import Any
+
+import joblib
+import numpy as np
+import pyarrow as pa
+
+from data.storage import DEFAULT_CHUNK_ROWS, DEFAULT_DATA_DIR, LAYERS, Filters, layer
+
+DEFAULT_INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", str(os.cpu_count() or 1)))
+PREDICTION_COLUMN = "prediction"
+PREDICT_METHODS = ("predict", "predict_proba")
+# A bronze é só de acréscimo (cargas brutas); predições vão para as camadas seguintes
+OUTPUT_LAYERS = tuple(name for name in LAYERS if name != "bronze")
+
+# Modelo do processo atual, carregado uma única vez por `_init_worker`
+_WORKER: dict[str, Any] = {}
+
+
+def load_model(path: str) -> Any:
+    """Carrega um modelo persistido com joblib."""
+    return joblib.load(path)
+
+
+def _init_worker(model_path: str) -> None:
+    _WORKER["model"] = load_model(model_path)
+
+
+@dataclass(frozen=True)
+class ScoringSpec:
+    """O que ler de cada chunk e o que gravar ao lado das predições."""
+
+    features: tuple[str, ...]
+    passthrough: tuple[str, ...] = ()
+    method: str = "predict"
+
+
+def score_batch(model: Any, batch: pa.RecordBatch, spec: ScoringSpec) -> pa.RecordBatch:
+    """Pontua um chunk inteiro numa única chamada ao modelo (vetorizado)."""
+    features = batch.select(list(spec.features)).to_pandas()
+    columns = {name: batch.column(name) for name in spec.passthrough}
+    if spec.method == "predict_proba":
+        probabilities = np.asarray(model.predict_proba(features))
+        classes = getattr(model, "classes_", range(probabilities.shape[1]))
+        for index, label in enumerate(classes):
+            columns[f"proba_{label}"] = pa.array(probabilities[:, index])
+    else:
+        columns[PREDICTION_COLUMN] = pa.array(np.asarray(model.predict(features)))
+    return pa.RecordBatch.from_pydict(columns)
+
+
+def _score_in_worker(batch: pa.RecordBatch, spec: ScoringSpec) -> pa.RecordBatch:
+    return score_batch(_WORKER["model"], batch, spec)
+
+
+def bounded_map(
+    submit: Callable[[pa.RecordBatch], "Future[pa.RecordBatch]"],
+    batches: Iterable[pa.RecordBatch],
+    max_in_flight: int,
+) -> Iterator[pa.RecordBatch]:
+    """Resultados na ordem de entrada, com no máximo `max_in_flight` chunks pendentes: a
+    leitura só avança quando a gravação consome um resultado (backpressure)."""
+    pending: deque[Future[pa.RecordBatch]] = deque()
+    for batch in batches:
+        if len(pending) >= max_in_flight:
+            yield pending.popleft().result()
+        pending.append(submit(batch))
+    while pending:
+        yield pending.popleft().result()
+
+
+@dataclass
+class InferenceReport:
+    rows: int = 0
+    chunks: int = 0
+    elapsed: float = 0.0
+    files: list[str] = field(default_factory=list)
+
+    @property
+    def rows_per_sec(self) -> float:
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+    def print_report(self) -> None:
+        print(
+            f"⚡ {self.rows} linha(s) em {self.chunks} chunk(s) e {self.elapsed:.1f}s "
+            f"({self.rows_per_sec:,.0f} linhas/s), {len(self.files)} arquivo(s) gravado(s)"
+        )
+
+
+@dataclass
+class BatchInference:
+    """Pontua `input_dataset` e grava as predições em `output_dataset`.
+
+    `partition_cols` (que também devem estar em `spec.passthrough`) particionam a saída;
+    só as partições pontuadas nesta execução são substituídas.
+    """
+
+    model_path: str
+    input_dataset: str
+    output_dataset: str
+    spec: ScoringSpec
+    input_layer: str = "ml"
+    output_layer: str = "gold"
+    partition_cols: Sequence[str] = ()
+    filters: Filters | None = None
+    data_dir: str = DEFAULT_DATA_DIR
+    chunk_rows: int = DEFAULT_CHUNK_ROWS
+    max_workers: int = DEFAULT_INFERENCE_WORKERS
+    max_in_flight: int | None = None
+
+    def __post_init__(self) -> None:
+        missing = [col for col in self.partition_cols if col not in self.spec.passthrough]
+        if missing:
+            raise ValueError(f"Colunas de partição fora de passthrough: {', '.join(missing)}")
+        if self.spec.method not in PREDICT_METHODS:
+            methods = ", ".join(PREDICT_METHODS)
+            raise ValueError(f"Método inválido: {self.spec.method} (use {methods})")
+        if self.output_layer not in OUTPUT_LAYERS:
+            layers = ", ".join(OUTPUT_LAYERS)
+            raise ValueError(f"Camada de saída inválida: {self.output_layer} (use {layers})")
+
+    def _scored(
+        self, batches: Iterator[pa.RecordBatch], stack: ExitStack
+    ) -> Iterator[pa.RecordBatch]:
+        workers = max(1, self.max_workers)
+        if workers == 1:
+            model = load_model(self.model_path)
+            return (score_batch(model, batch, self.spec) for batch in batches)
+
+        pool = stack.enter_context(
+            ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(self.model_path,))
+        )
+        return bounded_map(
+            lambda batch: pool.submit(_score_in_worker, batch, self.spec),
+            batches,
+            self.max_in_flight or 2 * workers,
+        )
+
+    def run(self) -> InferenceReport:
+        started_at = time.perf_counter()
+        report = InferenceReport()
+        columns = list(dict.fromkeys(self.spec.passthrough + self.spec.features))
+        source = layer(self.input_layer, self.data_dir)
+        batches = source.iter_batches(self.input_dataset, columns, self.filters, self.chunk_rows)
+        first = next(batches, None)
+        if first is None:
+            print(f"⏭️ Nenhuma linha para pontuar em {self.input_dataset}")
+            return report
+
+        def counted(results: Iterable[pa.RecordBatch]) -> Iterator[pa.RecordBatch]:
+            for result in results:
+                report.rows += result.num_rows
+                report.chunks += 1
+                yield result
+
+        with ExitStack() as stack:
+            results = self._scored(itertools.chain([first], batches), stack)
+            # A gravação puxa os resultados sob demanda: é ela que dita o ritmo da leitura
+            report.files = layer(self.output_layer, self.data_dir).write(
+                self.output_dataset, counted(results), self.partition_cols
+            )
+
+        report.elapsed = time.perf_counter() - started_at
+        return report
@@ -0,0 +1,145 @@
+"""Matrizes de treino em disco: um dataset da camada ML vira `X.npy`/`y.npy`, abertos com
+memory-map.
+
+Processos que abrem o mesmo arquivo compartilham as páginas do cache do sistema
+operacional, então N workers de treino usam uma única cópia de `X` em RAM. A conversão é
+feita em chunks (a memória não depende do tamanho do dataset) e só é refeita quando os
+arquivos de entrada mudam.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import uuid
+from collections.abc import Sequence
+from dataclasses import asdict, dataclass
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from data.storage import DEFAULT_CHUNK_ROWS, DEFAULT_DATA_DIR, Filters, fingerprint, layer
+
+DEFAULT_MATRIX_DIR = os.getenv("MATRIX_DIR", ".cache/matrices")
+MATRIX_META = "matrix.json"
+
+
+@dataclass(frozen=True)
+class MatrixSpec:
+    """Quais colunas de qual dataset viram `X` e `y`."""
+
+    dataset: str
+    features: tuple[str, ...]
+    target: str
+    filters: Filters | None = None
+    layer: str = "ml"
+    dtype: str = "float32"
+
+
+@dataclass(frozen=True)
+class FeatureMatrix:
+    """Matriz materializada: `X` (linhas por features, em `dtype`) e `y` em `path`."""
+
+    path: str
+    dataset: str
+    features: tuple[str, ...]
+    target: str
+    rows: int
+    dtype: str
+    source_fingerprint: str
+
+    @property
+    def x_path(self) -> str:
+        return os.path.join(self.path, "X.npy")
+
+    @property
+    def y_path(self) -> str:
+        return os.path.join(self.path, "y.npy")
+
+    def load(self) -> tuple[np.ndarray, np.ndarray]:
+        """`X` e `y` com memory-map (somente leitura): nada é copiado para a memória."""
+        return np.load(self.x_path, mmap_mode="r"), np.load(self.y_path, mmap_mode="r")
+
+    def frame(self, x: np.ndarray) -> pd.DataFrame:
+        """`X` como DataFrame com os nomes das features, sem copiar os dados."""
+        return pd.DataFrame(x, columns=list(self.features), copy=False)
+
+
+def _matrix_key(source_fingerprint: str, features: Sequence[str], target: str, dtype: str) -> str:
+    digest = hashlib.sha256(source_fingerprint.encode())
+    digest.update(json.dumps([list(features), target, dtype]).encode())
+    return digest.hexdigest()[:16]
+
+
+def materialize(
+    spec: MatrixSpec,
+    data_dir: str = DEFAULT_DATA_DIR,
+    matrix_dir: str = DEFAULT_MATRIX_DIR,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+) -> FeatureMatrix:
+    """Converte o dataset de `spec` em `X.npy`/`y.npy` (ou reaproveita a conversão, se a
+    entrada não mudou) e devolve a `FeatureMatrix`."""
+    store = layer(spec.layer, data_dir)
+    dataset, features, target, filters = spec.dataset, spec.features, spec.target, spec.filters
+    files = [file for files in store.partition_files(dataset).values() for file in files]
+    source_fingerprint = fingerprint(files)
+    if filters:
+        source_fingerprint = hashlib.sha256(
+            f"{source_fingerprint}{json.dumps(filters, default=str)}".encode()
+        ).hexdigest()
+    key = _matrix_key(source_fingerprint, features, target, spec.dtype)
+    path = os.path.join(matrix_dir, dataset, key)
+
+    meta_path = os.path.join(path, MATRIX_META)
+    if os.path.exists(meta_path):
+        with open(meta_path, encoding="utf-8") as f:
+            meta: dict[str, Any] = json.load(f)
+        meta["features"] = tuple(meta["features"])
+        return FeatureMatrix(**meta)
+
+    rows = store.count_rows(dataset, filters)
+    if not rows:
+        raise ValueError(f"Nenhuma linha para treinar em {dataset}")
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    os.makedirs(tmp_path)  # cria também a pasta do dataset
+    try:
+        x = np.lib.format.open_memmap(
+            os.path.join(tmp_path, "X.npy"),
+            mode="w+",
+            dtype=spec.dtype,
+            shape=(rows, len(features)),
+        )
+        targets = []
+        start = 0
+        columns = list(dict.fromkeys([*features, target]))
+        for batch in store.iter_batches(dataset, columns, filters, chunk_rows):
+            end = start + batch.num_rows
+            if end > rows:
+                # Linhas a mais que na contagem: o memory-map não comporta o chunk
+                raise ValueError(f"{dataset} mudou durante a conversão (mais de {rows} linhas)")
+            for index, name in enumerate(features):
+                x[start:end, index] = batch.column(name).to_numpy(zero_copy_only=False)
+            targets.append(batch.column(target).to_numpy(zero_copy_only=False))
+            start = end
+        if start != rows:
+            raise ValueError(f"{dataset} mudou durante a conversão ({start} de {rows} linhas)")
+        x.flush()
+        del x
+        y = np.concatenate(targets)
+        # Rótulos de texto viram strings de tamanho fixo: objetos Python não abrem com memory-map
+        np.save(os.path.join(tmp_path, "y.npy"), y.astype(str) if y.dtype == object else y)
+
+        matrix = FeatureMatrix(
+            path, dataset, tuple(features), target, rows, spec.dtype, source_fingerprint
+        )
+        with open(os.path.join(tmp_path, MATRIX_META), "w", encoding="utf-8") as f:
+            json.dump(asdict(matrix), f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        # Conversões antigas do mesmo dataset não servem mais
+        for entry in os.listdir(os.path.dirname(path)):
+            if entry != key and not entry.endswith(".tmp"):
+                shutil.rmtree(os.path.join(os.path.dirname(path), entry), ignore_errors=True)
+    finally:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+    return matrix
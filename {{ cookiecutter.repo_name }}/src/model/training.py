@@ -0,0 +1,214 @@
+"""Treino com busca de hiperparâmetros em paralelo sobre matrizes com memory-map.
+
+A busca usa successive halving: todos os candidatos começam com poucos recursos (linhas, por
+padrão) e só a melhor fração (`1/factor`) segue para a rodada seguinte, com mais recursos.
+Candidatos ruins param cedo, então o tempo vai para os que importam. Os workers recebem
+`X` como memory-map (o joblib passa só o caminho do arquivo), então a RAM não cresce com o
+número de processos.
+"""
+
+import json
+import os
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from typing import Any
+
+import joblib
+import numpy as np
+import sklearn
+from sklearn.base import clone
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.model_selection import HalvingGridSearchCV, HalvingRandomSearchCV
+
+from data.storage import DEFAULT_DATA_DIR
+from model.matrix import DEFAULT_MATRIX_DIR, FeatureMatrix, MatrixSpec, materialize
+
+DEFAULT_TRAINING_WORKERS = int(os.getenv("TRAINING_WORKERS", str(os.cpu_count() or 1)))
+TOP_CANDIDATES = 10
+MIN_RESOURCES = ("exhaust", "smallest")
+
+
+def _json_default(value: Any) -> Any:
+    """Tipos do numpy viram tipos do JSON; o resto (estimadores, distribuições) vira texto."""
+    if isinstance(value, np.generic):
+        return value.item()
+    return repr(value)
+
+
+def metadata_path(model_path: str) -> str:
+    """Metadados ficam ao lado do modelo: `models/churn.joblib` -> `models/churn.json`."""
+    return f"{os.path.splitext(model_path)[0]}.json"
+
+
+def save_model(model: Any, model_path: str, metadata: dict[str, Any]) -> None:
+    """Grava o modelo (joblib, lido por `inference.batch.load_model`) e os metadados."""
+    os.makedirs(os.path.dirname(model_path) or ".", exist_ok=True)
+    tmp_path = f"{model_path}.{uuid.uuid4().hex}.tmp"
+    joblib.dump(model, tmp_path)
+    os.replace(tmp_path, model_path)
+
+    meta_path = metadata_path(model_path)
+    tmp_path = f"{meta_path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(metadata, f, indent=2, ensure_ascii=False, default=_json_default)
+    os.replace(tmp_path, meta_path)
+
+
+def load_metadata(model_path: str) -> dict[str, Any]:
+    with open(metadata_path(model_path), encoding="utf-8") as f:
+        metadata: dict[str, Any] = json.load(f)
+    return metadata
+
+
+@dataclass(frozen=True)
+class SearchSpec:
+    """Espaço de busca e validação cruzada.
+
+    Sem `n_candidates` todas as combinações de `params` são avaliadas; com ele, são sorteadas
+    `n_candidates` combinações (os valores podem ser listas ou distribuições do scipy).
+    `resource` é o que cresce a cada rodada: `n_samples` ou um parâmetro do estimador como
+    `max_iter`/`n_estimators`; nesse caso `max_resources` (o valor da última rodada) é
+    obrigatório. `min_resources` é o valor da primeira rodada, ou `exhaust`/`smallest`.
+    """
+
+    params: dict[str, Any]
+    n_candidates: int | None = None
+    cv: int = 5
+    scoring: str | None = None
+    factor: int = 3
+    resource: str = "n_samples"
+    max_resources: int | str = "auto"
+    min_resources: int | str = "exhaust"
+    random_state: int = 0
+
+    def __post_init__(self) -> None:
+        if isinstance(self.max_resources, str) and self.max_resources != "auto":
+            raise ValueError(f"max_resources inválido: {self.max_resources}")
+        if isinstance(self.min_resources, str) and self.min_resources not in MIN_RESOURCES:
+            raise ValueError(
+                f"min_resources inválido: {self.min_resources} (use um inteiro ou "
+                f"{', '.join(MIN_RESOURCES)})"
+            )
+        if self.resource != "n_samples" and self.max_resources == "auto":
+            raise ValueError(
+                f"Com resource={self.resource}, informe max_resources (o valor de "
+                f"{self.resource} na última rodada)"
+            )
+
+
+@dataclass
+class TrainingReport:
+    model_path: str
+    rows: int = 0
+    best_params: dict[str, Any] = field(default_factory=dict)
+    best_score: float = 0.0
+    candidates: list[int] = field(default_factory=list)
+    resources: list[int] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    def print_report(self) -> None:
+        rounds = " -> ".join(
+            f"{n} ({resources})"
+            for n, resources in zip(self.candidates, self.resources, strict=True)
+        )
+        print(
+            f"🏋️ {self.candidates[0] if self.candidates else 0} candidato(s) sobre {self.rows} "
+            f"linha(s) em {self.elapsed:.1f}s; rodadas: {rounds}"
+        )
+        print(f"🏆 Melhor score {self.best_score:.4f} com {self.best_params}")
+        print(f"💾 Modelo salvo em {self.model_path}")
+
+
+@dataclass
+class TrainingJob:
+    """Materializa a matriz de `matrix`, busca os hiperparâmetros de `estimator` e grava o
+    melhor modelo, retreinado com todas as linhas, em `model_path` (+ metadados em JSON)."""
+
+    estimator: Any
+    matrix: MatrixSpec
+    search: SearchSpec
+    model_path: str
+    data_dir: str = DEFAULT_DATA_DIR
+    matrix_dir: str = DEFAULT_MATRIX_DIR
+    max_workers: int = DEFAULT_TRAINING_WORKERS
+
+    def _searcher(self) -> HalvingGridSearchCV | HalvingRandomSearchCV:
+        options: dict[str, Any] = {
+            "factor": self.search.factor,
+            "resource": self.search.resource,
+            "max_resources": self.search.max_resources,
+            "min_resources": self.search.min_resources,
+            "cv": self.search.cv,
+            "scoring": self.search.scoring,
+            "random_state": self.search.random_state,
+            "n_jobs": max(1, self.max_workers),
+            # O retreino final é feito em `run`, com os nomes das features
+            "refit": False,
+        }
+        if self.search.n_candidates is None:
+            return HalvingGridSearchCV(self.estimator, self.search.params, **options)
+        return HalvingRandomSearchCV(
+            self.estimator,
+            self.search.params,
+            n_candidates=self.search.n_candidates,
+            **options,
+        )
+
+    def _metadata(
+        self, matrix: FeatureMatrix, searcher: Any, report: TrainingReport
+    ) -> dict[str, Any]:
+        results = searcher.cv_results_
+        final_round = np.flatnonzero(results["iter"] == results["iter"].max())
+        ranked = final_round[np.argsort(-results["mean_test_score"][final_round])]
+        return {
+            "estimator": f"{type(self.estimator).__module__}.{type(self.estimator).__name__}",
+            "dataset": matrix.dataset,
+            "layer": self.matrix.layer,
+            "filters": self.matrix.filters,
+            "features": list(matrix.features),
+            "target": matrix.target,
+            "rows": matrix.rows,
+            "source_fingerprint": matrix.source_fingerprint,
+            "search": asdict(self.search),
+            "best_params": report.best_params,
+            "best_score": report.best_score,
+            "rounds": [
+                {"candidates": n, "resources": resources}
+                for n, resources in zip(report.candidates, report.resources, strict=True)
+            ],
+            "top_candidates": [
+                {
+                    "params": results["params"][index],
+                    "mean_test_score": results["mean_test_score"][index],
+                    "std_test_score": results["std_test_score"][index],
+                }
+                for index in ranked[:TOP_CANDIDATES]
+            ],
+            "trained_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "elapsed": round(report.elapsed, 3),
+            "versions": {"sklearn": sklearn.__version__, "numpy": np.__version__},
+        }
+
+    def run(self) -> TrainingReport:
+        started_at = time.perf_counter()
+        report = TrainingReport(self.model_path)
+        matrix = materialize(self.matrix, self.data_dir, self.matrix_dir)
+        x, y = matrix.load()
+        report.rows = matrix.rows
+
+        searcher = self._searcher()
+        searcher.fit(x, y)
+        report.best_params = dict(searcher.best_params_)
+        report.best_score = float(searcher.best_score_)
+        report.candidates = [int(n) for n in searcher.n_candidates_]
+        report.resources = [int(n) for n in searcher.n_resources_]
+
+        # DataFrame sobre o memory-map: o modelo guarda `feature_names_in_`, usado pela
+        # inferência em lote e pelo serviço online
+        model = clone(self.estimator).set_params(**report.best_params)
+        model.fit(matrix.frame(x), y)
+        report.elapsed = time.perf_counter() - started_at
+        save_model(model, self.model_path, self._metadata(matrix, searcher, report))
+        return report
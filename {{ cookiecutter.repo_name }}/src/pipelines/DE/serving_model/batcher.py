@@ -0,0 +1,109 @@
+"""Micro-batching: agrupa requisições simultâneas de uma linha numa única chamada ao modelo."""
+
+import os
+import queue
+import threading
+import time
+from collections import Counter
+from collections.abc import Callable, Sequence
+from concurrent.futures import Future
+from typing import Any
+
+from pipelines.DE.serving_model.stats import LatencyHistogram
+
+DEFAULT_MAX_BATCH_SIZE = int(os.getenv("SERVING_MAX_BATCH", "32"))
+DEFAULT_MAX_WAIT_MS = float(os.getenv("SERVING_MAX_WAIT_MS", "2"))
+
+Row = dict[str, Any]
+PredictFn = Callable[[list[Row]], Sequence[Any]]
+
+
+class MicroBatcher:
+    """Fila única consumida por uma thread que monta lotes de até `max_batch_size` linhas.
+
+    O lote é enviado ao modelo quando enche ou quando a primeira linha dele já esperou
+    `max_wait_ms`; com tráfego baixo a latência extra é no máximo `max_wait_ms`, com tráfego
+    alto o custo fixo de cada chamada ao modelo é dividido entre as linhas do lote.
+    """
+
+    def __init__(
+        self,
+        predict: PredictFn,
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+        max_wait_ms: float = DEFAULT_MAX_WAIT_MS,
+    ):
+        self.predict = predict
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000
+        self.queue: queue.Queue[tuple[Row, Future[Any], float] | None] = queue.Queue()
+        self.queue_latency = LatencyHistogram()
+        self.model_latency = LatencyHistogram()
+        self.batch_sizes: Counter[int] = Counter()
+        self.lock = threading.Lock()
+        self.thread = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self.thread.start()
+
+    def submit(self, row: Row) -> "Future[Any]":
+        future: Future[Any] = Future()
+        self.queue.put((row, future, time.perf_counter()))
+        return future
+
+    def _collect(self) -> list[tuple[Row, "Future[Any]", float]] | None:
+        first = self.queue.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = first[2] + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                item = (
+                    self.queue.get(timeout=remaining) if remaining > 0 else self.queue.get_nowait()
+                )
+            except queue.Empty:
+                break
+            if item is None:
+                self.queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _predict(self, rows: list[Row]) -> list[Any]:
+        predictions = list(self.predict(rows))
+        if len(predictions) != len(rows):
+            raise ValueError(f"{len(predictions)} predições para {len(rows)} linhas")
+        return predictions
+
+    def _run(self) -> None:
+        while (batch := self._collect()) is not None:
+            started_at = time.perf_counter()
+            for _, _, queued_at in batch:
+                self.queue_latency.observe(started_at - queued_at)
+            try:
+                predictions = self._predict([row for row, _, _ in batch])
+            except Exception as e:
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+            self.model_latency.observe(time.perf_counter() - started_at)
+            with self.lock:
+                self.batch_sizes[len(batch)] += 1
+            for (_, future, _), prediction in zip(batch, predictions, strict=True):
+                future.set_result(prediction)
+
+    def snapshot(self) -> dict[str, Any]:
+        with self.lock:
+            batch_sizes = dict(sorted(self.batch_sizes.items()))
+        batches = sum(batch_sizes.values())
+        rows = sum(size * n for size, n in batch_sizes.items())
+        return {
+            "batches": batches,
+            "mean_batch_size": round(rows / batches, 2) if batches else 0.0,
+            "batch_sizes": batch_sizes,
+            "queue": self.queue_latency.snapshot(),
+            "model": self.model_latency.snapshot(),
+        }
+
+    def close(self) -> None:
+        self.queue.put(None)
+        self.thread.join()
@@ -0,0 +1,179 @@
+"""Gerador de carga local para o serviço online (sem dependências externas).
+
+    # contra um servidor já no ar
+    PYTHONPATH=src python -m pipelines.DE.serving_model.loadgen --url http://127.0.0.1:8080 -c 32 -n 5000
+
+    # sobe o servidor no mesmo processo, com o modelo informado
+    PYTHONPATH=src python -m pipelines.DE.serving_model.loadgen --model models/churn.joblib -c 32 -n 5000
+
+Cada conexão é uma thread com keep-alive enviando uma linha por requisição; no fim são
+exibidos vazão, percentis de latência vistos pelo cliente e o tamanho médio dos lotes.
+"""
+
+import argparse
+import http.client
+import json
+import sys
+import threading
+import time
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+from http import HTTPStatus
+from typing import Any
+from urllib.parse import urlsplit
+
+import numpy as np
+
+from pipelines.DE.serving_model.batcher import DEFAULT_MAX_BATCH_SIZE, DEFAULT_MAX_WAIT_MS
+from pipelines.DE.serving_model.server import ModelService, ServingServer
+from pipelines.DE.serving_model.stats import LatencyHistogram
+
+
+@dataclass
+class LoadReport:
+    requests: int = 0
+    errors: int = 0
+    elapsed: float = 0.0
+    latency: LatencyHistogram = field(default_factory=LatencyHistogram)
+    server: dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def requests_per_sec(self) -> float:
+        return self.requests / self.elapsed if self.elapsed else 0.0
+
+    def print_report(self) -> None:
+        latency = self.latency.snapshot()
+        print(
+            f"📈 {self.requests} requisição(ões) em {self.elapsed:.1f}s "
+            f"({self.requests_per_sec:,.0f} req/s), {self.errors} erro(s)"
+        )
+        print(
+            f"⏱️ latência p50={latency['p50_ms']}ms p95={latency['p95_ms']}ms "
+            f"p99={latency['p99_ms']}ms max={latency['max_ms']}ms"
+        )
+        if self.server:
+            print(
+                f"📦 {self.server.get('batches', 0)} lote(s), "
+                f"tamanho médio {self.server.get('mean_batch_size', 0)}"
+            )
+
+
+def _request(conn: http.client.HTTPConnection, method: str, path: str, body: Any = None) -> Any:
+    data = json.dumps(body).encode("utf-8") if body is not None else None
+    headers = {"Content-Type": "application/json"} if data else {}
+    conn.request(method, path, body=data, headers=headers)
+    response = conn.getresponse()
+    payload = json.loads(response.read() or b"{}")
+    if response.status != HTTPStatus.OK:
+        raise RuntimeError(f"HTTP {response.status}: {payload.get('error')}")
+    return payload
+
+
+def _random_payloads(features: Sequence[str], n: int, seed: int) -> list[dict[str, Any]]:
+    values = np.random.default_rng(seed).random((n, len(features)))
+    return [{"features": dict(zip(features, row.tolist(), strict=True))} for row in values]
+
+
+def _connect(url: str) -> http.client.HTTPConnection:
+    target = urlsplit(url)
+    return http.client.HTTPConnection(target.hostname or "127.0.0.1", target.port, timeout=30)
+
+
+def run_load(
+    url: str,
+    payloads: Sequence[dict[str, Any]],
+    concurrency: int = 16,
+) -> LoadReport:
+    """Envia `payloads` com `concurrency` conexões simultâneas e mede a latência de cada um."""
+    report = LoadReport()
+    lock = threading.Lock()
+    cursor = iter(range(len(payloads)))
+
+    def worker() -> None:
+        conn = _connect(url)
+        try:
+            while True:
+                with lock:
+                    index = next(cursor, None)
+                if index is None:
+                    return
+                started_at = time.perf_counter()
+                try:
+                    _request(conn, "POST", "/predict", payloads[index])
+                except (OSError, RuntimeError, http.client.HTTPException):
+                    conn.close()
+                    with lock:
+                        report.errors += 1
+                    continue
+                report.latency.observe(time.perf_counter() - started_at)
+                with lock:
+                    report.requests += 1
+        finally:
+            conn.close()
+
+    started_at = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(max(1, concurrency))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    report.elapsed = time.perf_counter() - started_at
+
+    conn = _connect(url)
+    try:
+        report.server = _request(conn, "GET", "/metrics")
+    finally:
+        conn.close()
+    return report
+
+
+def parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Gerador de carga para o serviço online")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--url", help="endereço de um servidor já no ar")
+    target.add_argument("--model", help="modelo para servir no próprio processo")
+    parser.add_argument("-c", "--concurrency", type=int, default=16, help="conexões simultâneas")
+    parser.add_argument("-n", "--requests", type=int, default=2000, help="total de requisições")
+    parser.add_argument("--ids", nargs="+", help="ids para consultar (servidor com --lookup)")
+    parser.add_argument("--max-batch", type=int, default=DEFAULT_MAX_BATCH_SIZE)
+    parser.add_argument("--max-wait-ms", type=float, default=DEFAULT_MAX_WAIT_MS)
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args(argv)
+
+
+def _parse_id(value: str) -> Any:
+    """Ids numéricos da linha de comando viram números (a chave no dataset costuma ser int)."""
+    try:
+        return json.loads(value)
+    except ValueError:
+        return value
+
+
+def _payloads(args: argparse.Namespace, url: str) -> list[dict[str, Any]]:
+    if args.ids:
+        ids = [_parse_id(value) for value in args.ids]
+        return [{"id": ids[i % len(ids)]} for i in range(args.requests)]
+    conn = _connect(url)
+    try:
+        features = _request(conn, "GET", "/health")["features"]
+    finally:
+        conn.close()
+    return _random_payloads(features, args.requests, args.seed)
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    args = parse_args(argv)
+    if args.url:
+        report = run_load(args.url, _payloads(args, args.url), args.concurrency)
+    else:
+        service = ModelService(
+            args.model, max_batch_size=args.max_batch, max_wait_ms=args.max_wait_ms
+        )
+        with ServingServer(service) as server:
+            report = run_load(server.url, _payloads(args, server.url), args.concurrency)
+    report.print_report()
+    return 1 if report.errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,332 @@
+"""Serviço REST de inferência online: modelo carregado uma vez, micro-batching e métricas.
+
+    PYTHONPATH=src python -m pipelines.DE.serving_model.server models/churn.joblib --port 8080 \
+        --lookup churn_features/v1 --key id
+
+Rotas:
+    POST /predict   {"features": {...}} ou {"id": ...} (com `--lookup`) -> {"prediction": ...}
+    GET  /health    modelo, colunas de entrada e configuração do lote
+    GET  /metrics   histogramas de latência (requisição, fila, modelo), lotes e cache
+
+Erros: 400 para corpo inválido, 404 para rota ou entidade (`id`) inexistente e 500 para
+falhas do modelo.
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from collections.abc import Hashable, Sequence
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+import pandas as pd
+import pyarrow.dataset as ds
+
+from data.storage import DEFAULT_DATA_DIR, LAYERS, LayerStore, layer
+from inference.batch import load_model
+from pipelines.DE.serving_model.batcher import (
+    DEFAULT_MAX_BATCH_SIZE,
+    DEFAULT_MAX_WAIT_MS,
+    MicroBatcher,
+    Row,
+)
+from pipelines.DE.serving_model.stats import LatencyHistogram, LRUCache
+
+DEFAULT_PORT = int(os.getenv("SERVING_PORT", "8080"))
+DEFAULT_CACHE_SIZE = int(os.getenv("SERVING_CACHE_SIZE", "10000"))
+DEFAULT_TIMEOUT = float(os.getenv("SERVING_TIMEOUT", "5"))
+
+
+class EntityNotFoundError(LookupError):
+    """A entidade pedida em `{"id": ...}` não está no dataset de lookup (HTTP 404)."""
+
+
+def _to_json(value: Any) -> Any:
+    """Converte tipos do numpy (int64, float32, arrays) para tipos do JSON."""
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    return value
+
+
+class FeatureLookup:
+    """Busca as features de uma entidade num dataset das camadas, com cache LRU.
+
+    Na inicialização só a coluna `key` é lida, montando um índice chave -> (row group,
+    posição); um miss lê então uma única linha de um único row group, sem varrer o dataset.
+    O índice reflete o dataset no momento em que o serviço sobe (chaves repetidas: vale a
+    primeira).
+    """
+
+    def __init__(
+        self,
+        store: LayerStore,
+        dataset: str,
+        key: str,
+        columns: Sequence[str],
+        cache_size: int = DEFAULT_CACHE_SIZE,
+    ):
+        self.source = store.dataset(dataset)
+        self.key = key
+        self.columns = list(columns)
+        self.cache = LRUCache(cache_size)
+        self.latency = LatencyHistogram()
+        self.index = self._build_index()
+
+    def _scanner(self, fragment: ds.Fragment, columns: list[str]) -> ds.Scanner:
+        # Com o schema do dataset, as colunas de partição também podem ser lidas
+        return ds.Scanner.from_fragment(fragment, schema=self.source.schema, columns=columns)
+
+    def _build_index(self) -> dict[Hashable, tuple[ds.Fragment, int]]:
+        index: dict[Hashable, tuple[ds.Fragment, int]] = {}
+        for fragment in self.source.get_fragments():
+            for row_group in fragment.split_by_row_group():
+                keys = self._scanner(row_group, [self.key]).to_table().column(self.key)
+                for offset, value in enumerate(keys.to_pylist()):
+                    index.setdefault(value, (row_group, offset))
+        return index
+
+    def _load(self, entity: Hashable) -> Row | None:
+        location = self.index.get(entity)
+        if location is None:
+            return None
+        started_at = time.perf_counter()
+        row_group, offset = location
+        rows: list[Row] = self._scanner(row_group, self.columns).take([offset]).to_pylist()
+        self.latency.observe(time.perf_counter() - started_at)
+        return rows[0]
+
+    def get(self, entity: Hashable) -> Row | None:
+        row: Row | None = self.cache.get_or_load(entity, self._load)
+        return row
+
+
+class ModelService:
+    """Modelo em memória atrás de um `MicroBatcher`; `predict` é chamado por requisição."""
+
+    def __init__(
+        self,
+        model_path: str,
+        features: Sequence[str] | None = None,
+        lookup: FeatureLookup | None = None,
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+        max_wait_ms: float = DEFAULT_MAX_WAIT_MS,
+    ):
+        self.model_path = model_path
+        self.model = load_model(model_path)
+        names = features or getattr(self.model, "feature_names_in_", None)
+        if names is None:
+            raise ValueError("Informe as colunas de entrada (o modelo não tem feature_names_in_)")
+        self.features = [str(name) for name in names]
+        self.lookup = lookup
+        self.batcher = MicroBatcher(self._predict_rows, max_batch_size, max_wait_ms)
+        self.latency = LatencyHistogram()
+        self.errors = 0
+        self._errors_lock = threading.Lock()
+
+    def _predict_rows(self, rows: list[Row]) -> Sequence[Any]:
+        frame = pd.DataFrame.from_records(rows, columns=self.features)
+        return list(self.model.predict(frame))
+
+    def record_error(self) -> None:
+        with self._errors_lock:
+            self.errors += 1
+
+    def predict(self, payload: Any, timeout: float = DEFAULT_TIMEOUT) -> Any:
+        if not isinstance(payload, dict):
+            raise TypeError("O corpo deve ser um objeto JSON")
+        if "features" in payload:
+            row = payload["features"]
+            if not isinstance(row, dict):
+                raise TypeError('"features" deve ser um objeto {"coluna": valor}')
+        elif "id" in payload and self.lookup:
+            row = self.lookup.get(payload["id"])
+            if row is None:
+                raise EntityNotFoundError(f"Entidade não encontrada: {payload['id']}")
+        else:
+            raise ValueError('Envie {"features": {...}} ou {"id": ...} (com --lookup)')
+
+        missing = [name for name in self.features if name not in row]
+        if missing:
+            raise ValueError(f"Features ausentes: {', '.join(missing)}")
+        return _to_json(self.batcher.submit(row).result(timeout))
+
+    def health(self) -> dict[str, Any]:
+        return {
+            "status": "ok",
+            "model": os.path.basename(self.model_path),
+            "features": self.features,
+            "lookup": self.lookup.key if self.lookup else None,
+            "max_batch_size": self.batcher.max_batch_size,
+            "max_wait_ms": self.batcher.max_wait * 1000,
+        }
+
+    def metrics(self) -> dict[str, Any]:
+        metrics = {"request": self.latency.snapshot(), "errors": self.errors}
+        metrics.update(self.batcher.snapshot())
+        if self.lookup:
+            metrics["lookup"] = self.lookup.latency.snapshot()
+            metrics["cache"] = self.lookup.cache.snapshot()
+        return metrics
+
+    def close(self) -> None:
+        self.batcher.close()
+
+
+def _content_length(value: str | None) -> int | None:
+    """Tamanho do corpo, ou `None` se o cabeçalho não for um inteiro não negativo."""
+    try:
+        length = int(value or 0)
+    except ValueError:
+        return None
+    return length if length >= 0 else None
+
+
+def _predict_response(service: ModelService, body: bytes) -> tuple[int, dict[str, Any]]:
+    """Status e corpo da resposta de `/predict`: só um `id` desconhecido vira 404."""
+    try:
+        prediction = service.predict(json.loads(body or b"{}"))
+    except EntityNotFoundError as e:
+        status, error = 404, str(e)
+    except (ValueError, TypeError) as e:
+        status, error = 400, str(e)
+    except Exception as e:
+        status, error = 500, str(e)
+    else:
+        return 200, {"prediction": prediction}
+    service.record_error()
+    return status, {"error": error}
+
+
+class _HTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Fila de conexões maior que o padrão (5): muitos clientes simultâneos não esperam o
+    # reenvio do SYN
+    request_queue_size = 128
+
+
+class ServingServer:
+    """Servidor HTTP local (threads) na frente de um `ModelService`.
+
+    Uso em testes e no gerador de carga: `with ServingServer(service) as server:` e envie
+    requisições para `server.url`.
+    """
+
+    def __init__(self, service: ModelService, host: str = "127.0.0.1", port: int = 0):
+        self.service = service
+        self.httpd = _HTTPServer((host, port), self._handler_class())
+        self.thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host!s}:{port}"
+
+    def _handler_class(self) -> type[BaseHTTPRequestHandler]:
+        service = self.service
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Respostas pequenas saem na hora (sem Nagle + ACK atrasado: ~40 ms por requisição)
+            disable_nagle_algorithm = True
+
+            def send_json(self, status: int, body: Any) -> None:
+                data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self) -> None:
+                started_at = time.perf_counter()
+                length = _content_length(self.headers.get("Content-Length"))
+                if length is None:
+                    # Sem o tamanho do corpo não dá para achar a próxima requisição na conexão
+                    self.close_connection = True
+                    service.record_error()
+                    self.send_json(400, {"error": "Content-Length inválido"})
+                    return
+                # O corpo é lido antes de qualquer resposta: sobras no socket quebrariam a
+                # próxima requisição da mesma conexão (keep-alive)
+                body = self.rfile.read(length)
+                if self.path != "/predict":
+                    self.send_json(404, {"error": "rota inexistente"})
+                    return
+                status, response = _predict_response(service, body)
+                self.send_json(status, response)
+                if status == HTTPStatus.OK:
+                    service.latency.observe(time.perf_counter() - started_at)
+
+            def do_GET(self) -> None:
+                if self.path == "/health":
+                    self.send_json(200, service.health())
+                elif self.path == "/metrics":
+                    self.send_json(200, service.metrics())
+                else:
+                    self.send_json(404, {"error": "rota inexistente"})
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+        return Handler
+
+    def start(self) -> "ServingServer":
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self.service.close()
+
+    def __enter__(self) -> "ServingServer":
+        return self.start()
+
+    def __exit__(self, *exc: object) -> None:
+        self.stop()
+
+
+def parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Serviço REST de inferência online")
+    parser.add_argument("model", help="modelo persistido (joblib)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--features", nargs="+", help="colunas de entrada do modelo")
+    parser.add_argument("--max-batch", type=int, default=DEFAULT_MAX_BATCH_SIZE)
+    parser.add_argument("--max-wait-ms", type=float, default=DEFAULT_MAX_WAIT_MS)
+    parser.add_argument("--lookup", metavar="DATASET", help="dataset com as features por entidade")
+    parser.add_argument("--lookup-layer", choices=list(LAYERS), default="ml")
+    parser.add_argument("--key", default="id", help="coluna de identificação da entidade")
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_CACHE_SIZE)
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR)
+    return parser.parse_args(argv)
+
+
+def build_service(args: argparse.Namespace) -> ModelService:
+    service = ModelService(args.model, args.features, None, args.max_batch, args.max_wait_ms)
+    if args.lookup:
+        store = layer(args.lookup_layer, args.data_dir)
+        service.lookup = FeatureLookup(
+            store, args.lookup, args.key, service.features, args.cache_size
+        )
+    return service
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    args = parse_args(argv)
+    server = ServingServer(build_service(args), args.host, args.port)
+    print(f"🚀 Modelo {args.model} servido em {server.url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,100 @@
+"""Histogramas de latência e cache LRU do serviço online."""
+
+import bisect
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from typing import Any
+
+# Limites superiores dos buckets, em milissegundos (o último bucket é "acima de 5 s")
+LATENCY_BUCKETS_MS = (0.25, 0.5, 1, 2, 3, 5, 7.5, 10, 15, 20, 30, 50, 75, 100, 200, 500, 1000, 5000)
+
+
+class LatencyHistogram:
+    """Histograma de latências em buckets fixos: memória constante e percentis aproximados
+    pelo limite superior do bucket (o mesmo modelo dos histogramas do Prometheus)."""
+
+    def __init__(self, buckets_ms: tuple[float, ...] = LATENCY_BUCKETS_MS):
+        self.buckets_ms = buckets_ms
+        self.counts = [0] * (len(buckets_ms) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        ms = seconds * 1000
+        index = bisect.bisect_left(self.buckets_ms, ms)
+        with self.lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.total_ms += ms
+            self.max_ms = max(self.max_ms, ms)
+
+    def percentile(self, q: float) -> float:
+        with self.lock:
+            counts, count, max_ms = list(self.counts), self.count, self.max_ms
+        if not count:
+            return 0.0
+        rank = q * count
+        seen = 0
+        for index, bucket_count in enumerate(counts):
+            seen += bucket_count
+            if seen >= rank:
+                return self.buckets_ms[index] if index < len(self.buckets_ms) else max_ms
+        return max_ms
+
+    def snapshot(self) -> dict[str, Any]:
+        labels = [f"<={bound}ms" for bound in self.buckets_ms] + [f">{self.buckets_ms[-1]}ms"]
+        with self.lock:
+            buckets = {label: n for label, n in zip(labels, self.counts, strict=True) if n}
+            count, total_ms, max_ms = self.count, self.total_ms, self.max_ms
+        return {
+            "count": count,
+            "mean_ms": round(total_ms / count, 3) if count else 0.0,
+            "p50_ms": self.percentile(0.50),
+            "p95_ms": self.percentile(0.95),
+            "p99_ms": self.percentile(0.99),
+            "max_ms": round(max_ms, 3),
+            "buckets": buckets,
+        }
+
+
+class LRUCache:
+    """Cache LRU thread-safe com contagem de acertos; `None` não é armazenado."""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.items: OrderedDict[Hashable, Any] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get_or_load(self, key: Hashable, load: Callable[[Hashable], Any]) -> Any:
+        with self.lock:
+            if key in self.items:
+                self.items.move_to_end(key)
+                self.hits += 1
+                return self.items[key]
+            self.misses += 1
+
+        # Carrega fora do lock: uma leitura lenta não bloqueia as chaves já em cache
+        value = load(key)
+        if value is not None and self.max_size > 0:
+            with self.lock:
+                self.items[key] = value
+                self.items.move_to_end(key)
+                while len(self.items) > self.max_size:
+                    self.items.popitem(last=False)
+        return value
+
+    def snapshot(self) -> dict[str, Any]:
+        with self.lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self.items),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            }
@@ -0,0 +1,242 @@
+"""Pipeline de features incremental sobre a camada silver.
+
+As features são funções sobre uma partição da silver; a cada execução só as partições novas
+ou alteradas (pela impressão digital dos arquivos de entrada) são recalculadas e gravadas na
+camada ML, numa pasta por versão do conjunto de features, com um manifesto de versão.
+"""
+
+import hashlib
+import inspect
+import json
+import os
+import shutil
+import time
+import uuid
+from collections.abc import Callable, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, TypeAlias
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+from data.storage import DEFAULT_DATA_DIR, fingerprint, layer
+
+DEFAULT_FEATURE_WORKERS = int(os.getenv("FEATURE_WORKERS", "1"))
+FEATURE_MANIFEST = "_feature_manifest.json"
+
+FeatureFunc: TypeAlias = Callable[[pd.DataFrame], "pd.Series | pd.DataFrame"]
+
+
+@dataclass(frozen=True)
+class Feature:
+    """Uma feature: `func(partição) -> Series` (ou DataFrame com várias colunas)."""
+
+    name: str
+    func: FeatureFunc
+    columns: tuple[str, ...] = ()
+
+    @property
+    def code_hash(self) -> str:
+        try:
+            code = inspect.getsource(self.func)
+        except (OSError, TypeError):
+            code = f"{self.func.__module__}.{self.func.__qualname__}"
+        return hashlib.sha256(code.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class FeatureSet:
+    """Conjunto de features calculadas a partir de um dataset da silver.
+
+    `source` deve estar particionado por `partition_key` (ex.: `dt`); o resultado tem as
+    colunas `keys`, a chave de partição e uma coluna por feature, e vai para
+    `03 - ml/<name>/v<version>/`. Mudar `version` cria uma nova pasta (as anteriores ficam);
+    mudar o código de uma feature sem mudar a versão recalcula todas as partições.
+    """
+
+    name: str
+    source: str
+    keys: tuple[str, ...]
+    partition_key: str
+    version: str = "1"
+    features: list[Feature] = field(default_factory=list)
+
+    def feature(
+        self, name: str | None = None, columns: Sequence[str] = ()
+    ) -> Callable[[FeatureFunc], FeatureFunc]:
+        """Registra a função decorada como feature; `columns` restringe as colunas lidas."""
+
+        def register(func: FeatureFunc) -> FeatureFunc:
+            self.features.append(Feature(name or func.__name__, func, tuple(columns)))
+            return func
+
+        return register
+
+    @property
+    def output_dataset(self) -> str:
+        return f"{self.name}/v{self.version}"
+
+    @property
+    def code_hash(self) -> str:
+        digest = hashlib.sha256()
+        for feature in self.features:
+            digest.update(f"{feature.name}:{feature.code_hash}\n".encode())
+        return digest.hexdigest()
+
+    @property
+    def input_columns(self) -> list[str] | None:
+        """Colunas lidas da silver (`None` = todas, se alguma feature não declarar as suas)."""
+        if not self.features or any(not feature.columns for feature in self.features):
+            return None
+        columns = dict.fromkeys(self.keys)
+        for feature in self.features:
+            columns.update(dict.fromkeys(feature.columns))
+        return list(columns)
+
+    def compute(self, frame: pd.DataFrame) -> pd.DataFrame:
+        result = frame[list(self.keys)].reset_index(drop=True)
+        frame = frame.reset_index(drop=True)
+        for feature in self.features:
+            values = feature.func(frame)
+            if isinstance(values, pd.DataFrame):
+                for column in values.columns:
+                    result[f"{feature.name}_{column}"] = values[column].to_numpy()
+            else:
+                result[feature.name] = pd.Series(values).to_numpy()
+        return result
+
+
+@dataclass
+class RefreshReport:
+    computed: list[str] = field(default_factory=list)
+    skipped: int = 0
+    removed: list[str] = field(default_factory=list)
+    rows: int = 0
+    elapsed: float = 0.0
+
+    def print_report(self) -> None:
+        print(
+            f"🧮 {len(self.computed)} partição(ões) recalculada(s) ({self.rows} linhas), "
+            f"{self.skipped} reaproveitada(s), {len(self.removed)} removida(s) "
+            f"em {self.elapsed:.1f}s"
+        )
+
+
+def _partition_value(partition: str, partition_key: str) -> str:
+    key, _, value = partition.rpartition("/")[-1].partition("=")
+    if key != partition_key:
+        raise ValueError(f"Partição {partition} não está particionada por {partition_key}")
+    return value
+
+
+def _materialize(feature_set: FeatureSet, data_dir: str, files: list[str], value: str) -> int:
+    """Calcula e grava uma partição (executado num processo do pool)."""
+    table = ds.dataset(files, format="parquet").to_table(columns=feature_set.input_columns)
+    result = feature_set.compute(table.to_pandas())
+    result[feature_set.partition_key] = value
+    layer("ml", data_dir).write(
+        feature_set.output_dataset,
+        pa.Table.from_pandas(result, preserve_index=False),
+        partition_cols=[feature_set.partition_key],
+        mode="overwrite",
+    )
+    return len(result)
+
+
+class FeatureManifest:
+    """`_feature_manifest.json` da versão: código das features e entrada de cada partição."""
+
+    def __init__(self, path: str, feature_set: FeatureSet):
+        self.path = path
+        self.data: dict[str, Any] = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.data = json.load(f)
+        if self.data.get("code_hash") != feature_set.code_hash:
+            if self.data:
+                print(f"♻️ O código das features de {feature_set.name} mudou: recalculando tudo")
+            self.data = {"partitions": {}}
+        self.data.update(
+            feature_set=feature_set.name,
+            version=feature_set.version,
+            source=feature_set.source,
+            keys=list(feature_set.keys),
+            partition_key=feature_set.partition_key,
+            features=[feature.name for feature in feature_set.features],
+            code_hash=feature_set.code_hash,
+        )
+
+    @property
+    def partitions(self) -> dict[str, dict[str, Any]]:
+        partitions: dict[str, dict[str, Any]] = self.data["partitions"]
+        return partitions
+
+    def record(self, partition: str, input_fingerprint: str, rows: int) -> None:
+        self.partitions[partition] = {
+            "fingerprint": input_fingerprint,
+            "rows": rows,
+            "materialized_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        }
+
+    def save(self) -> None:
+        self.data["updated_at"] = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.data, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+
+def refresh(
+    feature_set: FeatureSet,
+    data_dir: str = DEFAULT_DATA_DIR,
+    max_workers: int = DEFAULT_FEATURE_WORKERS,
+    full: bool = False,
+) -> RefreshReport:
+    """Recalcula só as partições novas ou alteradas da silver e remove as que sumiram."""
+    started_at = time.perf_counter()
+    report = RefreshReport()
+    ml = layer("ml", data_dir)
+    output_dir = ml.path(feature_set.output_dataset)
+    manifest = FeatureManifest(os.path.join(output_dir, FEATURE_MANIFEST), feature_set)
+
+    inputs = layer("silver", data_dir).partition_files(feature_set.source)
+    pending = {}
+    for partition, files in inputs.items():
+        input_fingerprint = fingerprint(files)
+        done = manifest.partitions.get(partition, {})
+        if not full and done.get("fingerprint") == input_fingerprint:
+            report.skipped += 1
+            continue
+        pending[partition] = (files, input_fingerprint)
+
+    for partition in sorted(set(manifest.partitions) - set(inputs)):
+        shutil.rmtree(os.path.join(output_dir, partition), ignore_errors=True)
+        del manifest.partitions[partition]
+        report.removed.append(partition)
+
+    with ProcessPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        futures = {
+            partition: pool.submit(
+                _materialize,
+                feature_set,
+                data_dir,
+                files,
+                _partition_value(partition, feature_set.partition_key),
+            )
+            for partition, (files, _) in pending.items()
+        }
+        for partition, future in futures.items():
+            rows = future.result()
+            # Grava o manifesto a cada partição: uma interrupção não perde o que já foi feito
+            manifest.record(partition, pending[partition][1], rows)
+            manifest.save()
+            report.computed.append(partition)
+            report.rows += rows
+
+    manifest.save()
+    report.elapsed = time.perf_counter() - started_at
+    return report
@@ -0,0 +1,61 @@
+"""Pipeline de inferência em lote: lê a camada ML (ou gold), pontua com o modelo persistido
+e grava as predições particionadas na gold.
+
+    PYTHONPATH=src python -m pipelines.DS.inference_pipeline.batch_inference models/churn.joblib \
+        churn_features/v1 predictions/churn --features idade renda --passthrough id dt \
+        --partition-cols dt -j 8
+"""
+
+import argparse
+import sys
+from collections.abc import Sequence
+
+from data.storage import DEFAULT_CHUNK_ROWS, DEFAULT_DATA_DIR, LAYERS
+from inference.batch import (
+    DEFAULT_INFERENCE_WORKERS,
+    OUTPUT_LAYERS,
+    PREDICT_METHODS,
+    BatchInference,
+    ScoringSpec,
+)
+
+
+def parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Inferência em lote sobre as camadas de dados")
+    parser.add_argument("model", help="modelo persistido (joblib)")
+    parser.add_argument("input", help="dataset de entrada")
+    parser.add_argument("output", help="dataset de saída")
+    parser.add_argument("--features", nargs="+", required=True, help="colunas de entrada do modelo")
+    parser.add_argument(
+        "--passthrough", nargs="*", default=[], help="colunas copiadas para a saída"
+    )
+    parser.add_argument("--partition-cols", nargs="*", default=[], help="particionamento da saída")
+    parser.add_argument("--method", choices=PREDICT_METHODS, default="predict")
+    parser.add_argument("--input-layer", choices=list(LAYERS), default="ml")
+    parser.add_argument("--output-layer", choices=OUTPUT_LAYERS, default="gold")
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR)
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS)
+    parser.add_argument("-j", "--workers", type=int, default=DEFAULT_INFERENCE_WORKERS)
+    return parser.parse_args(argv)
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    args = parse_args(argv)
+    job = BatchInference(
+        args.model,
+        args.input,
+        args.output,
+        ScoringSpec(tuple(args.features), tuple(args.passthrough), args.method),
+        input_layer=args.input_layer,
+        output_layer=args.output_layer,
+        partition_cols=args.partition_cols,
+        data_dir=args.data_dir,
+        chunk_rows=args.chunk_rows,
+        max_workers=args.workers,
+    )
+    job.run().print_report()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
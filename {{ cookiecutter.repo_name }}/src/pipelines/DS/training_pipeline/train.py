@@ -0,0 +1,105 @@
+"""Pipeline de treinamento: lê as features da camada ML como memory-map, busca os
+hiperparâmetros em paralelo (successive halving) e grava o modelo com os metadados.
+
+    PYTHONPATH=src python -m pipelines.DS.training_pipeline.train churn_features/v1 \
+        --features idade renda --target churn \
+        --estimator sklearn.ensemble.HistGradientBoostingClassifier \
+        --params '{"learning_rate": [0.03, 0.1, 0.3], "max_depth": [3, 6, null]}' \
+        --model models/churn.joblib -j 64
+"""
+
+import argparse
+import importlib
+import json
+import sys
+from collections.abc import Sequence
+from typing import Any
+
+from data.storage import DEFAULT_DATA_DIR, LAYERS
+from model.matrix import DEFAULT_MATRIX_DIR, MatrixSpec
+from model.training import DEFAULT_TRAINING_WORKERS, SearchSpec, TrainingJob
+
+
+def load_estimator(path: str, params: dict[str, Any]) -> Any:
+    """Instancia um estimador pelo caminho de importação (ex.: `sklearn.svm.SVC`)."""
+    module_name, _, class_name = path.rpartition(".")
+    if not module_name:
+        raise ValueError(f"Informe o caminho completo do estimador: {path}")
+    return getattr(importlib.import_module(module_name), class_name)(**params)
+
+
+def resources(value: str) -> int | str:
+    """`--min-resources`/`--max-resources`: um inteiro ou um nome (ex.: `exhaust`)."""
+    return int(value) if value.isdigit() else value
+
+
+def parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Treino com busca de hiperparâmetros")
+    parser.add_argument("dataset", help="dataset de features")
+    parser.add_argument("--features", nargs="+", required=True, help="colunas de entrada")
+    parser.add_argument("--target", required=True, help="coluna alvo")
+    parser.add_argument("--estimator", required=True, help="ex.: sklearn.svm.SVC")
+    parser.add_argument(
+        "--set", type=json.loads, default={}, help="parâmetros fixos do estimador (JSON)"
+    )
+    parser.add_argument(
+        "--params", type=json.loads, required=True, help="espaço de busca (JSON, listas)"
+    )
+    parser.add_argument("--model", required=True, help="caminho do modelo (.joblib)")
+    parser.add_argument(
+        "--candidates", type=int, help="sorteia N combinações em vez da grade completa"
+    )
+    parser.add_argument("--cv", type=int, default=5)
+    parser.add_argument("--scoring", help="métrica do sklearn (padrão: a do estimador)")
+    parser.add_argument("--factor", type=int, default=3, help="fração mantida a cada rodada")
+    parser.add_argument("--resource", default="n_samples", help="recurso que cresce a cada rodada")
+    parser.add_argument(
+        "--max-resources",
+        type=resources,
+        default="auto",
+        help="recurso na última rodada (obrigatório se --resource não for n_samples)",
+    )
+    parser.add_argument(
+        "--min-resources",
+        type=resources,
+        default="exhaust",
+        help="recurso na primeira rodada: inteiro, exhaust ou smallest",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--layer", choices=list(LAYERS), default="ml")
+    parser.add_argument("--dtype", default="float32", help="tipo de X no memory-map")
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR)
+    parser.add_argument("--matrix-dir", default=DEFAULT_MATRIX_DIR)
+    parser.add_argument("-j", "--workers", type=int, default=DEFAULT_TRAINING_WORKERS)
+    return parser.parse_args(argv)
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    args = parse_args(argv)
+    job = TrainingJob(
+        load_estimator(args.estimator, args.set),
+        MatrixSpec(
+            args.dataset, tuple(args.features), args.target, layer=args.layer, dtype=args.dtype
+        ),
+        SearchSpec(
+            args.params,
+            n_candidates=args.candidates,
+            cv=args.cv,
+            scoring=args.scoring,
+            factor=args.factor,
+            resource=args.resource,
+            max_resources=args.max_resources,
+            min_resources=args.min_resources,
+            random_state=args.seed,
+        ),
+        args.model,
+        data_dir=args.data_dir,
+        matrix_dir=args.matrix_dir,
+        max_workers=args.workers,
+    )
+    job.run().print_report()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
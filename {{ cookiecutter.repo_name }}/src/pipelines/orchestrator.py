@@ -0,0 +1,352 @@
+"""Orquestrador local: executa os passos de um pipeline na ordem das dependências.
+
+Passos independentes rodam em paralelo num pool de processos. A saída de cada passo fica
+em cache, indexada pelo hash da sua entrada (código, parâmetros, arquivos lidos e saídas dos
+passos anteriores), então uma nova execução pula tudo o que não mudou. O tempo e o pico de
+memória de cada passo são registrados em `_runs.jsonl` (no Windows, sem `resource`, o pico
+fica zerado).
+"""
+
+import graphlib
+import hashlib
+import inspect
+import json
+import os
+import sys
+import time
+import uuid
+from collections.abc import Callable, Iterable, Sequence
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from typing import Any
+
+import joblib
+
+if sys.platform != "win32":
+    import resource
+
+DEFAULT_PIPELINE_WORKERS = int(os.getenv("PIPELINE_WORKERS", str(os.cpu_count() or 1)))
+DEFAULT_CACHE_DIR = os.getenv("PIPELINE_CACHE_DIR", ".cache/pipelines")
+RUNS_LOG = "_runs.jsonl"
+
+StepFunc = Callable[..., Any]
+
+
+@dataclass(frozen=True)
+class Step:
+    """Um passo: `func(**saídas_dos_deps, **params)`.
+
+    `inputs` são arquivos ou pastas lidos pelo passo (ex.: um dataset da silver); o tamanho e
+    o mtime deles entram no hash, junto com o código de `func`, `params` e as saídas de `deps`.
+    """
+
+    name: str
+    func: StepFunc
+    deps: tuple[str, ...] = ()
+    inputs: tuple[str, ...] = ()
+    params: tuple[tuple[str, Any], ...] = ()
+
+    @property
+    def code_hash(self) -> str:
+        try:
+            code = inspect.getsource(self.func)
+        except (OSError, TypeError):
+            code = f"{self.func.__module__}.{self.func.__qualname__}"
+        return hashlib.sha256(code.encode("utf-8")).hexdigest()
+
+
+def inputs_fingerprint(paths: Iterable[str]) -> str:
+    """Impressão digital de arquivos/pastas: caminho, tamanho e mtime de cada arquivo."""
+    digest = hashlib.sha256()
+    for path in sorted(paths):
+        files = [path] if os.path.isfile(path) else []
+        for root, _, names in os.walk(path):
+            files.extend(os.path.join(root, name) for name in names)
+        if not files:
+            digest.update(f"{path}:ausente\n".encode())
+        for file in sorted(files):
+            stat = os.stat(file)
+            digest.update(f"{file}:{stat.st_size}:{stat.st_mtime_ns}\n".encode())
+    return digest.hexdigest()
+
+
+def _peak_rss_mb() -> float:
+    if sys.platform != "win32":
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss é em KiB no Linux e em bytes no macOS
+        return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+    return 0.0
+
+
+def _execute(step: Step, dep_paths: dict[str, str], output_path: str) -> tuple[str, float, float]:
+    """Executa um passo (num processo novo do pool) e grava a saída direto no cache.
+
+    As saídas dos deps são lidas do disco aqui, então dados grandes não passam pelo
+    processo principal.
+    """
+    started_at = time.perf_counter()
+    kwargs = dict(step.params)
+    for name, path in dep_paths.items():
+        kwargs[name] = joblib.load(path)
+    output = step.func(**kwargs)
+    tmp_path = f"{output_path}.{uuid.uuid4().hex}.tmp"
+    joblib.dump(output, tmp_path)
+    os.replace(tmp_path, output_path)
+    return joblib.hash(output), time.perf_counter() - started_at, _peak_rss_mb()
+
+
+class _ProcessPerStep:
+    """Executa cada passo num processo novo, para que o pico de memória medido seja só dele.
+
+    No Python 3.11+ é um único pool com `max_tasks_per_child=1`; antes disso, cada passo
+    ganha um pool próprio de um processo, encerrado quando o passo termina.
+    """
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max(1, max_workers)
+        self.shared: ProcessPoolExecutor | None = None
+        if sys.version_info >= (3, 11):
+            self.shared = ProcessPoolExecutor(self.max_workers, max_tasks_per_child=1)
+        self.one_shot: dict[Future[Any], ProcessPoolExecutor] = {}
+
+    def submit(self, func: Callable[..., Any], *args: Any) -> Future[Any]:
+        if self.shared:
+            return self.shared.submit(func, *args)
+        pool = ProcessPoolExecutor(1)
+        future = pool.submit(func, *args)
+        self.one_shot[future] = pool
+        return future
+
+    def release(self, future: Future[Any]) -> None:
+        pool = self.one_shot.pop(future, None)
+        if pool:
+            pool.shutdown()
+
+    def __enter__(self) -> "_ProcessPerStep":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        if self.shared:
+            self.shared.shutdown()
+        for pool in self.one_shot.values():
+            pool.shutdown()
+
+
+@dataclass
+class StepRecord:
+    name: str
+    status: str  # "executado", "cache", "falhou" ou "bloqueado"
+    key: str = ""
+    output_hash: str = ""
+    elapsed: float = 0.0
+    peak_rss_mb: float = 0.0
+    error: str = ""
+
+
+@dataclass
+class PipelineReport:
+    pipeline: str
+    steps: list[StepRecord] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return all(record.status in {"executado", "cache"} for record in self.steps)
+
+    def print_report(self) -> None:
+        icons = {"executado": "✅", "cache": "⏭️", "falhou": "❌", "bloqueado": "⛔"}
+        for record in self.steps:
+            detail = f" {record.error}" if record.error else ""
+            print(
+                f"{icons[record.status]} {record.name}: {record.status} em {record.elapsed:.1f}s, "
+                f"pico de {record.peak_rss_mb:.0f} MiB{detail}"
+            )
+        ran = sum(record.status == "executado" for record in self.steps)
+        print(
+            f"🧩 {self.pipeline}: {ran} passo(s) executado(s), "
+            f"{len(self.steps) - ran} sem executar, em {self.elapsed:.1f}s"
+        )
+
+
+@dataclass
+class Pipeline:
+    """Passos com dependências; registre-os com o decorador `step`:
+
+        pipeline = Pipeline("churn")
+
+        @pipeline.step(inputs=["data/02 - silver/vendas"])
+        def features(): ...
+
+        @pipeline.step(deps=["features"], params={"n_iter": 20})
+        def train(features, n_iter): ...
+
+    As funções devem estar no nível do módulo (os passos rodam em outros processos) e as
+    saídas devem ser serializáveis com joblib. Só o código da própria função entra no hash:
+    se mudar um auxiliar que ela chama, use `force` ou um parâmetro de versão.
+    """
+
+    name: str
+    cache_dir: str = DEFAULT_CACHE_DIR
+    steps: dict[str, Step] = field(default_factory=dict)
+
+    def step(
+        self,
+        name: str | None = None,
+        deps: Sequence[str] = (),
+        inputs: Sequence[str] = (),
+        params: dict[str, Any] | None = None,
+    ) -> Callable[[StepFunc], StepFunc]:
+        def register(func: StepFunc) -> StepFunc:
+            step_name = name or func.__name__
+            if step_name in self.steps:
+                raise ValueError(f"Passo duplicado: {step_name}")
+            self.steps[step_name] = Step(
+                step_name, func, tuple(deps), tuple(inputs), tuple(sorted((params or {}).items()))
+            )
+            return func
+
+        return register
+
+    @property
+    def path(self) -> str:
+        return os.path.join(self.cache_dir, self.name)
+
+    def _output_path(self, name: str, key: str) -> str:
+        return os.path.join(self.path, name, f"{key}.pkl")
+
+    def _graph(self, targets: Sequence[str] | None) -> dict[str, tuple[str, ...]]:
+        """Subgrafo com os alvos e tudo de que eles dependem."""
+        for step in self.steps.values():
+            unknown = [dep for dep in step.deps if dep not in self.steps]
+            if unknown:
+                raise ValueError(f"{step.name} depende de passo inexistente: {', '.join(unknown)}")
+        pending = list(targets or self.steps)
+        graph: dict[str, tuple[str, ...]] = {}
+        while pending:
+            name = pending.pop()
+            if name not in self.steps:
+                raise ValueError(f"Passo inexistente: {name}")
+            if name not in graph:
+                graph[name] = self.steps[name].deps
+                pending.extend(graph[name])
+        return graph
+
+    def _key(self, step: Step, output_hashes: dict[str, str]) -> str:
+        digest = hashlib.sha256()
+        digest.update(f"code:{step.code_hash}\n".encode())
+        digest.update(f"params:{json.dumps(step.params, default=repr)}\n".encode())
+        digest.update(f"inputs:{inputs_fingerprint(step.inputs)}\n".encode())
+        for dep in step.deps:
+            digest.update(f"dep:{dep}:{output_hashes[dep]}\n".encode())
+        return digest.hexdigest()
+
+    def _cached(self, name: str, key: str) -> dict[str, Any] | None:
+        meta_path = os.path.join(self.path, name, f"{key}.json")
+        if not os.path.exists(meta_path) or not os.path.exists(self._output_path(name, key)):
+            return None
+        with open(meta_path, encoding="utf-8") as f:
+            meta: dict[str, Any] = json.load(f)
+        return meta
+
+    def _store(self, record: StepRecord) -> None:
+        """Grava os metadados da saída e apaga as saídas antigas do passo."""
+        step_dir = os.path.join(self.path, record.name)
+        meta_path = os.path.join(step_dir, f"{record.key}.json")
+        tmp_path = f"{meta_path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(asdict(record), f, indent=2)
+        os.replace(tmp_path, meta_path)
+        for entry in os.listdir(step_dir):
+            if not entry.startswith(record.key) and not entry.endswith(".tmp"):
+                os.remove(os.path.join(step_dir, entry))
+
+    def _log(self, report: PipelineReport) -> None:
+        entry = {
+            "finished_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "elapsed": round(report.elapsed, 3),
+            "steps": [asdict(record) for record in report.steps],
+        }
+        with open(os.path.join(self.path, RUNS_LOG), "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def output(self, name: str) -> Any:
+        """Saída mais recente de um passo, lida do cache."""
+        step_dir = os.path.join(self.path, name)
+        outputs = [entry for entry in os.listdir(step_dir) if entry.endswith(".pkl")]
+        if not outputs:
+            raise FileNotFoundError(f"Nenhuma saída em cache para {name}")
+        return joblib.load(os.path.join(step_dir, outputs[0]))
+
+    def _outcome(self, name: str, key: str, future: Future[Any]) -> StepRecord:
+        """Registro de um passo executado; a saída só entra no cache se ele deu certo."""
+        try:
+            output_hash, elapsed, peak_rss_mb = future.result()
+        except Exception as e:
+            return StepRecord(name, "falhou", key, error=f"{type(e).__name__}: {e}")
+        record = StepRecord(name, "executado", key, output_hash, elapsed, peak_rss_mb)
+        self._store(record)
+        return record
+
+    def run(
+        self,
+        targets: Sequence[str] | None = None,
+        force: Sequence[str] = (),
+        max_workers: int = DEFAULT_PIPELINE_WORKERS,
+    ) -> PipelineReport:
+        """Executa `targets` (padrão: todos os passos) e as dependências deles.
+
+        Um passo roda quando a sua chave não está no cache ou quando está em `force`; se ele
+        gerar a mesma saída de antes, os seguintes continuam vindo do cache. Quando um passo
+        falha, os que dependem dele não são executados e o restante segue.
+        """
+        started_at = time.perf_counter()
+        report = PipelineReport(self.name)
+        sorter = graphlib.TopologicalSorter(self._graph(targets))
+        sorter.prepare()
+        output_hashes: dict[str, str] = {}
+        keys: dict[str, str] = {}
+        blocked: set[str] = set()
+        running: dict[Future[Any], str] = {}
+        queued: list[tuple[str, tuple[Step, dict[str, str], str]]] = []
+
+        def finish(record: StepRecord) -> None:
+            report.steps.append(record)
+            if record.status in {"executado", "cache"}:
+                output_hashes[record.name] = record.output_hash
+            else:
+                blocked.add(record.name)
+            sorter.done(record.name)
+
+        with _ProcessPerStep(max_workers) as steps:
+            while sorter.is_active():
+                for name in sorter.get_ready():
+                    step = self.steps[name]
+                    if blocked.intersection(step.deps):
+                        finish(StepRecord(name, "bloqueado"))
+                        continue
+                    keys[name] = self._key(step, output_hashes)
+                    meta = self._cached(name, keys[name])
+                    if meta and name not in force:
+                        finish(StepRecord(name, "cache", keys[name], meta["output_hash"]))
+                        continue
+                    os.makedirs(os.path.join(self.path, name), exist_ok=True)
+                    dep_paths = {dep: self._output_path(dep, keys[dep]) for dep in step.deps}
+                    queued.append((name, (step, dep_paths, self._output_path(name, keys[name]))))
+
+                while queued and len(running) < steps.max_workers:
+                    name, args = queued.pop(0)
+                    running[steps.submit(_execute, *args)] = name
+                    print(f"▶️ {self.name}: executando {name}")
+                if not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    steps.release(future)
+                    finish(self._outcome(name, keys[name], future))
+
+        report.elapsed = time.perf_counter() - started_at
+        os.makedirs(self.path, exist_ok=True)
+        self._log(report)
+        return report
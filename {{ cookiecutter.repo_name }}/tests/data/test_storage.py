@@ -0,0 +1,78 @@
+import os
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from data.storage import BronzeStore, fingerprint, layer
+
+
+def _sales(day, values):
+    return pd.DataFrame({"dt": day, "id": range(len(values)), "valor": values})
+
+
+def test_overwrite_replaces_only_the_partitions_written(tmp_path):
+    silver = layer("silver", str(tmp_path))
+    silver.write("vendas", _sales("2024-01-01", [1.0, 2.0]), partition_cols=["dt"])
+    silver.write("vendas", _sales("2024-01-02", [3.0]), partition_cols=["dt"])
+
+    silver.write("vendas", _sales("2024-01-01", [10.0]), partition_cols=["dt"])
+
+    frame = silver.read_pandas("vendas", columns=["dt", "valor"]).sort_values("valor")
+    assert frame["valor"].tolist() == [3.0, 10.0]
+    assert list(silver.partition_files("vendas")) == ["dt=2024-01-01", "dt=2024-01-02"]
+
+
+def test_append_and_error_modes(tmp_path):
+    silver = layer("silver", str(tmp_path))
+    silver.write("vendas", _sales("2024-01-01", [1.0]), partition_cols=["dt"], mode="error")
+    silver.write("vendas", _sales("2024-01-01", [2.0]), partition_cols=["dt"], mode="append")
+
+    assert silver.count_rows("vendas") == 2
+    with pytest.raises(FileExistsError):
+        silver.write("vendas", _sales("2024-01-01", [3.0]), mode="error")
+    with pytest.raises(ValueError):
+        silver.write("vendas", _sales("2024-01-01", [3.0]), mode="upsert")
+
+
+def test_reads_filter_partitions_and_stream_in_chunks(tmp_path):
+    silver = layer("silver", str(tmp_path))
+    chunks = (_sales(f"2024-01-0{day}", [float(day)] * 50) for day in (1, 2, 3))
+    silver.write("vendas", chunks, partition_cols=["dt"])
+
+    assert silver.count_rows("vendas", [("dt", "=", "2024-01-02")]) == 50
+    batches = list(silver.iter_batches("vendas", columns=["valor"], chunk_rows=20))
+    assert max(batch.num_rows for batch in batches) <= 20
+    assert sum(batch.num_rows for batch in batches) == 150
+
+
+def test_bronze_only_accepts_ingestions(tmp_path):
+    bronze = layer("bronze", str(tmp_path))
+    assert isinstance(bronze, BronzeStore)
+
+    with pytest.raises(ValueError):
+        bronze.write("vendas", _sales("2024-01-01", [1.0]))
+
+
+def test_ingest_appends_a_partition_per_extraction_day_and_records_it(tmp_path):
+    bronze = BronzeStore(str(tmp_path))
+
+    first = bronze.ingest("vendas", _sales("2024-01-01", [1.0, 2.0]), "api", date(2024, 1, 1))
+    bronze.ingest("vendas", _sales("2024-01-01", [3.0]), "api", date(2024, 1, 1))
+    bronze.ingest("vendas", _sales("2024-01-02", [4.0]), "api", date(2024, 1, 2))
+
+    assert (first.partition, first.rows) == ("2024/01/01", 2)
+    assert all(file.startswith("2024/01/01/") for file in first.files)
+    assert [ingestion.rows for ingestion in bronze.ingestions("vendas")] == [2, 1, 1]
+    assert bronze.count_rows("vendas", [("day", "=", 1)]) == 3
+
+
+def test_fingerprint_changes_when_a_file_changes(tmp_path):
+    silver = layer("silver", str(tmp_path))
+    silver.write("vendas", _sales("2024-01-01", [1.0]), partition_cols=["dt"])
+    files = silver.partition_files("vendas")["dt=2024-01-01"]
+    before = fingerprint(files)
+
+    assert fingerprint(files) == before
+    os.utime(files[0], ns=(0, 0))
+    assert fingerprint(files) != before
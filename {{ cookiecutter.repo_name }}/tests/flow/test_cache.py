@@ -0,0 +1,89 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from cache import ResponseCache
+
+
+def test_get_counts_hits_and_misses(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    key = ResponseCache.key("docs", "modelo", "agente", "prompt")
+
+    assert cache.get(key) is None
+    cache.set(key, "resposta")
+
+    assert cache.get(key) == "resposta"
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert cache.get("ausente", count_miss=False) is None
+    assert cache.misses == 1
+
+
+def test_key_changes_with_any_part():
+    assert ResponseCache.key("a", "b") != ResponseCache.key("a", "c")
+    assert ResponseCache.key("ab", "c") != ResponseCache.key("a", "bc")
+
+
+def test_disabled_cache_stores_nothing(tmp_path):
+    cache = ResponseCache(str(tmp_path), enabled=False)
+    cache.set("chave", "resposta")
+
+    assert cache.get("chave") is None
+    assert os.listdir(tmp_path) == []
+
+
+def _age(cache, key, days):
+    """Recua o `created_at` da entrada sem mexer no mtime."""
+    path = cache._path(key)
+    with open(path, encoding="utf-8") as f:
+        entry = json.load(f)
+    entry["created_at"] -= days * 86400
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(entry, f)
+
+
+def test_expired_entry_is_a_miss_even_if_recently_read(tmp_path):
+    cache = ResponseCache(str(tmp_path), max_age_days=1)
+    cache.set("chave", "resposta")
+    _age(cache, "chave", 2)
+    # O mtime acabou de ser renovado, mas a validade conta a partir da criação
+    os.utime(cache._path("chave"))
+
+    assert cache.get("chave") is None
+    assert not os.path.exists(cache._path("chave"))
+    assert cache.misses == 1
+
+
+def test_evict_removes_expired_entries_by_creation_time(tmp_path):
+    cache = ResponseCache(str(tmp_path), max_age_days=1)
+    for key in ("velha", "nova"):
+        cache.set(key, "x")
+    _age(cache, "velha", 2)
+
+    assert cache.evict() == 1
+    assert cache.get("velha") is None
+    assert cache.get("nova") == "x"
+
+
+def test_evict_removes_least_recently_used_entries(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    for i, key in enumerate(["antiga", "usada", "nova"]):
+        cache.set(key, "x" * 100)
+        os.utime(cache._path(key), (1000 + i, 1000 + i))
+    cache.max_size = os.path.getsize(cache._path("antiga")) + os.path.getsize(cache._path("nova"))
+    # Uma leitura renova a entrada, que passa a ser a mais recente
+    assert cache.get("antiga") == "x" * 100
+
+    assert cache.evict() == 1
+    assert cache.get("antiga") is not None
+    assert cache.get("usada") is None
+    assert cache.get("nova") is not None
+
+
+def test_counters_are_exact_across_threads(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    cache.set("chave", "resposta")
+
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(lambda i: cache.get("chave" if i % 2 else "ausente"), range(400)))
+
+    assert (cache.hits, cache.misses) == (200, 200)
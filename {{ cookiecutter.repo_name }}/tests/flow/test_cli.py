@@ -0,0 +1,61 @@
+import os
+import subprocess
+import sys
+import time
+
+import jwt
+import pytest
+
+import cli
+from cli import output_dirs
+from stub_server import StubFlowServer
+
+CLI = cli.__file__
+
+
+def test_output_dirs_gives_each_root_its_own_subfolder():
+    assert output_dirs(["a"], "saida") == [("a", "saida")]
+    assert output_dirs(["x/a", "y/a", "b/"], "saida") == [
+        ("x/a", os.path.join("saida", "a")),
+        ("y/a", os.path.join("saida", "a_2")),
+        ("b/", os.path.join("saida", "b")),
+    ]
+
+
+@pytest.fixture
+def stub():
+    with StubFlowServer(responder=lambda prompt: "# Documentação\n") as server:
+        yield server
+
+
+def _run(tmp_path, server, *args):
+    # Os agentes leem `FLOW_BASE_URL` ao importar o cliente, então a CLI roda em outro processo
+    token = jwt.encode({"exp": int(time.time() + 3600)}, "chave-de-teste-com-pelo-menos-32-bytes")
+    env = {**os.environ, "FLOW_BASE_URL": server.url, "FLOW_TOKEN": token}
+    before = server.request_count
+    completed = subprocess.run(  # noqa: S603 - argumentos fixos
+        [sys.executable, CLI, "docs", "a", "b", "-o", "saida", "--no-dedup", *args],
+        cwd=tmp_path,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    assert completed.returncode == 0, completed.stdout + completed.stderr
+    return server.request_count - before
+
+
+def test_cli_runs_several_roots_into_one_index(tmp_path, stub):
+    for root in ("a", "b"):
+        (tmp_path / root / "pkg").mkdir(parents=True)
+        (tmp_path / root / "pkg" / f"modulo_{root}.py").write_text(f"{root} = 1\n", "utf-8")
+
+    first = _run(tmp_path, stub, "--incremental", "--no-cache")
+    second = _run(tmp_path, stub, "--incremental", "--no-cache")
+
+    output = tmp_path / "saida"
+    assert first > 0 and second == 0
+    assert (output / "a" / "pkg" / "modulo_a.md").exists()
+    assert (output / "b" / "pkg" / "modulo_b.md").exists()
+    index = (output / "index.md").read_text(encoding="utf-8")
+    assert "(a/pkg/modulo_a.md)" in index and "(b/pkg/modulo_b.md)" in index
@@ -0,0 +1,80 @@
+import pytest
+
+from cache import ResponseCache
+from client import ChatRequest, FlowClient, FlowError, strip_code_fences
+from stub_server import StubFlowServer
+from transport import FlowSession
+
+
+def _answer(prompt):
+    return f"```python\nresposta para {prompt}\n```"
+
+
+def _client(server, **kwargs):
+    return FlowClient(token="t", base_url=server.url, post_processors=[strip_code_fences], **kwargs)
+
+
+@pytest.fixture
+def stub():
+    with StubFlowServer(responder=_answer, chunk_size=8) as server:
+        yield server
+
+
+@pytest.fixture
+def stub_without_stream():
+    # O POST devolve só o chatId, sem o evento final
+    with StubFlowServer(responder=_answer, stream=False) as server:
+        yield server
+
+
+def test_stream_builds_the_answer_from_the_post(stub):
+    chunks = []
+
+    response = _client(stub, stream=True).send(ChatRequest("olá"), on_chunk=chunks.append)
+
+    assert response.streamed
+    assert response.content == "resposta para olá\n"
+    assert "".join(chunks) == _answer("olá")
+    assert stub.request_count == 1
+
+
+def test_incomplete_stream_falls_back_to_get(stub_without_stream):
+    response = _client(stub_without_stream, stream=True).send(ChatRequest("olá"))
+
+    assert not response.streamed
+    assert response.content == "resposta para olá\n"
+    assert stub_without_stream.request_count == 2
+
+
+def test_polling_mode_uses_post_and_get(stub):
+    response = _client(stub, stream=False).send(ChatRequest("olá"))
+
+    assert not response.streamed
+    assert response.chat_id in stub.chats
+    assert stub.request_count == 2
+
+
+def test_cached_answer_skips_the_server(stub, tmp_path):
+    client = _client(stub, cache=ResponseCache(str(tmp_path)))
+
+    first = client.complete("olá")
+    second = client.send(ChatRequest("olá"))
+
+    assert second.cached and second.content == first
+    assert stub.request_count == 1
+    assert client.cached("olá") == first
+    assert client.cached("outro") is None
+
+
+def test_resume_reads_an_existing_chat(stub):
+    client = _client(stub, stream=False)
+    chat_id = client.create_chat(ChatRequest("olá"))
+
+    assert client.resume(chat_id) == "resposta para olá\n"
+
+
+def test_server_error_raises_flow_error():
+    with StubFlowServer(error_rate=1.0) as server:
+        client = FlowClient(session=FlowSession("t", max_retries=0), base_url=server.url)
+        with pytest.raises(FlowError):
+            client.complete("olá")
@@ -0,0 +1,93 @@
+import json
+
+from dedup import Deduplicator
+from executor import FileJob, TaskResult
+
+
+def _job(rel_path, content):
+    return FileJob(
+        rel_path.rsplit("/", 1)[-1], f"/src/{rel_path}", rel_path, f"/docs/{rel_path}.md", content
+    )
+
+
+def _ok(job, value):
+    return job, TaskResult(job.rel_path, ok=True, value=value)
+
+
+def _paths(pairs):
+    return [(job.rel_path, outcome.value) for job, outcome in pairs]
+
+
+def test_identical_files_are_sent_once_and_fanned_out():
+    dedup = Deduplicator(near_threshold=None)
+    original = _job("a/util.py", "def f():\n    return 1\n")
+    copy = _job("b/util.py", "def f():   \r\n    return 1\n")
+    other_ext = _job("c/util.txt", original.content)
+
+    unique = list(dedup.unique([original, copy, other_ext]))
+
+    assert [job.rel_path for job in unique] == ["a/util.py", "c/util.txt"]
+    assert _paths(dedup.fan_out([_ok(original, "doc")])) == [
+        ("a/util.py", "doc"),
+        ("b/util.py", "doc"),
+    ]
+    assert dedup.duplicates == 1
+
+
+def test_duplicate_arriving_after_the_answer_is_drained():
+    dedup = Deduplicator(near_threshold=None)
+    original = _job("a.py", "x = 1\n")
+    list(dedup.unique([original]))
+    list(dedup.fan_out([_ok(original, "doc")]))
+
+    assert list(dedup.unique([_job("b.py", "x = 1\n")])) == []
+    assert _paths(dedup.drain()) == [("b.py", "doc")]
+
+
+def test_failed_representative_fails_waiting_duplicates_and_is_sent_again():
+    dedup = Deduplicator(near_threshold=None)
+    original, waiting = _job("a.py", "x = 1\n"), _job("b.py", "x = 1\n")
+    list(dedup.unique([original, waiting]))
+
+    fanned = list(dedup.fan_out([(original, TaskResult("a.py", ok=False, error="timeout"))]))
+
+    assert [(job.rel_path, outcome.ok, outcome.error) for job, outcome in fanned] == [
+        ("a.py", False, "timeout"),
+        ("b.py", False, "timeout"),
+    ]
+    later = _job("c.py", "x = 1\n")
+    assert list(dedup.unique([later])) == [later]
+
+
+def test_near_duplicates_join_the_group_above_the_threshold():
+    body = "".join(f"def f{i}(x):\n    return x * {i} + {i}\n\n" for i in range(40))
+    original = _job("a.py", body)
+    near = _job("b.py", body.replace("return x * 39 + 39", "return x * 39 + 40"))
+    different = _job("c.py", "".join(f"class C{i}:\n    nome = 'c{i}'\n\n" for i in range(40)))
+
+    assert [job.rel_path for job in Deduplicator(near_threshold=None).unique([original, near])] == [
+        "a.py",
+        "b.py",
+    ]
+
+    dedup = Deduplicator(near_threshold=0.8)
+    assert [job.rel_path for job in dedup.unique([original, near, different])] == ["a.py", "c.py"]
+
+
+def test_notebooks_ignore_outputs_when_comparing():
+    def notebook(outputs):
+        cell = {
+            "cell_type": "code",
+            "source": ["print(1)"],
+            "outputs": outputs,
+            "execution_count": len(outputs),
+        }
+        return json.dumps({"cells": [cell], "metadata": {}, "nbformat": 4, "nbformat_minor": 5})
+
+    dedup = Deduplicator(near_threshold=None)
+    jobs = [
+        _job("a.ipynb", notebook([])),
+        _job("b.ipynb", notebook([{"output_type": "stream", "text": ["1"]}])),
+    ]
+
+    assert [job.rel_path for job in dedup.unique(jobs)] == ["a.ipynb"]
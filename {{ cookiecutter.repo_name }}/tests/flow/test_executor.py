@@ -0,0 +1,56 @@
+import time
+
+from executor import run_ordered
+from metrics import MetricsRecorder
+
+
+def test_run_ordered_yields_results_in_input_order():
+    # Os primeiros itens demoram mais, então terminam por último
+    def worker(item):
+        time.sleep(0.01 * (5 - item))
+        return f"resposta {item}"
+
+    results = list(run_ordered(range(5), worker, max_workers=4))
+
+    assert [item for item, _ in results] == [0, 1, 2, 3, 4]
+    assert [result.value for _, result in results] == [f"resposta {i}" for i in range(5)]
+    assert all(result.ok for _, result in results)
+
+
+def test_run_ordered_reports_failures_and_empty_answers():
+    def worker(item):
+        if item == "erro":
+            raise RuntimeError("falhou")
+        return "" if item == "vazio" else item
+
+    results = dict(run_ordered(["ok", "erro", "vazio"], worker, max_workers=2))
+
+    assert results["ok"].ok
+    assert not results["erro"].ok and results["erro"].error == "falhou"
+    assert not results["vazio"].ok and results["vazio"].error == "resposta vazia"
+
+
+def test_run_ordered_consumes_input_on_demand():
+    consumed = []
+
+    def items():
+        for i in range(100):
+            consumed.append(i)
+            yield i
+
+    results = run_ordered(items(), lambda item: item + 1, max_workers=2, queue_size=3)
+    first, _ = next(results)
+
+    # Só `queue_size` itens em voo, mais o que liberou a vaga
+    assert first == 0
+    assert len(consumed) <= 4
+    assert len(list(results)) == 99
+
+
+def test_run_ordered_records_task_metrics(tmp_path):
+    recorder = MetricsRecorder(str(tmp_path / "metrics.jsonl"))
+
+    results = list(run_ordered(["a", "b"], str.upper, metrics=recorder))
+
+    assert [result.metrics.key for _, result in results] == ["a", "b"]
+    assert all(result.metrics.ok for _, result in results)
@@ -0,0 +1,80 @@
+import math
+import time
+
+import jwt
+import pytest
+
+import flow_token
+from flow_token import TokenError, TokenProvider, token_expiry
+
+KEY = "chave-de-teste-com-pelo-menos-32-bytes"
+
+
+def _token(expires_in):
+    return jwt.encode({"exp": int(time.time() + expires_in)}, KEY, algorithm="HS256")
+
+
+def _provider(tmp_path, monkeypatch, token, answers, **kwargs):
+    """Provider com o `.env` em `tmp_path` e o Chrome trocado por `answers`."""
+    monkeypatch.setenv("FLOW_TOKEN", token)
+    monkeypatch.setenv("FLOW_TENANT", "tenant")
+    calls = []
+
+    def capture_cookies(profile_dir, headless, timeout):
+        calls.append(headless)
+        return answers.pop(0) if answers else (None, None)
+
+    monkeypatch.setattr(flow_token, "capture_cookies", capture_cookies)
+    env_path = tmp_path / ".env"
+    env_path.write_text("", encoding="utf-8")
+    provider = TokenProvider(
+        env_path=str(env_path), profile_dir=str(tmp_path), margin=300, interactive=False, **kwargs
+    )
+    return provider, calls
+
+
+def test_token_expiry_reads_the_exp_claim():
+    assert token_expiry(jwt.encode({"exp": 1700000000}, KEY, algorithm="HS256")) == 1700000000
+    assert math.isinf(token_expiry(jwt.encode({"sub": "x"}, KEY, algorithm="HS256")))
+    with pytest.raises(jwt.PyJWTError):
+        token_expiry("não é um jwt")
+
+
+def test_cached_token_outside_the_margin_is_used_as_is(tmp_path, monkeypatch):
+    token = _token(3600)
+    provider, calls = _provider(tmp_path, monkeypatch, token, [])
+
+    assert provider.get() == token
+    assert calls == []
+
+
+def test_token_inside_the_margin_is_refreshed_and_saved(tmp_path, monkeypatch):
+    renewed = _token(3600)
+    provider, calls = _provider(tmp_path, monkeypatch, _token(100), [(renewed, "novo")])
+
+    assert provider.get() == renewed
+    assert calls == [True]
+    assert f"FLOW_TOKEN='{renewed}'" in (tmp_path / ".env").read_text(encoding="utf-8")
+    assert provider.get() == renewed and len(calls) == 1
+
+
+def test_failed_refresh_keeps_the_valid_token_and_backs_off(tmp_path, monkeypatch):
+    token = _token(100)
+    provider, calls = _provider(tmp_path, monkeypatch, token, [], cooldown=60)
+
+    assert provider.get() == token
+    assert provider.get() == token
+    assert calls == [True]
+
+    provider, calls = _provider(tmp_path, monkeypatch, token, [], cooldown=0)
+    provider.get()
+    provider.get()
+    assert calls == [True, True]
+
+
+def test_expired_token_without_refresh_raises(tmp_path, monkeypatch):
+    provider, calls = _provider(tmp_path, monkeypatch, _token(-10), [])
+
+    with pytest.raises(TokenError):
+        provider.get()
+    assert calls == [True]
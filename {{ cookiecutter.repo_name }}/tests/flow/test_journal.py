@@ -0,0 +1,125 @@
+import os
+
+import pytest
+
+from client import _notify_chat
+from executor import FileJob
+from journal import DONE, FAILED, IN_FLIGHT, JOURNAL_FILENAME, PENDING, JobJournal
+from planner import WorkUnit
+
+
+def _job(tmp_path, rel_path, content="x = 1\n"):
+    return FileJob(
+        rel_path,
+        str(tmp_path / "src" / rel_path),
+        rel_path,
+        str(tmp_path / "docs" / f"{rel_path}.md"),
+        content,
+    )
+
+
+def _single(job):
+    return WorkUnit("single", [job], [job.content])
+
+
+def _reopen(tmp_path, journal):
+    journal.close(completed=False)
+    return JobJournal(str(tmp_path / "docs"))
+
+
+def test_resume_skips_done_files_with_the_same_content(tmp_path):
+    done, failed = _job(tmp_path, "a.py"), _job(tmp_path, "b.py")
+    journal = JobJournal(str(tmp_path / "docs"))
+    list(journal.pending([done, failed]))
+    journal.mark(done, DONE)
+    journal.mark(failed, FAILED, error="timeout")
+    with open(done.output_path, "w", encoding="utf-8") as f:
+        f.write("doc")
+
+    journal = _reopen(tmp_path, journal)
+    changed = _job(tmp_path, "a.py", "x = 2\n")
+
+    assert [job.rel_path for job in journal.pending([done, failed])] == ["b.py"]
+    assert journal.resumed == 1
+    assert [job.rel_path for job in journal.pending([changed])] == ["a.py"]
+
+
+def test_resume_reattaches_an_in_flight_chat(tmp_path):
+    job = _job(tmp_path, "a.py")
+    journal = JobJournal(str(tmp_path / "docs"))
+    list(journal.pending([job]))
+
+    def interrupted():
+        # O servidor devolveu o chatId e o processo morreu antes da resposta
+        _notify_chat("chat-1")
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        journal.run(_single(job), interrupted, reattach=lambda chat_id: None)
+    entry = journal.entries["a.py"]
+    assert (entry["state"], entry["chat_id"]) == (IN_FLIGHT, "chat-1")
+
+    journal = _reopen(tmp_path, journal)
+    list(journal.pending([job]))
+    reattached = []
+
+    def execute():
+        raise AssertionError("o prompt não deveria ser reenviado")
+
+    def reattach(chat_id):
+        reattached.append(chat_id)
+        return "doc"
+
+    result = journal.run(_single(job), execute, reattach)
+
+    assert result == {"a.py": "doc"}
+    assert reattached == ["chat-1"]
+
+
+def test_failed_reattach_sends_the_prompt_again(tmp_path):
+    job = _job(tmp_path, "a.py")
+    journal = JobJournal(str(tmp_path / "docs"))
+    list(journal.pending([job]))
+    journal.mark(job, IN_FLIGHT, chat_id="chat-1")
+
+    def reattach(chat_id):
+        raise RuntimeError("chat expirado")
+
+    assert journal.run(_single(job), lambda: {"a.py": "doc nova"}, reattach) == {"a.py": "doc nova"}
+
+
+def test_completed_run_removes_the_journal(tmp_path):
+    journal = JobJournal(str(tmp_path / "docs"))
+    list(journal.pending([_job(tmp_path, "a.py")]))
+    journal.close(completed=True)
+
+    assert not os.path.exists(tmp_path / "docs" / JOURNAL_FILENAME)
+
+
+def test_without_resume_the_journal_starts_over(tmp_path):
+    job = _job(tmp_path, "a.py")
+    journal = JobJournal(str(tmp_path / "docs"))
+    list(journal.pending([job]))
+    journal.mark(job, DONE)
+    journal.close(completed=False)
+    os.makedirs(os.path.dirname(job.output_path), exist_ok=True)
+    with open(job.output_path, "w", encoding="utf-8") as f:
+        f.write("doc")
+
+    journal = JobJournal(str(tmp_path / "docs"), resume=False)
+
+    assert list(journal.pending([job])) == [job]
+
+
+def test_only_done_records_are_fsynced(tmp_path, monkeypatch):
+    synced = []
+    monkeypatch.setattr(os, "fsync", synced.append)
+    job = _job(tmp_path, "a.py")
+    journal = JobJournal(str(tmp_path / "docs"))
+
+    for state in (PENDING, IN_FLIGHT, FAILED, DONE):
+        journal.mark(job, state)
+
+    assert synced == [journal.file.fileno()]
+    journal.close(completed=False)
+    assert len(JobJournal(str(tmp_path / "docs")).entries) == 1
@@ -0,0 +1,64 @@
+import os
+
+from manifest import RunManifest
+
+
+def _write(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+    return str(path)
+
+
+def _processed(tmp_path, rel_path, content):
+    """Manifesto salvo com `rel_path` já processado e a saída em disco."""
+    source = _write(tmp_path / "src" / rel_path, content)
+    output = _write(tmp_path / "docs" / f"{rel_path}.md", f"doc de {rel_path}")
+    manifest = RunManifest(str(tmp_path / "docs"), str(tmp_path / "src"))
+    manifest.record(source, rel_path, output, content)
+    manifest.save()
+    return source, output
+
+
+def test_unchanged_file_is_skipped(tmp_path):
+    source, _ = _processed(tmp_path, "a.py", "x = 1\n")
+    manifest = RunManifest(str(tmp_path / "docs"), str(tmp_path / "src"))
+
+    assert not manifest.needs_processing(source, "a.py")
+    assert manifest.needs_processing(str(tmp_path / "src" / "novo.py"), "novo.py")
+
+
+def test_changed_or_missing_output_is_processed(tmp_path):
+    source, output = _processed(tmp_path, "a.py", "x = 1\n")
+    manifest = RunManifest(str(tmp_path / "docs"), str(tmp_path / "src"))
+
+    _write(source, "x = 2  # mudou\n")
+    assert manifest.needs_processing(source, "a.py")
+
+    _processed(tmp_path, "a.py", "x = 1\n")
+    manifest = RunManifest(str(tmp_path / "docs"), str(tmp_path / "src"))
+    os.remove(output)
+    assert manifest.needs_processing(source, "a.py")
+
+
+def test_touched_file_with_same_content_is_not_resent(tmp_path):
+    source, _ = _processed(tmp_path, "a.py", "x = 1\n")
+    os.utime(source, (1, 1))
+    manifest = RunManifest(str(tmp_path / "docs"), str(tmp_path / "src"))
+
+    assert manifest.needs_processing(source, "a.py")
+    assert manifest.same_content(source, "a.py", "x = 1\n")
+    assert not manifest.same_content(source, "a.py", "x = 2\n")
+
+
+def test_prune_removes_outputs_of_deleted_sources(tmp_path):
+    source, output = _processed(tmp_path, "velho.py", "x = 1\n")
+    kept_source, kept_output = _processed(tmp_path, "a.py", "y = 2\n")
+    os.remove(source)
+    manifest = RunManifest(str(tmp_path / "docs"), str(tmp_path / "src"))
+    manifest.needs_processing(kept_source, "a.py")
+
+    assert manifest.prune() == 1
+    assert not os.path.exists(output)
+    assert os.path.exists(kept_output)
+    assert list(manifest.entries) == ["a.py"]
@@ -0,0 +1,86 @@
+import json
+
+from notebooks import NOTEBOOK_NOTE, compact, notebook_output, rebuild, split_cells
+
+NOTEBOOK = {
+    "cells": [
+        {
+            "id": "intro",
+            "cell_type": "markdown",
+            "metadata": {"tags": ["titulo"]},
+            "source": ["# Análise\n", "Texto"],
+        },
+        {
+            "id": "carga",
+            "cell_type": "code",
+            "metadata": {},
+            "execution_count": 3,
+            "outputs": [
+                {"output_type": "display_data", "data": {"image/png": "iVBORw0KGgo" * 1000}}
+            ],
+            "source": "df = load()\ndf.head()",
+        },
+    ],
+    "metadata": {"kernelspec": {"name": "python3"}},
+    "nbformat": 4,
+    "nbformat_minor": 5,
+}
+
+
+def test_compact_keeps_only_numbered_sources():
+    text = compact(json.dumps(NOTEBOOK))
+
+    assert text.startswith(NOTEBOOK_NOTE)
+    assert "# %% [1] markdown\n# Análise\nTexto" in text
+    assert "# %% [2] code\ndf = load()\ndf.head()" in text
+    assert "iVBORw0KGgo" not in text
+    assert compact("{inválido") == "{inválido"
+
+
+def test_compact_and_rebuild_round_trip():
+    notebook = json.loads(rebuild(compact(json.dumps(NOTEBOOK)), NOTEBOOK))
+
+    assert [cell["id"] for cell in notebook["cells"]] == ["intro", "carga"]
+    assert [cell["source"] for cell in notebook["cells"]] == [
+        ["# Análise\n", "Texto"],
+        ["df = load()\n", "df.head()"],
+    ]
+    assert notebook["cells"][0]["metadata"] == {"tags": ["titulo"]}
+    assert notebook["cells"][1]["outputs"] == [] and notebook["cells"][1]["execution_count"] is None
+    assert notebook["metadata"] == NOTEBOOK["metadata"]
+    assert (notebook["nbformat"], notebook["nbformat_minor"]) == (4, 5)
+
+
+def test_rebuild_adds_new_cells_and_a_header():
+    answer = (
+        "Comentário solto\n\n# %% [2] code\ndf = load(cache=True)\n\n# %% [+] code\ndf.describe()\n"
+    )
+
+    notebook = json.loads(rebuild(answer, NOTEBOOK, header="# Refatorado"))
+
+    cells = notebook["cells"]
+    assert ["".join(cell["source"]) for cell in cells] == [
+        "# Refatorado",
+        "Comentário solto",
+        "df = load(cache=True)",
+        "df.describe()",
+    ]
+    assert cells[2]["id"] == "carga"
+    assert len({cell["id"] for cell in cells}) == 4
+
+
+def test_split_cells_without_markers_is_a_single_code_cell():
+    assert split_cells("print('oi')") == [
+        {"index": None, "cell_type": "code", "source": "print('oi')"}
+    ]
+
+
+def test_notebook_output_reads_the_original_from_disk(tmp_path):
+    path = tmp_path / "analise.ipynb"
+    path.write_text(json.dumps({**NOTEBOOK, "nbformat_minor": 4}), encoding="utf-8")
+
+    notebook = json.loads(notebook_output("# %% [1] markdown\n# Título", str(path)))
+
+    # nbformat 4.4 não tem ids de célula
+    assert notebook["nbformat_minor"] == 4
+    assert "id" not in notebook["cells"][0]
@@ -0,0 +1,124 @@
+from executor import FileJob, TaskResult
+from planner import (
+    BATCH_MARKER,
+    CHARS_PER_TOKEN,
+    PlanLimits,
+    UnitClient,
+    WorkUnit,
+    plan,
+    run_unit,
+    split_source,
+    unit_results,
+)
+
+LIMITS = PlanLimits(max_tokens=50, small_tokens=10, batch_tokens=25, batch_max_files=3)
+
+
+def _job(rel_path, content):
+    return FileJob(
+        rel_path.rsplit("/", 1)[-1], f"/src/{rel_path}", rel_path, f"/docs/{rel_path}.md", content
+    )
+
+
+def _python_source(functions):
+    return "\n\n".join(f"def f{i}():\n    return {'1 + ' * 10}{i}\n" for i in range(functions))
+
+
+def test_split_source_cuts_at_function_boundaries():
+    content = _python_source(6)
+
+    parts = split_source(content, max_tokens=30, is_python=True)
+
+    assert len(parts) > 1
+    assert "".join(parts) == content
+    assert all(part.lstrip().startswith("def ") for part in parts)
+    assert all(len(part) <= 30 * CHARS_PER_TOKEN for part in parts)
+
+
+def test_split_source_cuts_an_oversized_block_by_lines():
+    content = "".join(f"linha {i}\n" for i in range(100))
+
+    parts = split_source(content, max_tokens=20)
+
+    assert "".join(parts) == content
+    assert all(len(part) <= 20 * CHARS_PER_TOKEN for part in parts)
+
+
+def test_plan_batches_small_files_and_splits_large_ones():
+    jobs = [
+        _job("a.py", "a = 1"),
+        _job("b.py", "b = 2"),
+        _job("grande.py", _python_source(8)),
+        _job("medio.py", "x" * 100),
+        _job("c.py", "c = 3"),
+    ]
+
+    units = list(plan(jobs, LIMITS))
+
+    assert [(unit.kind, [job.rel_path for job in unit.jobs]) for unit in units] == [
+        ("chunked", ["grande.py"]),
+        ("single", ["medio.py"]),
+        ("batch", ["a.py", "b.py", "c.py"]),
+    ]
+
+
+def test_plan_limits_batch_size_and_skips_cached_files():
+    jobs = [_job(f"{name}.py", f"{name} = 1") for name in "abcde"]
+
+    units = list(plan(jobs, LIMITS, cached=lambda job: "doc" if job.rel_path == "b.py" else None))
+
+    assert [(unit.kind, [job.rel_path for job in unit.jobs]) for unit in units] == [
+        ("cached", ["b.py"]),
+        ("batch", ["a.py", "c.py", "d.py"]),
+        ("single", ["e.py"]),
+    ]
+    assert next(plan(jobs[:2], LIMITS, batch=False)).kind == "single"
+
+
+def _client(answers, prompts, remembered):
+    def complete(prompt):
+        prompts.append(prompt)
+        return answers.pop(0) if answers else None
+
+    def remember(job, text):
+        remembered.append((job.rel_path, text))
+
+    return UnitClient(
+        build_prompt=lambda content, label: f"[{label}]\n{content}",
+        complete=complete,
+        remember=remember,
+    )
+
+
+def test_run_unit_splits_a_batch_answer_and_resends_missing_files():
+    jobs = [_job("a.py", "a = 1"), _job("b.py", "b = 2")]
+    unit = next(plan(jobs, LIMITS))
+    prompts, remembered = [], []
+    answers = [f"{BATCH_MARKER} `a.py`\ndoc de a\n", "doc de b sozinho"]
+
+    results = run_unit(unit, _client(answers, prompts, remembered))
+
+    assert results == {"a.py": "doc de a", "b.py": "doc de b sozinho"}
+    assert len(prompts) == 2 and prompts[1].startswith("[b.py]")
+    assert remembered == [("a.py", "doc de a")]
+
+
+def test_run_unit_joins_chunk_answers():
+    unit = WorkUnit("chunked", [_job("grande.py", "")], ["parte 1", "parte 2"])
+    prompts = []
+
+    results = run_unit(unit, _client(["doc 1", "doc 2"], prompts, []))
+
+    assert results == {"grande.py": "doc 1\n\ndoc 2"}
+    assert prompts[1].startswith("[grande.py (parte 2 de 2)]")
+
+
+def test_unit_results_reports_files_missing_from_the_answer():
+    jobs = [_job("a.py", "a = 1"), _job("b.py", "b = 2")]
+    unit = WorkUnit("batch", jobs, [""])
+
+    outcome = TaskResult("lote", ok=True, value={"a.py": "doc"})
+    outcomes = {job.rel_path: result for job, result in unit_results(unit, outcome)}
+
+    assert outcomes["a.py"].ok and outcomes["a.py"].value == "doc"
+    assert not outcomes["b.py"].ok
@@ -0,0 +1,69 @@
+import time
+
+import pytest
+
+from generate_docs import build_prompt
+from metrics import MetricsRecorder
+from prompts import PromptTemplate, load_template, normalize
+
+CODE = "def f():\n    return {'chave': 1}\n"
+
+
+def test_normalize_strips_indentation_and_blank_lines():
+    assert normalize("    a  \n\n\n\n    b\t\n") == "a\n\nb\n"
+
+
+@pytest.mark.parametrize("text", ["sem conteúdo", "{content} e {content}"])
+def test_template_needs_exactly_one_content_field(text):
+    with pytest.raises(ValueError, match="exatamente uma vez"):
+        PromptTemplate.from_text("ruim", text)
+
+
+def test_render_requires_the_template_fields():
+    template = PromptTemplate.from_text("t", "Arquivo {filename}:\n{content}\nfim de {filename}")
+
+    with pytest.raises(KeyError, match="filename"):
+        template.render(CODE)
+    assert template.render(CODE, filename="a.py") == f"Arquivo a.py:\n{CODE}\nfim de a.py\n"
+
+
+def test_render_counts_template_and_content_bytes():
+    template = PromptTemplate.from_text("t", "ação {content}")
+    recorder = MetricsRecorder()
+    task = recorder.start_task("t", time.perf_counter())
+
+    template.render("código")
+    recorder.end_task(task, ok=True, duration=0.0)
+
+    assert (task.template_bytes, task.content_bytes) == (
+        len("ação \n".encode()),
+        len("código".encode()),
+    )
+
+
+def test_docs_prompt_wraps_the_code_with_its_path():
+    prompt = build_prompt("/src/pkg/a.py", "pkg/a.py", CODE)
+
+    assert prompt.startswith("# system:\n")
+    assert "O caminho relativo do arquivo é pkg/a.py." in prompt
+    assert f"<codigo>\n{CODE}\n</codigo>" in prompt
+
+
+@pytest.mark.parametrize(
+    ("name", "fields", "expected"),
+    [
+        ("review", {"filename": "a.py"}, "Revise o arquivo `a.py`"),
+        ("refactor", {}, "Refatore o código a seguir"),
+        (
+            "refactor_chunk",
+            {"label": "a.py (parte 2 de 3)"},
+            "arquivo grande (a.py (parte 2 de 3))",
+        ),
+    ],
+)
+def test_agent_prompts_render_their_fields_and_keep_the_code(name, fields, expected):
+    prompt = load_template(name).render(CODE, **fields)
+
+    assert expected in prompt
+    assert CODE in prompt
+    assert "{filename}" not in prompt and "{label}" not in prompt
@@ -0,0 +1,78 @@
+import codecs
+import os
+
+from scanner import SourceScanner
+
+
+def _tree(root, files):
+    for rel_path, content in files.items():
+        path = os.path.join(root, rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(content if isinstance(content, bytes) else content.encode("utf-8"))
+
+
+def _scan(root, **kwargs):
+    return [file.rel_path.replace(os.sep, "/") for file in SourceScanner(str(root), **kwargs)]
+
+
+def test_scanner_respects_gitignore_rules(tmp_path):
+    _tree(
+        tmp_path,
+        {
+            ".gitignore": "*.log\nbuild/\n/config.py\n",
+            "app.py": "",
+            "debug.log": "",
+            "build/out.py": "",
+            "config.py": "",
+            "pkg/config.py": "",
+            "pkg/.gitignore": "*.tmp\n!manter.tmp\n",
+            "pkg/lixo.tmp": "",
+            "pkg/manter.tmp": "",
+            "outro/lixo.tmp": "",
+        },
+    )
+
+    assert _scan(tmp_path) == ["app.py", "outro/lixo.tmp", "pkg/config.py", "pkg/manter.tmp"]
+    assert "debug.log" in _scan(tmp_path, use_gitignore=False)
+
+
+def test_scanner_applies_include_exclude_and_size_limit(tmp_path):
+    _tree(
+        tmp_path,
+        {
+            "a.py": "x = 1\n",
+            "b.md": "# b\n",
+            "grande.py": "x" * 200,
+            "__pycache__/a.py": "",
+            "node_modules/lib.py": "",
+            "testes/test_a.py": "",
+        },
+    )
+    scanner = SourceScanner(
+        str(tmp_path),
+        include=["*.py"],
+        exclude=["__pycache__", "node_modules", "testes/*"],
+        max_bytes=100,
+    )
+
+    assert [file.rel_path for file in scanner] == ["a.py"]
+    assert scanner.skipped == 1
+
+
+def test_read_skips_binaries_and_detects_encoding(tmp_path):
+    _tree(
+        tmp_path,
+        {
+            "imagem.png": b"\x89PNG\r\n\x1a\n\x00\x00\x00",
+            "latin.py": "# ação\n".encode("latin-1"),
+            "utf8.py": "# ação\n",
+            "bom.py": codecs.BOM_UTF8 + "# ação\n".encode(),
+        },
+    )
+    scanner = SourceScanner(str(tmp_path))
+
+    assert scanner.read(str(tmp_path / "imagem.png")) is None
+    assert scanner.skipped == 1
+    for name in ("latin.py", "utf8.py", "bom.py"):
+        assert scanner.read(str(tmp_path / name)) == "# ação\n"
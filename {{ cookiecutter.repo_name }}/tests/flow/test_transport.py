@@ -0,0 +1,124 @@
+import time
+
+import pytest
+import requests
+from requests.adapters import BaseAdapter
+
+import transport
+from transport import FlowSession, TokenBucket
+
+URL = "http://flow.teste/v2/chat/messages"
+
+
+class ScriptedAdapter(BaseAdapter):
+    """Adaptador do `requests` que devolve as respostas `(status, headers)` na ordem dada."""
+
+    def __init__(self, responses):
+        super().__init__()
+        self.responses = list(responses)
+        self.requests = []
+
+    def send(self, request, **kwargs):
+        self.requests.append(request)
+        status, headers = self.responses.pop(0)
+        response = requests.Response()
+        response.status_code = status
+        response.headers.update(headers)
+        response.request = request
+        response.url = request.url
+        response._content = b"{}"
+        return response
+
+    def close(self):
+        pass
+
+
+class FakeProvider:
+    def __init__(self):
+        self.tokens = ["velho", "novo"]
+        self.rejected = []
+
+    def get(self):
+        return self.tokens[0]
+
+    def refresh(self, rejected=None):
+        self.rejected.append(rejected)
+        self.tokens.pop(0)
+        return self.get()
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    delays = []
+    monkeypatch.setattr(transport.time, "sleep", delays.append)
+    return delays
+
+
+def _session(responses, **kwargs):
+    session = FlowSession(**kwargs)
+    adapter = ScriptedAdapter(responses)
+    session.session.mount("http://", adapter)
+    return session, adapter
+
+
+def test_429_waits_for_retry_after(sleeps):
+    session, adapter = _session([(429, {"Retry-After": "7"}), (200, {})], token="t")
+
+    response = session.post(URL, json={})
+
+    assert response.status_code == 200
+    assert sleeps == [7.0]
+    assert len(adapter.requests) == 2
+    assert adapter.requests[0].headers["Authorization"] == "Bearer t"
+
+
+def test_5xx_gives_up_after_max_retries(sleeps):
+    session, adapter = _session(
+        [(503, {}), (502, {}), (500, {})], max_retries=2, backoff_base=0.5, backoff_max=1.0
+    )
+
+    response = session.get(URL)
+
+    assert response.status_code == 500
+    assert len(adapter.requests) == 3
+    assert len(sleeps) == 2 and all(0 <= delay <= 1.0 for delay in sleeps)
+
+
+def test_401_refreshes_the_token_and_retries_once(sleeps):
+    provider = FakeProvider()
+    session, adapter = _session([(401, {}), (200, {})], token_provider=provider)
+
+    response = session.post(URL, json={})
+
+    assert response.status_code == 200
+    assert provider.rejected == ["velho"]
+    assert [r.headers["Authorization"] for r in adapter.requests] == ["Bearer velho", "Bearer novo"]
+    assert sleeps == []
+
+
+def test_repeated_401_is_returned_to_the_caller(sleeps):
+    provider = FakeProvider()
+    session, adapter = _session([(401, {}), (401, {})], token_provider=provider)
+
+    assert session.post(URL, json={}).status_code == 401
+    assert len(provider.rejected) == 1 and len(adapter.requests) == 2
+
+
+def test_token_bucket_paces_requests():
+    bucket = TokenBucket(rate=50, capacity=1)
+
+    started_at = time.monotonic()
+    for _ in range(6):
+        bucket.acquire()
+
+    # A primeira sai na hora; as outras cinco esperam 1/50 s cada
+    assert time.monotonic() - started_at >= 5 / 50 * 0.9
+
+
+def test_token_bucket_without_rate_does_not_wait(sleeps):
+    bucket = TokenBucket(rate=0)
+
+    for _ in range(100):
+        bucket.acquire()
+
+    assert sleeps == []
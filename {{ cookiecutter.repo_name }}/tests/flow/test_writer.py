@@ -0,0 +1,116 @@
+import os
+
+from metrics import TaskMetrics
+from writer import (
+    INDEX_FILENAME,
+    OutputWriter,
+    mirrored_path,
+    update_mkdocs_nav,
+    write_atomic,
+    write_index,
+)
+
+MKDOCS = """site_name: Projeto
+theme:
+  name: material
+nav:
+  - Início: index.md
+  - Guia: guia.md
+markdown_extensions:
+  - pymdownx.emoji:
+      emoji_index: !!python/name:material.extensions.emoji.twemoji
+"""
+
+
+def test_write_atomic_replaces_the_file_without_leftovers(tmp_path):
+    path = str(tmp_path / "docs" / "a.md")
+
+    write_atomic(path, "primeira")
+    write_atomic(path, "segunda")
+
+    assert (tmp_path / "docs" / "a.md").read_text(encoding="utf-8") == "segunda"
+    assert os.listdir(tmp_path / "docs") == ["a.md"]
+
+
+def test_output_writer_times_writes_and_runs_callbacks_in_order(tmp_path):
+    task = TaskMetrics(key="lote")
+    events = []
+
+    with OutputWriter() as writer:
+        for name in ("a", "b"):
+            path = mirrored_path(str(tmp_path), f"pkg/{name}.py", f"{name}.md")
+            writer.submit(path, name, on_done=lambda name=name: events.append(name), task=task)
+        writer.after(lambda: events.append("fim"))
+
+    assert events == ["a", "b", "fim"]
+    assert writer.written == 2
+    assert task.write_time > 0
+    assert sorted(os.listdir(tmp_path / "pkg")) == ["a.md", "b.md"]
+
+
+def test_output_writer_reports_failed_writes(tmp_path):
+    (tmp_path / "arquivo").write_text("", encoding="utf-8")
+    errors = []
+
+    with OutputWriter() as writer:
+        writer.submit(str(tmp_path / "arquivo" / "a.md"), "x", on_error=errors.append)
+
+    assert len(errors) == 1
+    assert writer.errors and writer.written == 0
+
+
+def test_write_index_groups_outputs_by_directory(tmp_path):
+    for rel_path in ("b/y.md", "a/x.md", "raiz.md", ".flow_journal.jsonl", "a/z.md.partial"):
+        write_atomic(str(tmp_path / rel_path), "")
+
+    path = write_index(str(tmp_path), "Docs")
+
+    assert path == str(tmp_path / INDEX_FILENAME)
+    assert (tmp_path / INDEX_FILENAME).read_text(encoding="utf-8").split("\n") == [
+        "# Docs",
+        "",
+        "",
+        "## .",
+        "",
+        "- [raiz.md](raiz.md)",
+        "",
+        "## a",
+        "",
+        "- [x.md](a/x.md)",
+        "",
+        "## b",
+        "",
+        "- [y.md](b/y.md)",
+        "",
+    ]
+
+
+def test_update_mkdocs_nav_is_idempotent_and_keeps_existing_entries(tmp_path):
+    config = tmp_path / "mkdocs.yml"
+    config.write_text(MKDOCS, encoding="utf-8")
+    output_dir = tmp_path / "docs" / "gerado"
+    write_atomic(str(output_dir / "pkg" / "a.md"), "")
+    write_atomic(str(output_dir / INDEX_FILENAME), "")
+
+    assert update_mkdocs_nav(str(config), str(output_dir), "Referência")
+    first = config.read_text(encoding="utf-8")
+    write_atomic(str(output_dir / "pkg" / "b.md"), "")
+    update_mkdocs_nav(str(config), str(output_dir), "Referência")
+    update_mkdocs_nav(str(config), str(output_dir), "Referência")
+    second = config.read_text(encoding="utf-8")
+
+    assert "  - Início: index.md\n  - Guia: guia.md\n" in first
+    assert '      - "a": "gerado/pkg/a.md"' in first
+    assert second.count("flow:begin Referência") == 1
+    assert '      - "b": "gerado/pkg/b.md"' in second
+    assert second.startswith("site_name: Projeto\ntheme:\n  name: material\nnav:\n  - Início")
+    assert "!!python/name:material.extensions.emoji.twemoji" in second
+    assert second.index("flow:end") < second.index("markdown_extensions")
+
+
+def test_update_mkdocs_nav_ignores_outputs_outside_docs(tmp_path):
+    config = tmp_path / "mkdocs.yml"
+    config.write_text(MKDOCS, encoding="utf-8")
+
+    assert not update_mkdocs_nav(str(config), str(tmp_path / "fora"), "Referência")
+    assert config.read_text(encoding="utf-8") == MKDOCS
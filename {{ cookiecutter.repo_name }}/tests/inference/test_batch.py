@@ -0,0 +1,82 @@
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import joblib
+import pandas as pd
+import pytest
+from sklearn.linear_model import LinearRegression
+
+from data.storage import layer
+from inference.batch import PREDICTION_COLUMN, BatchInference, ScoringSpec, bounded_map
+
+SPEC = ScoringSpec(features=("x",), passthrough=("id", "dt"))
+
+
+def test_bounded_map_keeps_the_input_order():
+    with ThreadPoolExecutor(4) as pool:
+        # Os primeiros itens demoram mais, então terminam depois dos seguintes
+        results = bounded_map(
+            lambda item: pool.submit(lambda: time.sleep(0.02 * (5 - item)) or item),
+            range(6),
+            max_in_flight=4,
+        )
+
+        assert list(results) == list(range(6))
+
+
+def test_bounded_map_limits_the_items_in_flight():
+    submitted, consumed, in_flight = [], [], []
+
+    def submit(item):
+        submitted.append(item)
+        future = Future()
+        future.set_result(item)
+        return future
+
+    for item in bounded_map(submit, range(10), max_in_flight=3):
+        consumed.append(item)
+        in_flight.append(len(submitted) - len(consumed))
+
+    assert consumed == list(range(10))
+    # Além do resultado sendo consumido, no máximo `max_in_flight - 1` seguem pendentes
+    assert max(in_flight) == 2
+
+
+def _model(tmp_path):
+    path = str(tmp_path / "modelo.joblib")
+    joblib.dump(LinearRegression().fit(pd.DataFrame({"x": [0.0, 1.0]}), [1.0, 3.0]), path)
+    return path
+
+
+def _scoring_input(data_dir, rows):
+    frame = pd.DataFrame({"id": range(rows), "dt": ["2024-01-01"] * rows, "x": range(rows)})
+    layer("ml", data_dir).write("entrada", frame.astype({"x": float}))
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_batch_inference_scores_every_chunk(tmp_path, workers):
+    data_dir = str(tmp_path / "dados")
+    _scoring_input(data_dir, 25)
+    inference = BatchInference(
+        _model(tmp_path),
+        "entrada",
+        "predicoes",
+        SPEC,
+        partition_cols=["dt"],
+        data_dir=data_dir,
+        chunk_rows=4,
+        max_workers=workers,
+    )
+
+    report = inference.run()
+
+    predictions = layer("gold", data_dir).read_pandas("predicoes").sort_values("id")
+    assert (report.rows, report.chunks) == (25, 7)
+    assert predictions[PREDICTION_COLUMN].round(6).tolist() == [2.0 * i + 1 for i in range(25)]
+
+
+def test_batch_inference_rejects_the_bronze_layer(tmp_path):
+    with pytest.raises(ValueError, match="Camada de saída inválida: bronze"):
+        BatchInference("m.joblib", "entrada", "saida", SPEC, output_layer="bronze")
+    with pytest.raises(ValueError, match="fora de passthrough: mes"):
+        BatchInference("m.joblib", "entrada", "saida", SPEC, partition_cols=["mes"])
@@ -0,0 +1,65 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data.storage import LayerStore, layer
+from model.matrix import MatrixSpec, materialize
+
+SPEC = MatrixSpec("clientes", ("idade", "renda"), "classe")
+
+
+def _write(data_dir, rows, start=0):
+    frame = pd.DataFrame(
+        {
+            "idade": range(start, start + rows),
+            "renda": [float(i) * 10 for i in range(start, start + rows)],
+            "classe": ["sim" if i % 2 else "não" for i in range(start, start + rows)],
+        }
+    )
+    layer("ml", data_dir).write("clientes", frame)
+
+
+def test_materialize_writes_memory_mapped_x_and_y(tmp_path):
+    data_dir, matrix_dir = str(tmp_path / "dados"), str(tmp_path / "matrizes")
+    _write(data_dir, 10)
+
+    matrix = materialize(SPEC, data_dir, matrix_dir, chunk_rows=3)
+    x, y = matrix.load()
+
+    assert isinstance(x, np.memmap) and x.dtype == np.float32 and x.shape == (10, 2)
+    assert x[:, 1].tolist() == [i * 10.0 for i in range(10)]
+    assert y.dtype.kind == "U" and y[:2].tolist() == ["não", "sim"]
+    assert matrix.frame(x).columns.tolist() == ["idade", "renda"]
+
+
+def test_materialize_reuses_the_matrix_until_the_input_changes(tmp_path):
+    data_dir, matrix_dir = str(tmp_path / "dados"), str(tmp_path / "matrizes")
+    _write(data_dir, 10)
+    first = materialize(SPEC, data_dir, matrix_dir)
+    written_at = os.path.getmtime(first.x_path)
+
+    again = materialize(SPEC, data_dir, matrix_dir)
+    assert again == first and os.path.getmtime(again.x_path) == written_at
+
+    _write(data_dir, 4, start=10)
+    changed = materialize(SPEC, data_dir, matrix_dir)
+
+    assert changed.rows == 4 and changed.path != first.path
+    assert os.listdir(os.path.join(matrix_dir, "clientes")) == [os.path.basename(changed.path)]
+
+
+def test_materialize_rejects_empty_or_changing_datasets(tmp_path, monkeypatch):
+    data_dir, matrix_dir = str(tmp_path / "dados"), str(tmp_path / "matrizes")
+    _write(data_dir, 10)
+
+    with pytest.raises(ValueError, match="Nenhuma linha"):
+        empty = MatrixSpec("clientes", ("idade",), "classe", filters=[("idade", ">", 99)])
+        materialize(empty, data_dir, matrix_dir)
+
+    # Linhas gravadas entre a contagem e a leitura não cabem no memory-map
+    monkeypatch.setattr(LayerStore, "count_rows", lambda self, dataset, filters=None: 6)
+    with pytest.raises(ValueError, match="clientes mudou durante a conversão"):
+        materialize(SPEC, data_dir, matrix_dir, chunk_rows=4)
+    assert os.listdir(os.path.join(matrix_dir, "clientes")) == []
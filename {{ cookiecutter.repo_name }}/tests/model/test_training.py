@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LogisticRegression
+
+from data.storage import layer
+from inference.batch import load_model
+from model.matrix import MatrixSpec
+from model.training import SearchSpec, TrainingJob, load_metadata
+
+
+def _write(data_dir, rows=120):
+    rng = np.random.default_rng(0)
+    x = rng.normal(size=rows)
+    frame = pd.DataFrame({"x": x, "ruido": rng.normal(size=rows), "classe": (x > 0).astype(int)})
+    layer("ml", data_dir).write("clientes", frame)
+
+
+@pytest.mark.parametrize(
+    ("kwargs", "message"),
+    [
+        ({"max_resources": "tudo"}, "max_resources inválido"),
+        ({"min_resources": "maior"}, "min_resources inválido"),
+        ({"resource": "max_iter"}, "informe max_resources"),
+    ],
+)
+def test_search_spec_validates_the_resources(kwargs, message):
+    with pytest.raises(ValueError, match=message):
+        SearchSpec({"C": [1.0]}, **kwargs)
+
+
+def test_training_job_saves_the_best_model_and_its_metadata(tmp_path):
+    data_dir = str(tmp_path / "dados")
+    _write(data_dir)
+    model_path = str(tmp_path / "modelos" / "churn.joblib")
+    job = TrainingJob(
+        LogisticRegression(),
+        MatrixSpec("clientes", ("x", "ruido"), "classe"),
+        SearchSpec({"C": [0.001, 1.0, 10.0]}, cv=3),
+        model_path,
+        data_dir=data_dir,
+        matrix_dir=str(tmp_path / "matrizes"),
+        max_workers=1,
+    )
+
+    report = job.run()
+
+    model = load_model(model_path)
+    metadata = load_metadata(model_path)
+    assert report.rows == 120 and report.candidates[0] == 3
+    assert report.candidates[-1] < report.candidates[0]
+    assert list(model.feature_names_in_) == ["x", "ruido"]
+    assert metadata["best_params"] == report.best_params
+    assert metadata["rounds"][0] == {"candidates": 3, "resources": report.resources[0]}
+    assert metadata["top_candidates"][0]["params"] == report.best_params
@@ -0,0 +1,94 @@
+import json
+import os
+import shutil
+
+import pandas as pd
+
+from data.storage import layer
+from pipelines.DS.feature_pipeline.features import FEATURE_MANIFEST, FeatureSet, refresh
+
+
+# As features rodam num pool de processos, então ficam no nível do módulo
+def ticket_medio(frame):
+    return frame["valor"] / frame["itens"]
+
+
+def valor_dobrado(frame):
+    return frame["valor"] * 2
+
+
+def _feature_set(*features, version="1"):
+    feature_set = FeatureSet(
+        "clientes", "vendas", keys=("id",), partition_key="dt", version=version
+    )
+    for func in features:
+        feature_set.feature(columns=["valor", "itens"])(func)
+    return feature_set
+
+
+def _write_day(data_dir, day, values):
+    frame = pd.DataFrame({"dt": day, "id": range(len(values)), "valor": values, "itens": 2})
+    layer("silver", data_dir).write("vendas", frame, partition_cols=["dt"])
+
+
+def _features(data_dir, feature_set):
+    frame = layer("ml", data_dir).read_pandas(feature_set.output_dataset)
+    return frame.sort_values(["dt", "id"]).reset_index(drop=True)
+
+
+def test_refresh_only_recomputes_changed_partitions(tmp_path):
+    data_dir = str(tmp_path)
+    _write_day(data_dir, "2024-01-01", [10.0, 20.0])
+    _write_day(data_dir, "2024-01-02", [30.0])
+    feature_set = _feature_set(ticket_medio)
+
+    first = refresh(feature_set, data_dir)
+    unchanged = refresh(feature_set, data_dir)
+    _write_day(data_dir, "2024-01-02", [40.0])
+    _write_day(data_dir, "2024-01-03", [50.0])
+    changed = refresh(feature_set, data_dir)
+
+    assert (first.computed, first.rows) == (["dt=2024-01-01", "dt=2024-01-02"], 3)
+    assert (unchanged.computed, unchanged.skipped) == ([], 2)
+    assert (changed.computed, changed.skipped) == (["dt=2024-01-02", "dt=2024-01-03"], 1)
+    assert _features(data_dir, feature_set)["ticket_medio"].tolist() == [5.0, 10.0, 20.0, 25.0]
+
+
+def test_refresh_removes_partitions_deleted_from_silver(tmp_path):
+    data_dir = str(tmp_path)
+    _write_day(data_dir, "2024-01-01", [10.0])
+    _write_day(data_dir, "2024-01-02", [30.0])
+    feature_set = _feature_set(ticket_medio)
+    refresh(feature_set, data_dir)
+
+    shutil.rmtree(os.path.join(layer("silver", data_dir).path("vendas"), "dt=2024-01-01"))
+    report = refresh(feature_set, data_dir)
+
+    assert report.removed == ["dt=2024-01-01"]
+    assert _features(data_dir, feature_set)["dt"].astype(str).tolist() == ["2024-01-02"]
+
+
+def test_changing_the_features_recomputes_everything(tmp_path):
+    data_dir = str(tmp_path)
+    _write_day(data_dir, "2024-01-01", [10.0])
+    refresh(_feature_set(ticket_medio), data_dir)
+
+    report = refresh(_feature_set(ticket_medio, valor_dobrado), data_dir)
+
+    assert report.computed == ["dt=2024-01-01"]
+    assert _features(data_dir, _feature_set())["valor_dobrado"].tolist() == [20.0]
+
+
+def test_versions_are_materialized_side_by_side(tmp_path):
+    data_dir = str(tmp_path)
+    _write_day(data_dir, "2024-01-01", [10.0])
+    refresh(_feature_set(ticket_medio), data_dir)
+    refresh(_feature_set(ticket_medio, version="2"), data_dir)
+
+    ml = layer("ml", data_dir)
+    for version in ("1", "2"):
+        with open(
+            os.path.join(ml.path(f"clientes/v{version}"), FEATURE_MANIFEST), encoding="utf-8"
+        ) as f:
+            manifest = json.load(f)
+        assert (manifest["version"], list(manifest["partitions"])) == (version, ["dt=2024-01-01"])
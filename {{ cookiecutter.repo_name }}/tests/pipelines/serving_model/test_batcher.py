@@ -0,0 +1,46 @@
+import threading
+
+import pytest
+
+from pipelines.DE.serving_model.batcher import MicroBatcher
+
+
+def test_concurrent_rows_share_one_model_call():
+    batches = []
+    batcher = MicroBatcher(
+        lambda rows: batches.append(len(rows)) or [row["x"] * 2 for row in rows],
+        max_batch_size=4,
+        max_wait_ms=1000,
+    )
+
+    futures = [batcher.submit({"x": x}) for x in range(4)]
+
+    assert [future.result(timeout=1) for future in futures] == [0, 2, 4, 6]
+    batcher.close()
+    assert batches == [4]
+    assert batcher.snapshot()["mean_batch_size"] == 4
+
+
+def test_a_partial_batch_leaves_after_max_wait():
+    batcher = MicroBatcher(lambda rows: [1] * len(rows), max_batch_size=100, max_wait_ms=5)
+
+    assert batcher.submit({"x": 1}).result(timeout=1) == 1
+    batcher.close()
+
+
+def test_model_errors_reach_every_row_of_the_batch():
+    release = threading.Event()
+
+    def predict(rows):
+        release.wait(1)
+        return [0] * (len(rows) - 1)
+
+    batcher = MicroBatcher(predict, max_batch_size=2, max_wait_ms=1000)
+    futures = [batcher.submit({"x": x}) for x in range(2)]
+    release.set()
+
+    for future in futures:
+        with pytest.raises(ValueError, match="1 predições para 2 linhas"):
+            future.result(timeout=1)
+    batcher.close()
+    assert not batcher.thread.is_alive()
@@ -0,0 +1,93 @@
+import http.client
+import json
+
+import joblib
+import pandas as pd
+import pytest
+from sklearn.linear_model import LinearRegression
+
+from data.storage import layer
+from pipelines.DE.serving_model.server import FeatureLookup, ModelService, ServingServer
+
+
+class BrokenModel:
+    """Modelo cujo `predict` falha com um KeyError interno (não é um id desconhecido)."""
+
+    feature_names_in_ = ("x",)
+
+    def predict(self, frame):
+        raise KeyError("coluna_interna")
+
+
+def _save(tmp_path, model, name="modelo.joblib"):
+    path = str(tmp_path / name)
+    joblib.dump(model, path)
+    return path
+
+
+@pytest.fixture
+def server(tmp_path):
+    model = LinearRegression().fit(pd.DataFrame({"x": [0.0, 1.0]}), [1.0, 3.0])
+    store = layer("ml", str(tmp_path / "dados"))
+    store.write("features", pd.DataFrame({"id": [10, 20], "x": [1.0, 2.0]}))
+    service = ModelService(_save(tmp_path, model), max_wait_ms=1)
+    service.lookup = FeatureLookup(store, "features", "id", service.features)
+    with ServingServer(service) as running:
+        yield running
+
+
+def _request(server, method, path, body=None, headers=None):
+    host, port = server.httpd.server_address[:2]
+    connection = http.client.HTTPConnection(host, port, timeout=5)
+    try:
+        connection.request(method, path, body=body, headers=headers or {})
+        response = connection.getresponse()
+        return response.status, json.loads(response.read())
+    finally:
+        connection.close()
+
+
+def _predict(server, payload):
+    return _request(server, "POST", "/predict", json.dumps(payload))
+
+
+def test_predict_by_features_and_by_id(server):
+    assert _predict(server, {"features": {"x": 2.0}}) == (200, {"prediction": pytest.approx(5.0)})
+    assert _predict(server, {"id": 10}) == (200, {"prediction": pytest.approx(3.0)})
+    assert _predict(server, {"id": 10})[0] == 200
+
+    metrics = _request(server, "GET", "/metrics")[1]
+    assert metrics["request"]["count"] == 3
+    assert metrics["cache"]["hits"] == 1
+
+
+def test_invalid_requests_are_400_and_unknown_ids_404(server):
+    assert _predict(server, {"features": {"y": 1}}) == (400, {"error": "Features ausentes: x"})
+    assert _request(server, "POST", "/predict", "{não é json")[0] == 400
+    assert _predict(server, [1, 2])[0] == 400
+    assert _predict(server, {"id": 99}) == (404, {"error": "Entidade não encontrada: 99"})
+    assert _request(server, "POST", "/outra", "{}")[0] == 404
+    assert _request(server, "GET", "/metrics")[1]["errors"] == 4
+
+
+def test_invalid_content_length_is_400(server):
+    status, body = _request(server, "POST", "/predict", headers={"Content-Length": "abc"})
+
+    assert (status, body) == (400, {"error": "Content-Length inválido"})
+
+
+def test_model_errors_are_500(tmp_path):
+    service = ModelService(_save(tmp_path, BrokenModel()), max_wait_ms=1)
+
+    with ServingServer(service) as running:
+        status, body = _predict(running, {"features": {"x": 1.0}})
+
+    assert status == 500
+    assert "coluna_interna" in body["error"]
+
+
+def test_health_describes_the_model(server):
+    status, health = _request(server, "GET", "/health")
+
+    assert status == 200
+    assert (health["model"], health["features"], health["lookup"]) == ("modelo.joblib", ["x"], "id")
@@ -0,0 +1,41 @@
+from pipelines.DE.serving_model.stats import LatencyHistogram, LRUCache
+
+
+def test_histogram_percentiles_use_the_bucket_upper_bounds():
+    histogram = LatencyHistogram()
+    for seconds in (0.0001, 0.0008, 0.004, 7.0):
+        histogram.observe(seconds)
+
+    snapshot = histogram.snapshot()
+
+    assert (snapshot["p50_ms"], snapshot["p95_ms"]) == (1, 7000.0)
+    assert snapshot["count"] == 4 and snapshot["max_ms"] == 7000.0
+    assert snapshot["buckets"] == {"<=0.25ms": 1, "<=1ms": 1, "<=5ms": 1, ">5000ms": 1}
+
+
+def test_empty_histogram_reports_zeros():
+    snapshot = LatencyHistogram().snapshot()
+
+    assert (snapshot["count"], snapshot["mean_ms"], snapshot["p99_ms"]) == (0, 0.0, 0.0)
+
+
+def test_lru_cache_evicts_the_least_recently_used_key():
+    cache = LRUCache(2)
+    loads = []
+
+    def load(key):
+        loads.append(key)
+        return None if key == "vazio" else key.upper()
+
+    for key in ("a", "b", "a", "c", "b", "vazio", "vazio"):
+        cache.get_or_load(key, load)
+
+    assert list(cache.items) == ["c", "b"]
+    assert loads == ["a", "b", "c", "b", "vazio", "vazio"]
+    assert cache.snapshot() == {
+        "size": 2,
+        "max_size": 2,
+        "hits": 1,
+        "misses": 6,
+        "hit_rate": round(1 / 7, 4),
+    }
@@ -0,0 +1,107 @@
+import json
+import os
+
+from pipelines.orchestrator import RUNS_LOG, Pipeline
+
+
+# Os passos rodam em outros processos, então ficam no nível do módulo
+def load(path):
+    with open(path, encoding="utf-8") as f:
+        return [int(line) for line in f]
+
+
+def scale(load, factor):
+    return [value * factor for value in load]
+
+
+def total(scale):
+    return sum(scale)
+
+
+def broken():
+    raise RuntimeError("fonte indisponível")
+
+
+def after_broken(broken):
+    return broken
+
+
+def _statuses(report):
+    return {record.name: record.status for record in report.steps}
+
+
+def _pipeline(tmp_path, factor=2):
+    source = tmp_path / "entrada.txt"
+    if not source.exists():
+        source.write_text("1\n2\n3\n", encoding="utf-8")
+    pipeline = Pipeline("teste", cache_dir=str(tmp_path / "cache"))
+    pipeline.step(inputs=[str(source)], params={"path": str(source)})(load)
+    pipeline.step(deps=["load"], params={"factor": factor})(scale)
+    pipeline.step(deps=["scale"])(total)
+    return pipeline
+
+
+def test_steps_run_in_dependency_order_and_are_cached(tmp_path):
+    first = _pipeline(tmp_path).run(max_workers=2)
+    second = _pipeline(tmp_path).run(max_workers=2)
+
+    assert first.ok
+    assert [record.name for record in first.steps] == ["load", "scale", "total"]
+    assert set(_statuses(first).values()) == {"executado"}
+    assert set(_statuses(second).values()) == {"cache"}
+    assert _pipeline(tmp_path).output("total") == 12
+
+
+def test_changed_params_and_inputs_invalidate_downstream_steps(tmp_path):
+    _pipeline(tmp_path).run(max_workers=1)
+
+    params = _pipeline(tmp_path, factor=3).run(max_workers=1)
+    (tmp_path / "entrada.txt").write_text("1\n2\n3\n4\n", encoding="utf-8")
+    inputs = _pipeline(tmp_path, factor=3).run(max_workers=1)
+
+    assert _statuses(params) == {"load": "cache", "scale": "executado", "total": "executado"}
+    assert set(_statuses(inputs).values()) == {"executado"}
+    assert _pipeline(tmp_path).output("total") == 30
+
+
+def test_forced_step_with_the_same_output_keeps_the_rest_cached(tmp_path):
+    _pipeline(tmp_path).run(max_workers=1)
+
+    report = _pipeline(tmp_path).run(force=["load"], max_workers=1)
+
+    assert _statuses(report) == {"load": "executado", "scale": "cache", "total": "cache"}
+
+
+def test_failed_step_blocks_its_dependents_only(tmp_path):
+    pipeline = _pipeline(tmp_path)
+    pipeline.step()(broken)
+    pipeline.step(deps=["broken"])(after_broken)
+
+    report = pipeline.run(max_workers=2)
+
+    assert not report.ok
+    assert _statuses(report) == {
+        "load": "executado",
+        "scale": "executado",
+        "total": "executado",
+        "broken": "falhou",
+        "after_broken": "bloqueado",
+    }
+    failed = next(record for record in report.steps if record.name == "broken")
+    assert failed.error == "RuntimeError: fonte indisponível"
+    # Um passo que falhou não entra no cache
+    assert _statuses(pipeline.run(targets=["after_broken"], max_workers=1)) == {
+        "broken": "falhou",
+        "after_broken": "bloqueado",
+    }
+
+
+def test_runs_are_logged(tmp_path):
+    pipeline = _pipeline(tmp_path)
+    pipeline.run(targets=["scale"], max_workers=1)
+
+    with open(os.path.join(pipeline.path, RUNS_LOG), encoding="utf-8") as f:
+        entry = json.loads(f.readline())
+
+    assert [step["name"] for step in entry["steps"]] == ["load", "scale"]
+    assert all(step["elapsed"] > 0 for step in entry["steps"])
@@ -0,0 +1,71 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import SGDClassifier
+
+from data.storage import layer
+from model.training import load_metadata
+from pipelines.DS.training_pipeline.train import load_estimator, main, resources
+
+
+def test_resources_accepts_integers_and_names():
+    assert resources("60") == 60
+    assert resources("exhaust") == "exhaust"
+
+
+def test_load_estimator_needs_the_full_import_path():
+    estimator = load_estimator("sklearn.linear_model.SGDClassifier", {"alpha": 0.01})
+
+    assert isinstance(estimator, SGDClassifier) and estimator.alpha == 0.01
+    with pytest.raises(ValueError, match="caminho completo"):
+        load_estimator("SGDClassifier", {})
+
+
+def test_main_trains_with_the_estimator_iterations_as_resource(tmp_path):
+    data_dir = str(tmp_path / "dados")
+    rng = np.random.default_rng(0)
+    x = rng.normal(size=90)
+    layer("ml", data_dir).write("clientes", pd.DataFrame({"x": x, "classe": (x > 0).astype(int)}))
+    model_path = str(tmp_path / "churn.joblib")
+
+    code = main(
+        [
+            "clientes",
+            "--features",
+            "x",
+            "--target",
+            "classe",
+            "--estimator",
+            "sklearn.linear_model.SGDClassifier",
+            "--set",
+            json.dumps({"tol": None, "random_state": 0}),
+            "--params",
+            json.dumps({"alpha": [0.0001, 0.01, 1.0]}),
+            "--resource",
+            "max_iter",
+            "--min-resources",
+            "5",
+            "--max-resources",
+            "45",
+            "--cv",
+            "3",
+            "--model",
+            model_path,
+            "--data-dir",
+            data_dir,
+            "--matrix-dir",
+            str(tmp_path / "matrizes"),
+            "-j",
+            "1",
+        ]
+    )
+
+    metadata = load_metadata(model_path)
+    assert code == 0
+    assert metadata["rounds"] == [
+        {"candidates": 3, "resources": 5},
+        {"candidates": 1, "resources": 15},
+    ]
+    assert metadata["search"]["resource"] == "max_iter"